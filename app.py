@@ -19,6 +19,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-State-Version"],  # /devices-db, /zones 조건부 GET
 )
 
 # DB 테이블 생성 (이미 있으면 무시)
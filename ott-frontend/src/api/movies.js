@@ -2,31 +2,45 @@
 
 const BASE_URL = "http://127.0.0.1:8000";
 
+// 목록 화면(MovieCard / 장르 필터)에 필요한 필드만 받음 (description 제외)
+const LIST_FIELDS = "id,title,genre,year,ageRating,posterUrl";
+
+// 한 번에 받는 개수 (서버 최대 1000). next_offset 이 null 이 될 때까지 이어서 받음
+const PAGE_SIZE = 200;
+
 export async function searchMovies(q) {
-  const res = await fetch(
-    `${BASE_URL}/movies?q=${encodeURIComponent(q || "")}`
-  );
+  const movies = [];
+  let offset = 0;
 
-  if (!res.ok) {
-    console.error("Failed to fetch movies", res.status);
-    return [];
+  while (offset !== null && offset !== undefined) {
+    const params = new URLSearchParams({
+      q: q || "",
+      fields: LIST_FIELDS,
+      offset: String(offset),
+      limit: String(PAGE_SIZE),
+    });
+    const res = await fetch(`${BASE_URL}/movies?${params}`);
+
+    if (!res.ok) {
+      console.error("Failed to fetch movies", res.status);
+      return movies;
+    }
+
+    const data = await res.json();
+    movies.push(...data.results); // FastAPI에서 results 배열로 내려줌
+    offset = data.next_offset;
   }
 
-  const data = await res.json();
-  return data.results; // FastAPI에서 results 배열로 내려줌
+  return movies;
 }
 
 export async function getMovieById(id) {
-  // 아직 /movies/{id} 엔드포인트는 없으니까
-  // /movies 전체를 받아서 그 안에서 찾아줌
-  const res = await fetch(`${BASE_URL}/movies`);
+  const res = await fetch(`${BASE_URL}/movies/${encodeURIComponent(id)}`);
 
   if (!res.ok) {
-    console.error("Failed to fetch movies", res.status);
+    if (res.status !== 404) console.error("Failed to fetch movie", res.status);
     return null;
   }
 
-  const data = await res.json();
-  const movie = data.results.find((m) => m.id === Number(id));
-  return movie ?? null;
+  return await res.json();
 }
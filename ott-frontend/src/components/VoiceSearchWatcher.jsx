@@ -1,29 +1,43 @@
 // src/components/VoiceSearchWatcher.jsx
-import { useEffect, useState } from "react";
+import { useEffect, useRef } from "react";
 import { useNavigate, useLocation } from "react-router-dom";
 
 const API_BASE = "http://127.0.0.1:8000";
 
+// (선택) 특정 화자 / 스피커 기기 결과만 받기. 비워두면 전체
+const VOICE_USER = import.meta.env.VITE_VOICE_USER || "";
+const VOICE_DEVICE = import.meta.env.VITE_VOICE_DEVICE || "";
+
+function eventsUrl() {
+  const params = new URLSearchParams({ fields: "id" });
+  if (VOICE_USER) params.set("user", VOICE_USER);
+  if (VOICE_DEVICE) params.set("device", VOICE_DEVICE);
+  return `${API_BASE}/voice-search/events?${params}`;
+}
+
 export default function VoiceSearchWatcher() {
   const navigate = useNavigate();
   const location = useLocation();
-  const [lastToken, setLastToken] = useState("");
+  const lastSeq = useRef(0);
+
+  // 현재 위치는 ref 로 들고 있어서 페이지 이동해도 SSE 연결은 다시 안 맺음
+  const locationRef = useRef(location);
+  locationRef.current = location;
 
   useEffect(() => {
-    const interval = setInterval(async () => {
+    // 서버가 새 검색 결과를 바로 push (끊기면 EventSource 가 알아서 재연결)
+    const source = new EventSource(eventsUrl());
+
+    const onVoiceSearch = async (e) => {
       try {
-        const res = await fetch(`${API_BASE}/voice-search`);
-        if (!res.ok) return;
+        const data = JSON.parse(e.data);
+        if (data.seq <= lastSeq.current) return; // 이미 처리한 결과
+        lastSeq.current = data.seq;
 
-        const data = await res.json();
         const query = (data.query || "").trim();
         if (!query) return;
 
-        const token = `${query}|${data.count}`;
-        if (token === lastToken) return; // 이미 처리한 요청이면 무시
-        setLastToken(token);
-
-        console.log("🔔 Voice search polled:", data);
+        console.log("🔔 Voice search pushed:", data);
 
         if (data.allowed === false) {
           const msg =
@@ -33,22 +47,29 @@ export default function VoiceSearchWatcher() {
           console.warn("Blocked voice query:", msg);
 
           // 한 번 처리했으니 서버 쪽 상태 초기화
-          await fetch(`${API_BASE}/voice-search/reset`, { method: "POST" });
+          const params = new URLSearchParams();
+          if (data.user) params.set("user", data.user);
+          if (data.device) params.set("device", data.device);
+          await fetch(`${API_BASE}/voice-search/reset?${params}`, { method: "POST" });
           return;
         }
 
-        const currentQ = new URLSearchParams(location.search || "").get("q");
-        if (location.pathname === "/search" && currentQ === query) return;
+        const { pathname, search } = locationRef.current;
+        const currentQ = new URLSearchParams(search || "").get("q");
+        if (pathname === "/search" && currentQ === query) return;
 
         console.log("✅ Voice search accepted! query =", query);
         navigate(`/search?q=${encodeURIComponent(query)}`);
       } catch (err) {
-        console.warn("Voice search polling error:", err);
+        console.warn("Voice search event error:", err);
       }
-    }, 1500);
+    };
+
+    source.addEventListener("voice-search", onVoiceSearch);
+    source.onerror = () => console.warn("Voice search stream disconnected, retrying…");
 
-    return () => clearInterval(interval);
-  }, [lastToken, location.pathname, location.search, navigate]);
+    return () => source.close();
+  }, [navigate]);
 
   return null;
 }
@@ -4,3 +4,19 @@ import axios from "axios"
 export const api = axios.create({
   baseURL: "http://127.0.0.1:8000", // FastAPI가 돌아가는 주소/포트
 })
+
+// ETag 로 조건부 GET: 바뀐 게 없으면 서버가 304 (본문 / DB 조회 없음) -> 지난 응답 재사용
+const etagCache = new Map()
+
+export async function getCached(url) {
+  const cached = etagCache.get(url)
+  const res = await api.get(url, {
+    headers: cached ? { "If-None-Match": cached.etag } : {},
+    validateStatus: (s) => (s >= 200 && s < 300) || s === 304,
+  })
+  if (res.status === 304 && cached) return cached.data
+
+  const etag = res.headers.etag
+  if (etag) etagCache.set(url, { etag, data: res.data })
+  return res.data
+}
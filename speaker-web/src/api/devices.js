@@ -1,9 +1,8 @@
 // src/api/devices.js
-import { api } from "./client"
+import { api, getCached } from "./client"
 
 export async function getDevicesApi() {
-  const res = await api.get("/devices-db")
-  return res.data
+  return getCached("/devices-db")
 }
 
 export async function createDeviceApi({ name, type, zoneId }) {
@@ -0,0 +1,7 @@
+// src/api/home.js
+import { getCached } from "./client"
+
+// 존 + 존별 기기 (요청 한 번, 안 바뀌었으면 304)
+export async function getHomeSnapshotApi() {
+  return getCached("/home/snapshot")
+}
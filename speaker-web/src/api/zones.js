@@ -1,9 +1,8 @@
 // src/api/zones.js
-import { api } from "./client"
+import { api, getCached } from "./client"
 
 export async function getZonesApi() {
-  const res = await api.get("/zones")
-  return res.data
+  return getCached("/zones")
 }
 
 export async function createZoneApi({ name }) {
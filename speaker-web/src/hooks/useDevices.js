@@ -1,58 +1,117 @@
 // src/hooks/useDevices.js
-import { useEffect, useState, useCallback } from "react"
-import { getDevicesApi } from "../api/devices"
-import { getZonesApi } from "../api/zones"
+import { useEffect, useState, useCallback, useRef } from "react"
+import { getHomeSnapshotApi } from "../api/home"
+
+// 기기 상태 변경 push (폴링 대신 WebSocket, 끊기면 RECONNECT_MS 뒤 재연결)
+const EVENTS_URL = "ws://127.0.0.1:8000/ws/devices"
+const RECONNECT_MS = 2000
 
 export function useDevices() {
   const [devices, setDevices] = useState([])
   const [loading, setLoading] = useState(false)
+  const zoneMapRef = useRef(new Map())
+  const lastSeq = useRef(null)
+
+  const withZone = useCallback((d) => {
+    const z = zoneMapRef.current.get(d.zone_id)
+    return {
+      ...d,
+      zone_display_name: z?.display_name || z?.name || "Unknown Zone",
+    }
+  }, [])
 
   const fetchDevices = useCallback(async () => {
     try {
       setLoading(true)
 
-      // ✅ DB 디바이스 + zones를 같이 호출
-      const [devs, zones] = await Promise.all([
-        getDevicesApi(),   // /devices-db
-        getZonesApi(),     // /zones
-      ])
-
-      const zoneMap = new Map(zones.map((z) => [z.id, z]))
+      // ✅ 존 + 존별 기기를 한 번에 (/home/snapshot)
+      const { zones } = await getHomeSnapshotApi()
 
-      const enriched = devs.map((d) => {
-        const z = zoneMap.get(d.zone_id)
-        return {
-          ...d,
-          zone_display_name: z?.display_name || z?.name || "Unknown Zone",
-        }
-      })
-
-      setDevices(enriched)
+      zoneMapRef.current = new Map(zones.map((z) => [z.id, z]))
+      setDevices(zones.flatMap((z) => z.devices.map(withZone)))
     } catch (err) {
       console.error("Failed to fetch devices/zones", err)
     } finally {
       setLoading(false)
     }
-  }, [])
+  }, [withZone])
+
+  const applyEvent = useCallback(
+    (event) => {
+      const device = event.device
+      if (event.kind === "deleted") {
+        setDevices((prev) => prev.filter((d) => d.id !== device.id))
+        return
+      }
+      if (event.kind === "created" && !zoneMapRef.current.has(device.zone_id)) {
+        // 새 존에 생긴 기기: 존 이름까지 다시 읽음
+        fetchDevices()
+        return
+      }
+      setDevices((prev) => {
+        const idx = prev.findIndex((d) => d.id === device.id)
+        if (idx === -1) return [...prev, withZone(device)]
+        const next = prev.slice()
+        next[idx] = withZone({ ...prev[idx], ...device })
+        return next
+      })
+    },
+    [fetchDevices, withZone]
+  )
 
   useEffect(() => {
-    fetchDevices()
-    const id = setInterval(fetchDevices, 1500)
-    return () => clearInterval(id)
-  }, [fetchDevices])
+    let socket = null
+    let timer = null
+    let closed = false
+
+    const connect = () => {
+      const url =
+        lastSeq.current === null ? EVENTS_URL : `${EVENTS_URL}?since=${lastSeq.current}`
+      socket = new WebSocket(url)
+
+      socket.onmessage = (e) => {
+        const event = JSON.parse(e.data)
+        if (event.kind === "hello") {
+          // 처음 연결: 전체 목록 한 번 읽고 그 뒤로는 이벤트만
+          if (lastSeq.current === null) fetchDevices()
+          lastSeq.current = event.seq
+          return
+        }
+        if (event.kind === "resync") {
+          // 놓친 이벤트가 너무 많음 (또는 서버 재시작)
+          lastSeq.current = event.seq
+          fetchDevices()
+          return
+        }
+        lastSeq.current = Math.max(lastSeq.current ?? 0, event.seq)
+        applyEvent(event)
+      }
+
+      socket.onclose = () => {
+        if (closed) return
+        console.warn("Device events disconnected, retrying…")
+        timer = setTimeout(connect, RECONNECT_MS)
+      }
+    }
+
+    connect()
+    return () => {
+      closed = true
+      clearTimeout(timer)
+      socket?.close()
+    }
+  }, [fetchDevices, applyEvent])
 
   const toggleDevice = async (device) => {
     const newStatus = device.status === "on" ? "off" : "on"
 
     try {
-      // ✅ DB 디바이스 상태 업데이트
+      // ✅ DB 디바이스 상태 업데이트 (결과는 WebSocket 이벤트로 반영됨)
       await fetch(`http://127.0.0.1:8000/devices-db/${device.id}`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ status: newStatus }),
       })
-
-      fetchDevices()
     } catch (err) {
       console.error("Failed to toggle device", err)
     }
@@ -1,11 +1,7 @@
 import { useEffect, useState } from "react"
 import "./DeviceManagement.css"
-import { getZonesApi } from "../../api/zones"
-import {
-  getDevicesApi,
-  createDeviceApi,
-  deleteDeviceApi,
-} from "../../api/devices"
+import { getHomeSnapshotApi } from "../../api/home"
+import { createDeviceApi, deleteDeviceApi } from "../../api/devices"
 
 const DEVICE_TYPES = [
   { value: "light", label: "Light" },
@@ -25,12 +21,10 @@ export default function DeviceManagement() {
   useEffect(() => {
     async function load() {
       try {
-        const [zonesData, devicesData] = await Promise.all([
-          getZonesApi(),
-          getDevicesApi(),
-        ])
-        setZones(zonesData)
-        setDevices(devicesData)
+        // 존 + 존별 기기를 한 번에 (/home/snapshot)
+        const { zones: zonesData } = await getHomeSnapshotApi()
+        setZones(zonesData.map(({ devices, ...zone }) => zone))
+        setDevices(zonesData.flatMap((z) => z.devices))
       } catch (err) {
         console.error(err)
         alert("서버에서 디바이스/존 정보를 불러오지 못했습니다.")
@@ -0,0 +1,86 @@
+"""
+user_voice_profiles.embedding 이 비어 있는(업로드 시 임베딩 저장 전에 만든) 프로필을
+voice_blob 에서 한 번 계산해서 채워 넣는 스크립트.
+
+사용법 (src/ 에서):
+    python backfill_voice_embeddings.py           # 비어 있거나 모델 태그가 다른 것만
+    python backfill_voice_embeddings.py --force   # 전부 다시 계산
+"""
+import argparse
+
+from sqlalchemy import inspect, text
+
+from smarterspeaker.config import MODEL_HOST_MAX_BATCH
+from smarterspeaker.db import SessionLocal, engine
+from smarterspeaker.models import UserVoiceProfile
+from smarterspeaker.speaker.embedding_index import EMBEDDING_MODEL, pack_embedding
+
+
+def ensure_embedding_columns():
+    """기존 DB 에 embedding / embedding_model 컬럼이 없으면 추가 (create_all 은 ALTER 안 해줌)."""
+    columns = {c["name"] for c in inspect(engine).get_columns("user_voice_profiles")}
+
+    with engine.begin() as conn:
+        if "embedding" not in columns:
+            conn.execute(text("ALTER TABLE user_voice_profiles ADD COLUMN embedding BLOB NULL"))
+            print("➕ added column user_voice_profiles.embedding")
+        if "embedding_model" not in columns:
+            conn.execute(text("ALTER TABLE user_voice_profiles ADD COLUMN embedding_model VARCHAR(100) NULL"))
+            print("➕ added column user_voice_profiles.embedding_model")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill ECAPA embeddings for voice profiles")
+    parser.add_argument("--force", action="store_true", help="recompute every profile")
+    parser.add_argument("--batch-size", type=int, default=MODEL_HOST_MAX_BATCH, help="profiles per ECAPA batch")
+    args = parser.parse_args()
+
+    ensure_embedding_columns()
+
+    # ECAPA 모델 로드가 무거우니 컬럼 준비가 끝난 다음에 import
+    # (모델 호스트가 떠 있으면 거기서 계산 - 이 스크립트는 모델을 로드하지 않음)
+    from smarterspeaker.speaker.speaker_verification import extract_embeddings_from_bytes
+
+    db = SessionLocal()
+    updated = failed = 0
+    try:
+        query = db.query(UserVoiceProfile)
+        if not args.force:
+            query = query.filter(
+                (UserVoiceProfile.embedding.is_(None))
+                | (UserVoiceProfile.embedding_model.is_(None))
+                | (UserVoiceProfile.embedding_model != EMBEDDING_MODEL)
+            )
+
+        profiles = query.all()
+        for start in range(0, len(profiles), args.batch_size):
+            chunk = profiles[start:start + args.batch_size]
+            try:
+                embeddings = extract_embeddings_from_bytes([p.voice_blob for p in chunk])
+            except Exception as e:
+                # 배치 중 하나가 망가졌으면 하나씩 다시 (어느 프로필인지 알 수 있게)
+                print(f"⚠️ batch failed ({e}), retrying one by one")
+                embeddings = []
+                for profile in chunk:
+                    try:
+                        embeddings.append(extract_embeddings_from_bytes([profile.voice_blob])[0])
+                    except Exception as e:
+                        print(f"❌ user_id={profile.user_id}: {e}")
+                        embeddings.append(None)
+
+            for profile, emb in zip(chunk, embeddings):
+                if emb is None:
+                    failed += 1
+                    continue
+                profile.embedding = pack_embedding(emb)
+                profile.embedding_model = EMBEDDING_MODEL
+                updated += 1
+
+        db.commit()
+        print(f"✅ backfill done: updated={updated}, failed={failed}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
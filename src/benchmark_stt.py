@@ -0,0 +1,155 @@
+"""
+Whisper 디코딩 프로필 벤치마크: 프로필별 실시간 배율(RTF)과 정확도(WER, 어휘 단어 정확도).
+
+manifest 는 한 줄에 하나씩 (audio 경로는 manifest 기준 상대 경로 가능):
+    {"audio": "clips/cmd_001.wav", "text": "turn on the living room light"}
+
+사용법 (src/ 에서):
+    python benchmark_stt.py clips/manifest.jsonl
+    python benchmark_stt.py clips/manifest.jsonl --profiles command wake --model small
+    python benchmark_stt.py clips/manifest.jsonl --no-db      # DB 없이 영화 제목만 어휘로
+
+- RTF = 디코딩 시간 / 오디오 길이 (1 보다 작을수록 빠름, 첫 클립 한 번은 워밍업으로 제외)
+- WER = 단어 편집 거리 / 정답 단어 수
+- term acc = 정답 문장에 들어 있는 어휘 단어(존/기기 이름, 영화 제목) 중 인식 결과에도 있는 비율
+"""
+import argparse
+import json
+import string
+import time
+from pathlib import Path
+
+from faster_whisper import decode_audio
+
+from smarterspeaker.config import SAMPLE_RATE, WHISPER_MODEL
+from smarterspeaker.speaker.audio_to_text import AudioToText
+from smarterspeaker.speaker.decoding_profiles import PROFILES, with_vocabulary
+from smarterspeaker.speaker.vocabulary import Vocabulary, unique_terms
+
+_PUNCT = str.maketrans('', '', string.punctuation)
+
+
+def words_of(text):
+    return text.translate(_PUNCT).lower().split()
+
+
+def word_errors(ref, hyp):
+    """단어 단위 Levenshtein 거리"""
+    prev = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        cur = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (r != h))
+        prev = cur
+    return prev[-1]
+
+
+def contains(words, phrase):
+    n = len(phrase)
+    return n > 0 and any(words[i:i + n] == phrase for i in range(len(words) - n + 1))
+
+
+def load_manifest(path):
+    base = Path(path).resolve().parent
+    clips = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            audio = decode_audio(str(base / item["audio"]), sampling_rate=SAMPLE_RATE)
+            clips.append((item["audio"], audio, item["text"]))
+    return clips
+
+
+def load_vocabulary(use_db):
+    from smarterspeaker.movies import load_movies
+
+    zones, devices = [], []
+    if use_db:
+        from smarterspeaker import models
+        from smarterspeaker.db import SessionLocal
+
+        db = SessionLocal()
+        try:
+            zones = [n for row in db.query(models.Zone.name, models.Zone.display_name) for n in row]
+            devices = [n for row in db.query(models.Device.name, models.Device.type) for n in row]
+        finally:
+            db.close()
+    titles = [m.get("title") for m in load_movies()]
+    return zones, devices, titles
+
+
+def run_profile(stt, profile, clips, terms):
+    # 워밍업 (모델 첫 호출은 느림)
+    segments, _ = stt.model.transcribe(clips[0][1], **stt.options(profile))
+    list(segments)
+
+    decode_s = audio_s = 0.0
+    errors = ref_words = 0
+    term_hits = term_total = 0
+    for name, audio, reference in clips:
+        start = time.perf_counter()
+        segments, _ = stt.model.transcribe(audio, **stt.options(profile))
+        hypothesis = stt.clean_text(" ".join(s.text for s in segments).strip())
+        decode_s += time.perf_counter() - start
+        audio_s += len(audio) / SAMPLE_RATE
+
+        ref, hyp = words_of(reference), words_of(hypothesis)
+        errors += word_errors(ref, hyp)
+        ref_words += len(ref)
+        for term in terms:
+            if contains(ref, term):
+                term_total += 1
+                term_hits += contains(hyp, term)
+        if ref != hyp:
+            print(f"  [{profile.name}] {name}: '{reference}' -> '{hypothesis}'")
+
+    return {
+        "clips": len(clips),
+        "audio_s": audio_s,
+        "decode_s": decode_s,
+        "rtf": decode_s / audio_s if audio_s else 0.0,
+        "wer": errors / ref_words if ref_words else 0.0,
+        "term_acc": term_hits / term_total if term_total else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Whisper decoding profiles")
+    parser.add_argument("manifest", help="jsonl: {\"audio\": path, \"text\": reference}")
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES), choices=list(PROFILES))
+    parser.add_argument("--model", default=WHISPER_MODEL)
+    parser.add_argument("--no-db", action="store_true", help="use movie titles only as vocabulary")
+    args = parser.parse_args()
+
+    clips = load_manifest(args.manifest)
+    if not clips:
+        print("No clips in manifest")
+        return
+
+    vocab_lists = load_vocabulary(not args.no_db)
+    terms = [words_of(t) for t in unique_terms(*vocab_lists)]
+    stt = AudioToText(args.model, vocabulary=Vocabulary(lambda: vocab_lists))
+    print(f"model={args.model}, {len(clips)} clips, {len(terms)} vocabulary terms")
+
+    # 어휘 prompt 를 쓰는 프로필은 끈 것과도 비교
+    runs = []
+    for name in args.profiles:
+        profile = PROFILES[name]
+        runs.append((name, profile))
+        if profile.use_vocabulary:
+            runs.append((f"{name} (no vocab)", with_vocabulary(profile, False)))
+
+    results = [(label, run_profile(stt, profile, clips, terms)) for label, profile in runs]
+
+    print()
+    print(f"{'profile':<22}{'RTF':>8}{'x realtime':>12}{'WER':>8}{'term acc':>10}")
+    for label, r in results:
+        term_acc = "-" if r["term_acc"] is None else f"{r['term_acc']:.1%}"
+        speed = 1 / r["rtf"] if r["rtf"] else float("inf")
+        print(f"{label:<22}{r['rtf']:>8.3f}{speed:>11.1f}x{r['wer']:>8.1%}{term_acc:>10}")
+
+
+if __name__ == "__main__":
+    main()
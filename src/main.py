@@ -18,6 +18,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-State-Version"],  # /devices-db, /zones 조건부 GET
 )
 
 # 🔥 prefix 없이 그대로 붙이기 (React가 /users/... /devices... 로 부르니까)
@@ -0,0 +1,144 @@
+# src/smarterspeaker/ai/chat_sessions.py
+"""
+GeminiAI 사용자별 대화 세션 관리.
+
+예전에는 chat_sessions dict 에 세션이 영원히 남고 history 도 계속 늘어나서
+오래 켜 둘수록 프롬프트 / 지연시간 / 메모리가 커졌다.
+
+- 사용자당 최근 max_turns 턴(user+model 한 쌍)만 유지
+- 매 호출 전에 history 를 token_budget 안으로 잘라냄 (오래된 턴부터)
+- idle_timeout 초 동안 안 쓴 세션은 삭제
+- 세션 수가 max_sessions 를 넘으면 가장 오래 안 쓴 세션부터 삭제 (LRU)
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+from smarterspeaker.config import (
+    GEMINI_MAX_SESSIONS,
+    GEMINI_SESSION_IDLE_SECONDS,
+    GEMINI_HISTORY_TURNS,
+    GEMINI_HISTORY_TOKENS,
+)
+
+
+def content_text(content) -> str:
+    """history 항목(genai Content 또는 {"role", "parts"} dict)의 텍스트"""
+    parts = content.get("parts", []) if isinstance(content, dict) else getattr(content, "parts", [])
+    texts = []
+    for part in parts:
+        texts.append(part if isinstance(part, str) else getattr(part, "text", "") or "")
+    return " ".join(texts)
+
+
+def estimate_tokens(text: str) -> int:
+    """대충 4글자 = 1토큰 (count_tokens 는 네트워크 호출이라 안 씀)"""
+    return max(1, len(text) // 4) if text else 0
+
+
+class ChatSessionStore:
+    def __init__(
+        self,
+        model,
+        max_sessions: int = GEMINI_MAX_SESSIONS,
+        idle_timeout: float = GEMINI_SESSION_IDLE_SECONDS,
+        max_turns: int = GEMINI_HISTORY_TURNS,
+        token_budget: int = GEMINI_HISTORY_TOKENS,
+        clock=time.monotonic,
+    ):
+        self.model = model
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.clock = clock
+
+        # user_id -> (마지막 사용 시각, ChatSession)
+        self._sessions: "OrderedDict[str, Tuple[float, object]]" = OrderedDict()
+
+        self.created = 0
+        self.idle_evictions = 0
+        self.lru_evictions = 0
+        self.truncated_turns = 0
+
+    def get(self, user_id: str):
+        """user_id 세션을 꺼내고 history 를 예산 안으로 정리해서 반환"""
+        now = self.clock()
+        self.evict_idle(now)
+
+        entry = self._sessions.get(user_id)
+        if entry is None:
+            chat = self.model.start_chat(history=[])
+            self.created += 1
+        else:
+            chat = entry[1]
+            self._trim(chat)
+
+        self._sessions[user_id] = (now, chat)
+        self._sessions.move_to_end(user_id)
+
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.lru_evictions += 1
+        return chat
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def drop(self, user_id: str) -> None:
+        self._sessions.pop(user_id, None)
+
+    def evict_idle(self, now: float = None) -> int:
+        now = self.clock() if now is None else now
+        removed = 0
+        # OrderedDict 앞쪽이 가장 오래 안 쓴 세션
+        while self._sessions:
+            user_id, (last_used, _) = next(iter(self._sessions.items()))
+            if now - last_used <= self.idle_timeout:
+                break
+            del self._sessions[user_id]
+            removed += 1
+        self.idle_evictions += removed
+        return removed
+
+    def history_tokens(self, user_id: str) -> int:
+        entry = self._sessions.get(user_id)
+        if entry is None:
+            return 0
+        return sum(estimate_tokens(content_text(c)) for c in entry[1].history)
+
+    def stats(self) -> Dict[str, int]:
+        per_user = {u: self.history_tokens(u) for u in self._sessions}
+        return {
+            "sessions": len(self._sessions),
+            "history_tokens": sum(per_user.values()),
+            "max_history_tokens": max(per_user.values(), default=0),
+            "created": self.created,
+            "idle_evictions": self.idle_evictions,
+            "lru_evictions": self.lru_evictions,
+            "truncated_turns": self.truncated_turns,
+        }
+
+    # -----------------------------------------------------
+
+    def _trim(self, chat) -> None:
+        """오래된 턴부터 버려서 max_turns / token_budget 을 맞춤"""
+        history: List = list(chat.history)
+        if not history:
+            return
+
+        tokens = [estimate_tokens(content_text(c)) for c in history]
+        start = max(0, len(history) - 2 * self.max_turns)
+        total = sum(tokens[start:])
+        # user/model 한 쌍씩 버림 (마지막 한 턴은 남김)
+        while total > self.token_budget and len(history) - start > 2:
+            total -= tokens[start] + tokens[start + 1]
+            start += 2
+
+        if start == 0:
+            return
+        self.truncated_turns += start // 2
+        chat.history = history[start:]
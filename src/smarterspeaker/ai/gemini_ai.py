@@ -1,108 +1,462 @@
 import google.generativeai as genai
+import asyncio
 import json
+import time
+from collections import deque
 from typing import Dict, Optional
 
+from .chat_sessions import ChatSessionStore
+from .response_cache import ResponseCache
+
+# 모델이 돌려줄 수 있는 의도 카테고리
+INTENTS = ("smart_home", "weather", "schedule", "music", "general")
+
+# 단일 호출 모드에서 모델이 반드시 지켜야 하는 JSON 스키마
+SINGLE_PASS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "intent": {"type": "string", "enum": list(INTENTS)},
+        "entities": {"type": "object"},
+        "response": {"type": "string"},
+    },
+    "required": ["intent", "entities", "response"],
+}
+
+
+class CallMetrics:
+    """모델 호출별 지연시간 / 토큰 사용량 기록 (두 모드 비교용)"""
+
+    def __init__(self, maxlen: int = 500):
+        self.calls = deque(maxlen=maxlen)
+
+    def record(self, name: str, mode: str, latency: float, response=None, ok: bool = True):
+        usage = getattr(response, "usage_metadata", None)
+        self.calls.append({
+            "name": name,
+            "mode": mode,
+            "latency": latency,
+            "ok": ok,
+            "prompt_tokens": getattr(usage, "prompt_token_count", 0) or 0,
+            "output_tokens": getattr(usage, "candidates_token_count", 0) or 0,
+            "total_tokens": getattr(usage, "total_token_count", 0) or 0,
+        })
+
+    def summary(self) -> Dict[str, Dict]:
+        """{mode/name: {count, avg_latency, total_tokens}}"""
+        out: Dict[str, Dict] = {}
+        for c in self.calls:
+            key = f"{c['mode']}/{c['name']}"
+            s = out.setdefault(key, {"count": 0, "latency": 0.0, "total_tokens": 0, "errors": 0})
+            s["count"] += 1
+            s["latency"] += c["latency"]
+            s["total_tokens"] += c["total_tokens"]
+            s["errors"] += 0 if c["ok"] else 1
+        for s in out.values():
+            s["avg_latency"] = s.pop("latency") / s["count"]
+        return out
+
+
 class GeminiAI:
-    def __init__(self, api_key: str):
-        genai.configure(api_key=api_key)
-        # 최신 모델 사용
-        self.model = genai.GenerativeModel('models/gemini-2.5-flash')
-        self.chat_sessions = {}  # 사용자별 대화 세션
-    
+    def __init__(self, api_key: str, single_pass: bool = True,
+                 call_timeout: float = 8.0, model=None,
+                 cache: Optional[ResponseCache] = None):
+        if model is None:
+            genai.configure(api_key=api_key)
+            # 최신 모델 사용
+            model = genai.GenerativeModel('models/gemini-2.5-flash')
+        # model 을 직접 넣으면 (예: ai.stub_backend.StubGenerativeModel) 네트워크 없이 동작
+        self.model = model
+        # 사용자별 대화 세션 (턴 수 / 토큰 예산 / 유휴 시간 / 세션 수 제한)
+        self.sessions = ChatSessionStore(model)
+
+        # 비동기 모드에서 모델 호출 하나당 최대 대기 시간 (초)
+        self.call_timeout = call_timeout
+
+        # True 면 의도/엔티티/응답을 한 번의 JSON 생성으로 받음 (실패 시 기존 3단계로 폴백)
+        self.single_pass = single_pass
+        self.metrics = CallMetrics()
+
+        # 반복 명령 응답 캐시 (None 이면 캐시 안 씀). 적중하면 모델 호출 0번
+        self.cache = cache
+
+        # commit=False 로 받은 응답: user_id -> (chat, 호출 전 history). commit / discard 로 정리
+        self._uncommitted: Dict[str, tuple] = {}
+
+    def _timed(self, name: str, mode: str, fn, *args, **kwargs):
+        """모델 호출 하나를 실행하면서 지연시간 / 토큰 사용량 기록"""
+        start = time.perf_counter()
+        try:
+            response = fn(*args, **kwargs)
+        except Exception:
+            self.metrics.record(name, mode, time.perf_counter() - start, ok=False)
+            raise
+        self.metrics.record(name, mode, time.perf_counter() - start, response)
+        return response
+
+    def _get_chat(self, user_id: str):
+        return self.sessions.get(user_id)
+
+    def stats(self) -> Dict[str, Dict]:
+        """호출 / 세션 / 캐시 지표 한 번에"""
+        return {
+            "calls": self.metrics.summary(),
+            "sessions": self.sessions.stats(),
+            "cache": self.cache.stats() if self.cache is not None else {},
+        }
+
     def process_command(self, user_id: str, command: str) -> Dict:
         """사용자 명령을 처리하고 응답 생성"""
-        
+        cached = self._cache_get(user_id, command)
+        if cached is not None:
+            return cached
+
+        result = None
+        if self.single_pass:
+            result = self._process_single_pass(user_id, command)
+            if result is None:
+                print("[GEMINI] single-pass parse failed, falling back to 3-call path")
+
+        if result is None:
+            result = self._process_multi_pass(user_id, command)
+
+        self._cache_put(user_id, command, result)
+        return result
+
+    def _cache_get(self, user_id: str, command: str) -> Optional[Dict]:
+        if self.cache is None:
+            return None
+        result = self.cache.get(user_id, command)
+        if result is not None:
+            print(f"[GEMINI] cache hit ({self.cache.stats()['hit_rate']:.0%} hit rate)")
+        return result
+
+    def _cache_put(self, user_id: str, command: str, result: Dict) -> None:
+        if self.cache is not None:
+            self.cache.put(user_id, command, result)
+
+    def _process_multi_pass(self, user_id: str, command: str) -> Dict:
+        """기존 방식: 의도 분류 -> 엔티티 추출 -> 응답 생성 (모델 호출 3번)"""
+
         # 1. 의도 분류
         intent = self._classify_intent(command)
-        
+
         # 2. 엔티티 추출
         entities = self._extract_entities(command)
-        
+
         # 3. 대화 세션 관리
-        if user_id not in self.chat_sessions:
-            self.chat_sessions[user_id] = self.model.start_chat(history=[])
-        
+        self._get_chat(user_id)
+
         # 4. AI 응답 생성
         response = self._generate_response(user_id, command, intent, entities)
-        
+
         # 5. 액션 생성
         action = self._generate_action(intent, entities)
-        
+
         return {
             "intent": intent,
             "entities": entities,
             "response": response,
             "action": action
         }
-    
-    def _classify_intent(self, command: str) -> str:
-        """명령의 의도 분류"""
-        prompt = f"""
+
+    # -----------------------------------------------------
+    #  단일 호출 모드
+    # -----------------------------------------------------
+
+    def _single_pass_prompt(self, command: str) -> str:
+        return f"""
+        User command: {command}
+
+        Analyze the command and answer in ONE JSON object with exactly these keys:
+        - "intent": one of {", ".join(INTENTS)}
+            (smart_home: 조명, 에어컨 등 기기 제어 / weather: 날씨 정보 / schedule: 일정, 알람
+             / music: 음악 재생 / general: 일반 대화)
+        - "entities": key information as a JSON object, e.g.
+            "거실 불 켜줘" -> {{"device": "거실 조명", "action": "on"}}
+            "에어컨 23도로" -> {{"device": "에어컨", "temperature": 23}}
+            "내일 날씨" -> {{"time": "내일", "query": "날씨"}}
+        - "response": a helpful and natural reply in the same language as the command
+            - weather: provide realistic example weather information (temperature, conditions)
+            - device control: confirm the action (e.g., "Turning on the TV")
+            - music: confirm what you're playing
+            - be conversational and helpful
+
+        Return JSON only.
+        """
+
+    @staticmethod
+    def _parse_single_pass(text: str) -> Optional[Dict]:
+        """모델 출력 JSON 을 SINGLE_PASS_SCHEMA 기준으로 검증. 안 맞으면 None."""
+        try:
+            data = json.loads(text)
+        except (TypeError, ValueError):
+            return None
+
+        if not isinstance(data, dict):
+            return None
+
+        intent = data.get("intent")
+        entities = data.get("entities")
+        response = data.get("response")
+
+        if not isinstance(intent, str) or intent.strip().lower() not in INTENTS:
+            return None
+        if not isinstance(entities, dict):
+            return None
+        if not isinstance(response, str) or not response.strip():
+            return None
+
+        return {
+            "intent": intent.strip().lower(),
+            "entities": entities,
+            "response": response.strip(),
+        }
+
+    def _process_single_pass(self, user_id: str, command: str) -> Optional[Dict]:
+        """의도 + 엔티티 + 응답을 모델 호출 한 번으로 받음. 실패하면 None."""
+        chat = self._get_chat(user_id)
+
+        try:
+            response = self._timed(
+                "single_pass", "single",
+                chat.send_message,
+                self._single_pass_prompt(command),
+                generation_config={"response_mime_type": "application/json"},
+            )
+        except Exception as e:
+            print(f"[GEMINI] single-pass call failed: {e}")
+            return None
+
+        parsed = self._parse_single_pass(response.text)
+        if parsed is None:
+            # 잘못된 응답은 대화 기록에서 빼고 폴백
+            try:
+                chat.rewind()
+            except Exception:
+                pass
+            return None
+
+        parsed["action"] = self._generate_action(parsed["intent"], parsed["entities"])
+        return parsed
+
+    # -----------------------------------------------------
+    #  3단계 모드
+    # -----------------------------------------------------
+
+    def _intent_prompt(self, command: str) -> str:
+        return f"""
         다음 명령을 분류하세요:
         명령: {command}
-        
+
         카테고리 중 하나만 반환:
         - smart_home (조명, 에어컨 등 기기 제어)
         - weather (날씨 정보)
         - schedule (일정, 알람)
         - music (음악 재생)
         - general (일반 대화)
-        
+
         카테고리명만 반환하세요.
         """
-        
-        response = self.model.generate_content(prompt)
-        return response.text.strip().lower()
-    
-    def _extract_entities(self, command: str) -> Dict:
-        """명령에서 핵심 정보 추출"""
-        prompt = f"""
+
+    def _entities_prompt(self, command: str) -> str:
+        return f"""
         명령에서 핵심 정보를 추출하여 JSON으로 반환:
         명령: {command}
-        
+
         예시:
         - "거실 불 켜줘" -> {{"device": "거실 조명", "action": "on"}}
         - "에어컨 23도로" -> {{"device": "에어컨", "temperature": 23}}
         - "내일 날씨" -> {{"time": "내일", "query": "날씨"}}
-        
+
         JSON만 반환하세요.
         """
-        
-        try:
-            response = self.model.generate_content(prompt)
-            return json.loads(response.text)
-        except:
-            return {}
-    
-    def _generate_response(self, user_id: str, command: str, 
-                          intent: str, entities: Dict) -> str:
-        """자연스러운 응답 생성"""
-        chat = self.chat_sessions[user_id]
-        
+
+    def _response_prompt(self, command: str, intent: str, entities: Dict) -> str:
         # 사용자 명령 언어 감지
         is_english = any(word in command.lower() for word in ['the', 'is', 'what', 'how', 'when', 'where', 'can', 'do', 'will'])
         language = "English" if is_english else "Korean"
-        
-        prompt = f"""
+
+        return f"""
         User command: {command}
         Intent: {intent}
         Extracted information: {entities}
-        
+
         Generate a helpful and natural response in {language}.
-        
+
         Guidelines:
         - If it's weather query: Provide realistic example weather information (temperature, conditions)
         - If it's device control: Confirm the action (e.g., "Turning on the TV")
         - If it's music request: Confirm what you're playing
         - Be conversational and helpful
         - Use the same language as the user's command
-        
+
         Response:
         """
-        
-        response = chat.send_message(prompt)
+
+    def _classify_intent(self, command: str) -> str:
+        """명령의 의도 분류"""
+        response = self._timed("classify_intent", "multi", self.model.generate_content,
+                               self._intent_prompt(command))
+        return response.text.strip().lower()
+
+    def _extract_entities(self, command: str) -> Dict:
+        """명령에서 핵심 정보 추출"""
+        try:
+            response = self._timed("extract_entities", "multi", self.model.generate_content,
+                                   self._entities_prompt(command))
+            return json.loads(response.text)
+        except:
+            return {}
+
+    def _generate_response(self, user_id: str, command: str,
+                          intent: str, entities: Dict) -> str:
+        """자연스러운 응답 생성"""
+        chat = self._get_chat(user_id)
+        response = self._timed("generate_response", "multi", chat.send_message,
+                               self._response_prompt(command, intent, entities))
         return response.text
-    
+
+    # -----------------------------------------------------
+    #  비동기 모드 (독립적인 호출은 동시에, 호출마다 타임아웃)
+    # -----------------------------------------------------
+
+    async def _timed_async(self, name: str, mode: str, coro_fn, *args, **kwargs):
+        """비동기 모델 호출 + call_timeout 초과 시 취소 + 지연시간 기록"""
+        start = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(coro_fn(*args, **kwargs), self.call_timeout)
+        except BaseException:
+            # TimeoutError / CancelledError 포함. wait_for 가 내부 태스크는 취소해줌
+            self.metrics.record(name, mode, time.perf_counter() - start, ok=False)
+            raise
+        self.metrics.record(name, mode, time.perf_counter() - start, response)
+        return response
+
+    async def process_command_async(self, user_id: str, command: str, commit: bool = True) -> Dict:
+        """
+        process_command 의 asyncio 버전.
+
+        commit=False 면 응답을 캐시에 넣지 않고 대화 history 도 확정하지 않는다 (미리 시작한 추측 호출용).
+        호출한 쪽이 쓸지 결정한 뒤 commit() 또는 discard() 를 불러야 함
+        """
+        cached = self._cache_get(user_id, command)
+        if cached is not None:
+            return cached
+
+        chat = self._get_chat(user_id)
+        history = list(chat.history)
+        try:
+            result = None
+            if self.single_pass:
+                result = await self._process_single_pass_async(user_id, command)
+                if result is None:
+                    print("[GEMINI] async single-pass failed, falling back to concurrent path")
+
+            if result is None:
+                result = await self._process_multi_pass_async(user_id, command)
+        except BaseException:
+            # 취소 / 실패한 추측 호출은 history 에 흔적을 남기지 않음
+            if not commit:
+                chat.history = history
+            raise
+
+        if commit:
+            self._cache_put(user_id, command, result)
+        else:
+            self._uncommitted[user_id] = (chat, history)
+        return result
+
+    def commit(self, user_id: str, command: str, result: Dict) -> None:
+        """commit=False 로 받은 응답을 확정 (캐시 저장, history 유지)"""
+        if self._uncommitted.pop(user_id, None) is not None:
+            self._cache_put(user_id, command, result)
+
+    def discard(self, user_id: str) -> None:
+        """commit=False 로 받은 응답을 버림 (history 를 호출 전으로 되돌림)"""
+        entry = self._uncommitted.pop(user_id, None)
+        if entry is not None:
+            chat, history = entry
+            chat.history = history
+
+    async def _process_single_pass_async(self, user_id: str, command: str) -> Optional[Dict]:
+        chat = self._get_chat(user_id)
+        try:
+            response = await self._timed_async(
+                "single_pass", "single_async",
+                chat.send_message_async,
+                self._single_pass_prompt(command),
+                generation_config={"response_mime_type": "application/json"},
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[GEMINI] async single-pass call failed: {e!r}")
+            return None
+
+        parsed = self._parse_single_pass(response.text)
+        if parsed is None:
+            try:
+                chat.rewind()
+            except Exception:
+                pass
+            return None
+
+        parsed["action"] = self._generate_action(parsed["intent"], parsed["entities"])
+        return parsed
+
+    async def _classify_intent_async(self, command: str) -> str:
+        try:
+            response = await self._timed_async(
+                "classify_intent", "multi_async",
+                self.model.generate_content_async, self._intent_prompt(command),
+            )
+            return response.text.strip().lower()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # 느리거나 실패하면 general 로 두고 나머지는 계속 진행
+            print(f"[GEMINI] classify_intent failed: {e!r}")
+            return "general"
+
+    async def _extract_entities_async(self, command: str) -> Dict:
+        try:
+            response = await self._timed_async(
+                "extract_entities", "multi_async",
+                self.model.generate_content_async, self._entities_prompt(command),
+            )
+            return json.loads(response.text)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[GEMINI] extract_entities failed: {e!r}")
+            return {}
+
+    async def _process_multi_pass_async(self, user_id: str, command: str) -> Dict:
+        # 1+2. 의도 분류 / 엔티티 추출은 서로 의존하지 않으니 동시에
+        intent, entities = await asyncio.gather(
+            self._classify_intent_async(command),
+            self._extract_entities_async(command),
+        )
+
+        # 3. 대화 세션 관리
+        chat = self._get_chat(user_id)
+
+        # 4. AI 응답 생성
+        response = await self._timed_async(
+            "generate_response", "multi_async",
+            chat.send_message_async, self._response_prompt(command, intent, entities),
+        )
+
+        # 5. 액션 생성
+        action = self._generate_action(intent, entities)
+
+        return {
+            "intent": intent,
+            "entities": entities,
+            "response": response.text,
+            "action": action
+        }
+
     def _generate_action(self, intent: str, entities: Dict) -> Optional[Dict]:
         """실제 수행할 액션 정의"""
         if intent == "smart_home":
@@ -121,4 +475,4 @@ class GeminiAI:
                 "type": "music_play",
                 "query": entities.get("query", "")
             }
-        return None
\ No newline at end of file
+        return None
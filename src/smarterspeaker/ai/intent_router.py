@@ -0,0 +1,327 @@
+# src/smarterspeaker/ai/intent_router.py
+"""
+로컬 의도 라우터.
+
+STT 결과를 라벨링된 예시 문장들과 비교해서, 확실한 명령(스마트홈 / 영화 검색 /
+간단한 질문)은 기기 안에서 바로 처리하고 애매한 것만 GeminiAI 로 넘긴다.
+
+- 특징: 문자 n-gram(2~4) 해싱 벡터 (한국어/영어 둘 다, 띄어쓰기 오류에 강함)
+- 인덱스: 의도별 예시 벡터의 평균(centroid)을 미리 계산해서 행렬 하나로 보관
+- 점수: 입력 벡터와 centroid 행렬의 곱 한 번 (cosine similarity)
+"""
+import re
+import zlib
+from datetime import datetime
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+N_FEATURES = 1 << 14
+NGRAM_RANGE = (2, 4)
+
+# 의도별 예시 문장 (필요하면 계속 추가)
+EXAMPLES: Dict[str, List[str]] = {
+    "smart_home": [
+        "turn on the living room lights",
+        "turn off the lights",
+        "switch off the bedroom light",
+        "turn on the tv",
+        "turn off the tv",
+        "turn on the air conditioner",
+        "turn off the ac",
+        "lock the front door",
+        "unlock the door",
+        "open the door",
+        "거실 불 켜줘",
+        "거실 불 꺼줘",
+        "침실 불 켜",
+        "안방 전등 꺼줘",
+        "티비 켜줘",
+        "티비 꺼줘",
+        "에어컨 켜줘",
+        "에어컨 꺼",
+        "현관문 잠가줘",
+        "문 열어줘",
+    ],
+    "movie_search": [
+        "play the movie inception",
+        "play movie interstellar",
+        "search for the dark knight",
+        "find the movie avatar",
+        "movie titanic",
+        "i want to watch frozen",
+        "show me movies",
+        "play inception",
+        "영화 찾아줘",
+        "영화 틀어줘",
+        "인셉션 틀어줘",
+        "영화 보여줘",
+    ],
+    "time": [
+        "what time is it",
+        "what's the time",
+        "tell me the time",
+        "current time",
+        "지금 몇 시야",
+        "몇 시야",
+        "지금 시간 알려줘",
+    ],
+    "date": [
+        "what's the date today",
+        "what day is it",
+        "what is today's date",
+        "today's date",
+        "오늘 며칠이야",
+        "오늘 무슨 요일이야",
+        "오늘 날짜 알려줘",
+    ],
+    "general": [
+        "what's the weather",
+        "how is the weather tomorrow",
+        "play some music",
+        "tell me a joke",
+        "set an alarm for seven",
+        "how are you",
+        "who are you",
+        "what can you do",
+        "오늘 날씨 어때",
+        "음악 틀어줘",
+        "농담 해줘",
+        "알람 맞춰줘",
+        "넌 누구야",
+    ],
+}
+
+# 이 의도들만 로컬에서 처리 (general 은 항상 Gemini)
+LOCAL_INTENTS = ("smart_home", "movie_search", "time", "date")
+
+ENGLISH_HINTS = ['the', 'is', 'what', 'how', 'when', 'where', 'can', 'do', 'will', 'turn', 'on', 'off']
+
+
+def normalize(text: str) -> str:
+    text = text.lower()
+    text = re.sub(r"[^\w\s']", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def is_english(text: str) -> bool:
+    return any(word in text.lower().split() for word in ENGLISH_HINTS)
+
+
+def vectorize(text: str) -> np.ndarray:
+    """문자 n-gram 해싱 벡터 (L2 정규화)."""
+    vec = np.zeros(N_FEATURES, dtype=np.float32)
+    padded = f" {normalize(text)} "
+    lo, hi = NGRAM_RANGE
+    for n in range(lo, hi + 1):
+        for i in range(len(padded) - n + 1):
+            gram = padded[i:i + n]
+            vec[zlib.crc32(gram.encode("utf-8")) % N_FEATURES] += 1.0
+    norm = np.linalg.norm(vec)
+    if norm > 0:
+        vec /= norm
+    return vec
+
+
+# =========================================================
+#  슬롯 추출 / 로컬 처리 검증
+# =========================================================
+
+# 영어는 단어 단위로 비교 ("front" 안의 "on", "locked" 안의 "lock" 이 걸리지 않게)
+ZONE_WORDS = {"living": "Living", "bedroom": "Bedroom", "door": "Entrance"}
+DEVICE_WORDS = {
+    "light": "light", "lights": "light", "lamp": "light",
+    "ac": "ac", "aircon": "ac", "conditioner": "ac",
+    "tv": "tv", "television": "tv",
+    "door": "door",
+}
+ACTION_WORDS = {"on": "on", "off": "off", "lock": "lock", "unlock": "unlock", "open": "unlock"}
+
+# 한국어는 어절 앞부분 (조사/어미가 붙음: 불을, 켜줘) / 합성어 뒷부분 (현관문)
+KO_ZONES = (("거실", "Living"), ("침실", "Bedroom"), ("안방", "Bedroom"), ("현관", "Entrance"))
+KO_DEVICES = (("에어컨", "ac"), ("티비", "tv"), ("전등", "light"), ("불", "light"))
+KO_PARTICLES = ("", "을", "은", "이", "도", "좀")   # "문" 은 한 글자라 조사만 허용 (문자, 문제 X)
+KO_ACTIONS = (("켜", "on"), ("꺼", "off"), ("잠가", "lock"), ("잠궈", "lock"), ("열어", "unlock"))
+
+# 기기 타입별로 말이 되는 액션 ("문 켜줘" 같은 건 로컬에서 처리 안 함)
+DEVICE_ACTIONS = {"light": ("on", "off"), "tv": ("on", "off"), "ac": ("on", "off"), "door": ("lock", "unlock")}
+
+
+def _ko_find(tokens: List[str], table, suffix: bool = False) -> Optional[str]:
+    for stem, value in table:
+        if any(t.startswith(stem) or (suffix and t.endswith(stem)) for t in tokens):
+            return value
+    return None
+
+
+def extract_device_slots(text: str) -> Optional[Tuple[str, str, str]]:
+    """
+    STT로 나온 전체 문장에서 (zone, device_type, action) 을 간단한 규칙으로 추출.
+    하나라도 못 정하거나 기기 타입에 안 맞는 액션이면 None.
+    """
+    tokens = normalize(text).split()
+    words = set(tokens)
+
+    # ===== 1) 존 =====
+    zone = next((ZONE_WORDS[w] for w in ("living", "bedroom", "door") if w in words), None)
+    zone = zone or _ko_find(tokens, KO_ZONES, suffix=True)
+
+    # ===== 2) 기기 타입 =====
+    device_type = next((DEVICE_WORDS[w] for w in tokens if w in DEVICE_WORDS), None)
+    device_type = device_type or _ko_find(tokens, KO_DEVICES, suffix=True)
+    if device_type is None and any(t.endswith("문") or (t[:1] == "문" and t[1:] in KO_PARTICLES) for t in tokens):
+        device_type = "door"
+
+    # ===== 3) 액션 =====
+    action = next((ACTION_WORDS[w] for w in tokens if w in ACTION_WORDS), None)
+    action = action or _ko_find(tokens, KO_ACTIONS)
+
+    # ===== 4) 최소 조건 체크 =====
+    if not (device_type and action) or action not in DEVICE_ACTIONS[device_type]:
+        return None
+    if device_type == "door" and zone is None:
+        zone = "Entrance"    # DB에서 현관 문이 속한 존 이름에 맞춰서
+    if zone is None and device_type == "ac":
+        zone = "Living"      # 기본 에어컨 존
+    if zone is None:
+        return None
+
+    return zone, device_type, action
+
+
+# time / date 는 n-gram 점수만으로는 "what time does the store open" 도 time 이 됨
+# -> 지금 시간 / 날짜를 묻는 게 분명한 문장만 로컬에서 답함 (normalize 된 문장 전체와 비교)
+_EN_PREFIX = r"(?:(?:hey|ok|okay|so|um|can you|could you|please) )*"
+_EN_SUFFIX = r"(?: (?:now|right now|please|today))*"
+TIME_PATTERNS = [
+    re.compile(_EN_PREFIX + r"(?:what time is it|what's the time|what is the time|tell me the time"
+               r"|current time|the time)" + _EN_SUFFIX),
+    re.compile(r"(?:지금 )?몇 ?시(?:야|예요|에요|지|니|인가요|야\?)?"),
+    re.compile(r"(?:지금 )?시간 (?:좀 )?알려(?:줘|주세요)"),
+]
+DATE_PATTERNS = [
+    re.compile(_EN_PREFIX + r"(?:what's the date|what is the date|what day is it|what is today's date"
+               r"|what's today's date|today's date|what's today|what is today|tell me the date)" + _EN_SUFFIX),
+    re.compile(r"오늘 (?:몇 ?월 )?며칠(?:이야|이에요|인가요|이지)?"),
+    re.compile(r"오늘 (?:무슨 |뭔 )?요일(?:이야|이에요|인가요|이지)?"),
+    re.compile(r"오늘 날짜 (?:좀 )?알려(?:줘|주세요)"),
+]
+
+# 영화 검색은 요청 동사 + (영화라는 말 또는 제목) 이 있어야 로컬 (음악/노래 재생은 general)
+MOVIE_VERBS = {"play", "watch", "search", "find", "show", "put"}
+KO_MOVIE_VERBS = (("틀어", True), ("보여", True), ("찾아", True), ("재생", True), ("검색", True))
+NOT_MOVIE_WORDS = {"music", "song", "songs", "playlist", "radio", "album", "podcast", "음악", "노래"}
+
+
+def is_explicit_question(intent: str, text: str) -> bool:
+    """time / date: 지금 시각 / 오늘 날짜를 묻는 문장인지"""
+    patterns = TIME_PATTERNS if intent == "time" else DATE_PATTERNS
+    t = normalize(text)
+    return any(p.fullmatch(t) for p in patterns)
+
+
+def is_movie_request(text: str) -> bool:
+    tokens = normalize(text).split()
+    if not tokens or any(t.startswith(w) for t in tokens for w in NOT_MOVIE_WORDS):
+        return False
+    return bool(MOVIE_VERBS.intersection(tokens)) or bool(_ko_find(tokens, KO_MOVIE_VERBS))
+
+
+# =========================================================
+#  라우터
+# =========================================================
+
+@dataclass
+class RouteResult:
+    intent: str
+    confidence: float
+    margin: float
+    slots: Dict = field(default_factory=dict)
+    local: bool = False   # True 면 로컬에서 처리, False 면 Gemini 로
+
+
+class IntentRouter:
+    def __init__(
+        self,
+        examples: Dict[str, List[str]] = None,
+        min_confidence: float = 0.2,
+        min_margin: float = 0.12,
+    ):
+        self.min_confidence = min_confidence
+        self.min_margin = min_margin
+        self.examples = {k: list(v) for k, v in (examples or EXAMPLES).items()}
+        self._build_index()
+
+    def _build_index(self) -> None:
+        """의도별 centroid 행렬 (I, N_FEATURES) 를 미리 계산."""
+        self.intents = list(self.examples.keys())
+        centroids = []
+        for intent in self.intents:
+            vecs = np.stack([vectorize(e) for e in self.examples[intent]])
+            c = vecs.mean(axis=0)
+            centroids.append(c / (np.linalg.norm(c) or 1.0))
+        self.centroids = np.stack(centroids)
+
+    def add_examples(self, intent: str, phrases: List[str]) -> None:
+        self.examples.setdefault(intent, []).extend(phrases)
+        self._build_index()
+
+    def scores(self, text: str) -> Dict[str, float]:
+        sims = self.centroids @ vectorize(text)
+        return dict(zip(self.intents, sims.tolist()))
+
+    def route(self, text: str) -> RouteResult:
+        if not normalize(text):
+            return RouteResult("general", 0.0, 0.0)
+
+        sims = self.centroids @ vectorize(text)
+        order = np.argsort(sims)[::-1]
+        best, second = order[0], order[1] if len(order) > 1 else order[0]
+        intent = self.intents[best]
+        confidence = float(sims[best])
+        margin = float(sims[best] - sims[second]) if best != second else confidence
+
+        result = RouteResult(intent, confidence, margin)
+        if intent not in LOCAL_INTENTS:
+            return result
+        if confidence < self.min_confidence or margin < self.min_margin:
+            return result
+
+        # 점수가 높아도 실제로 처리할 정보(슬롯)가 있어야 로컬 처리 (아니면 Gemini)
+        if intent == "smart_home":
+            slots = extract_device_slots(text)
+            if slots is None:
+                return result
+            zone, device_type, action = slots
+            result.slots = {"zone": zone, "device_type": device_type, "action": action}
+        elif intent in ("time", "date"):
+            if not is_explicit_question(intent, text):
+                return result
+        elif intent == "movie_search":
+            if not is_movie_request(text):
+                return result
+
+        result.local = True
+        return result
+
+
+def local_reply(intent: str, text: str, now: datetime = None) -> Optional[str]:
+    """time / date 같은 간단한 질문은 모델 없이 바로 답한다."""
+    now = now or datetime.now()
+    english = is_english(text)
+
+    if intent == "time":
+        if english:
+            return f"It's {now.strftime('%I:%M %p').lstrip('0')}."
+        ampm = "오전" if now.hour < 12 else "오후"
+        hour = now.hour % 12 or 12
+        return f"지금은 {ampm} {hour}시 {now.minute}분입니다."
+
+    if intent == "date":
+        if english:
+            return f"Today is {now.strftime('%A, %B')} {now.day}."
+        weekday = "월화수목금토일"[now.weekday()]
+        return f"오늘은 {now.month}월 {now.day}일 {weekday}요일입니다."
+
+    return None
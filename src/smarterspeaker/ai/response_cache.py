@@ -0,0 +1,178 @@
+# src/smarterspeaker/ai/response_cache.py
+"""
+GeminiAI 응답 캐시.
+
+"오늘 날씨 어때", "음악 틀어줘" 처럼 집에서 반복되는 명령은 모델을 다시 부르지 않고
+이전 결과를 돌려준다.
+
+- 키: (user_id, 정규화된 명령, 로컬 라우터 의도)  -> 다른 사용자 결과는 절대 안 씀
+- TTL 이 지나면 만료, max_entries 를 넘으면 가장 오래 안 쓴 것부터 삭제 (LRU)
+- (선택) 정확히 같은 문장이 없으면 같은 사용자 + 같은 의도 안에서
+  n-gram 벡터 cosine 이 similarity_threshold 이상인 문장을 재사용.
+  단 숫자 / 날짜·시간 단어(slot_tokens)가 하나라도 다르면 재사용 안 함
+  ("weather today" vs "weather tomorrow", "timer for 5 / 15 minutes" 는 n-gram 으로는 거의 같음)
+"""
+import copy
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from smarterspeaker.config import GEMINI_CACHE_TTL, GEMINI_CACHE_SIZE, GEMINI_CACHE_SIMILARITY
+from .intent_router import IntentRouter, normalize, vectorize
+
+# 시간이 지나면 답이 바뀌는 질문은 캐시 안 함
+UNCACHEABLE_INTENTS = ("time", "date")
+
+# "turn on the tv" / "turn off the tv" 처럼 한 글자 차이로 뜻이 바뀌는 의도는 정확히 같은 문장만 재사용
+EXACT_ONLY_INTENTS = ("smart_home",)
+
+CacheKey = Tuple[str, str, str]
+
+# 답을 바꾸는 숫자 / 날짜·시간 단어 (near-duplicate 재사용은 이 토큰들이 전부 같을 때만)
+NUMBER_WORDS = {
+    "zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten",
+    "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen", "seventeen", "eighteen",
+    "nineteen", "twenty", "thirty", "forty", "fifty", "sixty", "hundred", "thousand",
+    "half", "quarter", "first", "second", "third", "last", "next", "previous",
+}
+DATE_WORDS = {
+    "now", "today", "tonight", "tomorrow", "yesterday", "morning", "noon", "afternoon",
+    "evening", "night", "midnight", "am", "pm", "week", "weekend", "weekday", "month", "year",
+    "monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday",
+    "january", "february", "march", "april", "may", "june", "july", "august",
+    "september", "october", "november", "december",
+}
+# 한국어는 조사가 붙으니까 ("내일은", "오늘의") 앞부분으로 비교
+KOREAN_DATE_PREFIXES = (
+    "지금", "오늘", "내일", "모레", "글피", "어제", "그제", "이번", "다음", "지난", "주말",
+    "아침", "점심", "저녁", "밤", "새벽", "오전", "오후", "월요일", "화요일", "수요일",
+    "목요일", "금요일", "토요일", "일요일",
+)
+_HAS_DIGIT = re.compile(r"\d")
+
+
+def slot_tokens(text: str) -> Tuple[str, ...]:
+    """정규화된 문장에서 숫자 / 날짜·시간 토큰만 순서대로"""
+    tokens = []
+    for token in normalize(text).split():
+        if (_HAS_DIGIT.search(token) or token in NUMBER_WORDS or token in DATE_WORDS
+                or token.startswith(KOREAN_DATE_PREFIXES)):
+            tokens.append(token)
+    return tuple(tokens)
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        ttl: float = GEMINI_CACHE_TTL,
+        max_entries: int = GEMINI_CACHE_SIZE,
+        similarity_threshold: Optional[float] = GEMINI_CACHE_SIMILARITY,
+        router: IntentRouter = None,
+        clock=time.monotonic,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.router = router or IntentRouter()
+        self.clock = clock
+
+        # key -> (저장 시각, 결과, 문장 벡터, 숫자/날짜 토큰)
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Dict, Optional[np.ndarray], Tuple[str, ...]]]" = OrderedDict()
+
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def key_for(self, user_id: str, command: str) -> CacheKey:
+        text = normalize(command)
+        return str(user_id), text, self.router.route(text).intent
+
+    def get(self, user_id: str, command: str) -> Optional[Dict]:
+        key = self.key_for(user_id, command)
+        if key[2] in UNCACHEABLE_INTENTS or not key[1]:
+            self.misses += 1
+            return None
+
+        now = self.clock()
+        entry = self._entries.get(key)
+        if entry is not None and not self._expired(key, entry, now):
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+        if self.similarity_threshold and key[2] not in EXACT_ONLY_INTENTS:
+            near = self._nearest(key, now)
+            if near is not None:
+                self._entries.move_to_end(near)
+                self.near_hits += 1
+                return copy.deepcopy(self._entries[near][1])
+
+        self.misses += 1
+        return None
+
+    def put(self, user_id: str, command: str, result: Dict) -> None:
+        key = self.key_for(user_id, command)
+        if key[2] in UNCACHEABLE_INTENTS or not key[1]:
+            return
+
+        vector = vectorize(key[1]) if self.similarity_threshold else None
+        self._entries[key] = (self.clock(), copy.deepcopy(result), vector, slot_tokens(key[1]))
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        """user_id 를 주면 그 사용자 것만, 아니면 전부 삭제"""
+        if user_id is None:
+            self._entries.clear()
+            return
+        for key in [k for k in self._entries if k[0] == str(user_id)]:
+            del self._entries[key]
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.near_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": (self.hits + self.near_hits) / lookups if lookups else 0.0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # -----------------------------------------------------
+
+    def _expired(self, key: CacheKey, entry, now: float) -> bool:
+        if now - entry[0] <= self.ttl:
+            return False
+        del self._entries[key]
+        self.expirations += 1
+        return True
+
+    def _nearest(self, key: CacheKey, now: float) -> Optional[CacheKey]:
+        """같은 사용자 + 같은 의도 + 같은 숫자/날짜 토큰 항목 중 가장 비슷한 문장 (threshold 미만이면 None)"""
+        user_id, text, intent = key
+        probe = vectorize(text)
+        slots = slot_tokens(text)
+        best_key, best_sim = None, self.similarity_threshold
+
+        for k, entry in list(self._entries.items()):
+            if k[0] != user_id or k[2] != intent or entry[2] is None or entry[3] != slots:
+                continue
+            if self._expired(k, entry, now):
+                continue
+            sim = float(entry[2] @ probe)
+            if sim >= best_sim:
+                best_key, best_sim = k, sim
+        return best_key
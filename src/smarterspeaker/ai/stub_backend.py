@@ -0,0 +1,118 @@
+"""
+네트워크 없이 GeminiAI 를 돌리기 위한 로컬 스텁 모델.
+
+    model = StubGenerativeModel(latency=0.3)
+    gemini = GeminiAI(api_key=None, model=model)
+
+호출마다 latency 초만큼 기다린 뒤 정해진 형식의 응답을 돌려준다.
+`python -m smarterspeaker.ai.stub_backend` 로 동기/비동기 모드 지연시간을 비교할 수 있다.
+"""
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+from typing import Dict, Optional
+
+
+class StubResponse:
+    def __init__(self, text: str, prompt: str):
+        self.text = text
+        # 대충 4글자 = 1토큰으로 계산
+        prompt_tokens = max(1, len(prompt) // 4)
+        output_tokens = max(1, len(text) // 4)
+        self.usage_metadata = SimpleNamespace(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=output_tokens,
+            total_token_count=prompt_tokens + output_tokens,
+        )
+
+
+def _stub_answer(prompt: str, json_mode: bool) -> str:
+    """프롬프트 종류를 보고 그럴듯한 응답을 만든다."""
+    if json_mode:
+        return json.dumps({
+            "intent": "general",
+            "entities": {},
+            "response": "This is a stub response.",
+        })
+    if "카테고리명만 반환하세요" in prompt:
+        return "general"
+    if "JSON만 반환하세요" in prompt:
+        return "{}"
+    return "This is a stub response."
+
+
+class StubChatSession:
+    def __init__(self, model: "StubGenerativeModel", history=None):
+        self.model = model
+        self.history = list(history or [])
+
+    def _reply(self, prompt: str, generation_config: Optional[Dict]) -> StubResponse:
+        json_mode = bool(generation_config and
+                         generation_config.get("response_mime_type") == "application/json")
+        response = StubResponse(_stub_answer(prompt, json_mode), prompt)
+        self.history.append({"role": "user", "parts": [prompt]})
+        self.history.append({"role": "model", "parts": [response.text]})
+        return response
+
+    def send_message(self, prompt: str, generation_config: Optional[Dict] = None, **kwargs):
+        time.sleep(self.model.latency_for("send_message"))
+        return self._reply(prompt, generation_config)
+
+    async def send_message_async(self, prompt: str, generation_config: Optional[Dict] = None, **kwargs):
+        await asyncio.sleep(self.model.latency_for("send_message"))
+        return self._reply(prompt, generation_config)
+
+    def rewind(self):
+        del self.history[-2:]
+
+
+class StubGenerativeModel:
+    """
+    google.generativeai.GenerativeModel 의 스텁.
+    latency: 모든 호출 기본 지연 (초), latencies: 메서드별 지연 덮어쓰기
+    """
+
+    def __init__(self, latency: float = 0.2, latencies: Optional[Dict[str, float]] = None):
+        self.latency = latency
+        self.latencies = latencies or {}
+
+    def latency_for(self, method: str) -> float:
+        return self.latencies.get(method, self.latency)
+
+    def start_chat(self, history=None):
+        return StubChatSession(self, history)
+
+    def generate_content(self, prompt: str, generation_config: Optional[Dict] = None, **kwargs):
+        time.sleep(self.latency_for("generate_content"))
+        json_mode = bool(generation_config and
+                         generation_config.get("response_mime_type") == "application/json")
+        return StubResponse(_stub_answer(prompt, json_mode), prompt)
+
+    async def generate_content_async(self, prompt: str, generation_config: Optional[Dict] = None, **kwargs):
+        await asyncio.sleep(self.latency_for("generate_content"))
+        json_mode = bool(generation_config and
+                         generation_config.get("response_mime_type") == "application/json")
+        return StubResponse(_stub_answer(prompt, json_mode), prompt)
+
+
+if __name__ == "__main__":
+    # 오프라인 지연시간 비교: 3단계 순차 / 3단계 비동기 / 단일 호출
+    from smarterspeaker.ai.gemini_ai import GeminiAI
+
+    command = "turn on the living room lights"
+    runs = [
+        ("multi (sync)", False, False),
+        ("multi (async)", False, True),
+        ("single (sync)", True, False),
+        ("single (async)", True, True),
+    ]
+
+    for label, single_pass, use_async in runs:
+        gemini = GeminiAI(api_key=None, single_pass=single_pass, model=StubGenerativeModel(latency=0.3))
+        start = time.perf_counter()
+        if use_async:
+            asyncio.run(gemini.process_command_async("bench", command))
+        else:
+            gemini.process_command("bench", command)
+        print(f"{label:<16} {time.perf_counter() - start:.3f}s  {gemini.metrics.summary()}")
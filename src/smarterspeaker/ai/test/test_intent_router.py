@@ -0,0 +1,88 @@
+# test_intent_router.py
+# 실행 (src/ 에서): python -m unittest discover -s smarterspeaker -t .
+import unittest
+
+from smarterspeaker.ai.intent_router import IntentRouter, extract_device_slots
+
+
+class test_device_slots(unittest.TestCase):
+
+    def test_english_commands(self):
+        self.assertEqual(extract_device_slots("lock the front door"), ("Entrance", "door", "lock"))
+        self.assertEqual(extract_device_slots("unlock the front door"), ("Entrance", "door", "unlock"))
+        self.assertEqual(extract_device_slots("turn on the living room lights"), ("Living", "light", "on"))
+        self.assertEqual(extract_device_slots("switch off the bedroom light"), ("Bedroom", "light", "off"))
+        self.assertEqual(extract_device_slots("turn on the ac"), ("Living", "ac", "on"))
+
+    def test_korean_commands(self):
+        self.assertEqual(extract_device_slots("거실 불 좀 켜줘"), ("Living", "light", "on"))
+        self.assertEqual(extract_device_slots("현관문 잠가줘"), ("Entrance", "door", "lock"))
+        self.assertEqual(extract_device_slots("에어컨 꺼"), ("Living", "ac", "off"))
+
+    def test_words_inside_other_words_are_not_slots(self):
+        # "front" 안의 "on", "locked" 안의 "lock", "conditions" / "문자" 는 슬롯이 아님
+        self.assertIsNone(extract_device_slots("is the front door locked"))
+        self.assertIsNone(extract_device_slots("what are the traffic conditions"))
+        self.assertIsNone(extract_device_slots("문자 열어줘"))
+        self.assertIsNone(extract_device_slots("turn the lights on in the kitchen"))   # 존 없음
+
+    def test_action_must_fit_device(self):
+        self.assertIsNone(extract_device_slots("turn on the front door"))
+        self.assertIsNone(extract_device_slots("lock the bedroom light"))
+
+
+class test_intent_router(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.router = IntentRouter()
+
+    def assertLocal(self, text, intent):
+        route = self.router.route(text)
+        self.assertEqual((route.intent, route.local), (intent, True), f"{text!r}: {route}")
+        return route
+
+    def assertNotLocal(self, text):
+        route = self.router.route(text)
+        self.assertFalse(route.local, f"{text!r}: {route}")
+
+    def test_smart_home(self):
+        route = self.assertLocal("lock the front door", "smart_home")
+        self.assertEqual(route.slots, {"zone": "Entrance", "device_type": "door", "action": "lock"})
+        self.assertLocal("거실 불 켜줘", "smart_home")
+        for text in ("is the door locked", "open the fridge", "turn on the kitchen light", "문자 보내줘"):
+            with self.subTest(text=text):
+                self.assertNotLocal(text)
+
+    def test_time(self):
+        for text in ("what time is it", "What time is it now?", "지금 몇 시야"):
+            with self.subTest(text=text):
+                self.assertLocal(text, "time")
+        for text in ("what time does the store open", "what time is the game", "몇 시에 문 열어"):
+            with self.subTest(text=text):
+                self.assertNotLocal(text)
+
+    def test_date(self):
+        for text in ("what is the date today", "what day is it today", "오늘 며칠이야", "오늘 무슨 요일이야"):
+            with self.subTest(text=text):
+                self.assertLocal(text, "date")
+        for text in ("what day is the concert", "what is on tv tonight", "오늘 날씨 어때"):
+            with self.subTest(text=text):
+                self.assertNotLocal(text)
+
+    def test_movie_search(self):
+        for text in ("play the movie titanic", "영화 틀어줘", "find me a movie"):
+            with self.subTest(text=text):
+                self.assertLocal(text, "movie_search")
+        for text in ("movie night ideas", "play some music", "음악 틀어줘", "who directed the movie titanic"):
+            with self.subTest(text=text):
+                self.assertNotLocal(text)
+
+    def test_general_is_never_local(self):
+        for text in ("how are you", "tell me a joke", ""):
+            with self.subTest(text=text):
+                self.assertNotLocal(text)
+
+
+if __name__ == "__main__":
+    unittest.main()
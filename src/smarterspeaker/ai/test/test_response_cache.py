@@ -0,0 +1,82 @@
+# test_response_cache.py
+# 실행 (src/ 에서): python -m unittest discover -s smarterspeaker -t .
+import unittest
+
+from smarterspeaker.ai.response_cache import ResponseCache, slot_tokens
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class test_response_cache(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        # 낮은 기준으로도 숫자/날짜가 다르면 재사용 안 하는지 보려고 0.6
+        self.cache = ResponseCache(ttl=60, max_entries=8, similarity_threshold=0.6, clock=self.clock)
+
+    def put(self, command, response=None):
+        self.cache.put("dad", command, {"response": response or command})
+
+    def test_exact_hit_returns_copy(self):
+        self.put("tell me a joke")
+        result = self.cache.get("dad", "Tell me a joke!")
+        self.assertEqual(result, {"response": "tell me a joke"})
+        result["response"] = "changed"
+        self.assertEqual(self.cache.get("dad", "tell me a joke")["response"], "tell me a joke")
+
+    def test_other_user_never_hits(self):
+        self.put("tell me a joke")
+        self.assertIsNone(self.cache.get("kid", "tell me a joke"))
+
+    def test_near_duplicate_hit(self):
+        self.put("tell me a joke")
+        self.assertIsNotNone(self.cache.get("dad", "tell me a joke please"))
+        self.assertEqual(self.cache.stats()["near_hits"], 1)
+
+    def test_different_day_is_not_near_duplicate(self):
+        self.put("how is the weather tomorrow")
+        self.assertIsNone(self.cache.get("dad", "how is the weather today"))
+        self.put("what is the weather on monday")
+        self.assertIsNone(self.cache.get("dad", "what is the weather on tuesday"))
+
+    def test_different_number_is_not_near_duplicate(self):
+        self.put("set an alarm for seven")
+        self.assertIsNone(self.cache.get("dad", "set an alarm for eight"))
+        self.put("set an alarm for 5 minutes")
+        self.assertIsNone(self.cache.get("dad", "set an alarm for 15 minutes"))
+
+    def test_korean_date_word_with_particle(self):
+        self.put("오늘 날씨 어때")
+        self.assertIsNone(self.cache.get("dad", "내일은 날씨 어때"))
+
+    def test_uncacheable_and_exact_only_intents(self):
+        self.put("what time is it")
+        self.assertIsNone(self.cache.get("dad", "what time is it"))
+        self.put("turn on the tv")
+        self.assertIsNone(self.cache.get("dad", "turn off the tv"))
+
+    def test_ttl_and_lru(self):
+        self.put("tell me a joke")
+        self.clock.now = 61
+        self.assertIsNone(self.cache.get("dad", "tell me a joke"))
+        self.assertEqual(self.cache.stats()["expirations"], 1)
+
+        for i in range(10):
+            self.cache.put("dad", f"play song number {i}", {"response": str(i)})
+        self.assertEqual(len(self.cache), 8)
+        self.assertIsNone(self.cache.get("dad", "play song number 0"))
+
+    def test_slot_tokens(self):
+        self.assertEqual(slot_tokens("Set a timer for 5 minutes tomorrow"), ("5", "tomorrow"))
+        self.assertEqual(slot_tokens("tell me a joke"), ())
+        self.assertEqual(slot_tokens("내일은 비 와?"), ("내일은",))
+
+
+if __name__ == "__main__":
+    unittest.main()
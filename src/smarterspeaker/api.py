@@ -1,9 +1,11 @@
 # src/smarterspeaker/api.py
-from sqlalchemy import or_
-from fastapi import FastAPI, APIRouter, UploadFile, File, HTTPException, Depends, Response
-from typing import List, Dict, Any, Optional
+from fastapi import FastAPI, APIRouter, UploadFile, File, HTTPException, Depends, Response, Query, Request
+from fastapi import WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, Optional, Tuple, Union
 from pydantic import BaseModel
 from pathlib import Path
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from passlib.context import CryptContext
 from .config import MASTER_KEY   
@@ -13,8 +15,25 @@ from pydub import AudioSegment
 from .db import DATABASE_URL
 from .db import get_db
 from . import models, schemas
-from .movies import search_movies  # 영화 검색 모듈
+from .movies import catalog as movie_catalog, age_gate_candidates, get_movie, match_movie_details, project  # 영화 검색 모듈
+from .speaker.embedding_index import EMBEDDING_MODEL, pack_embedding
+from .voice_search_store import VoiceSearchStore
+from .device_events import bus as device_events, publish_device_changes, event_source_allowed, EVENTS_TOKEN_HEADER
+from .state_version import TABLES, StateVersion, etag_matches
+from .home_snapshot import SnapshotCache
+from .device_service import (
+    DeviceNotFound,
+    SceneNotFound,
+    apply_operations,
+    control_devices,
+    device_index,
+    find_scene,
+    list_scenes,
+    run_scene,
+    scene_to_dict,
+)
 
+import asyncio
 import json
 
 pwd_context = CryptContext(
@@ -84,8 +103,24 @@ def update_device(device_id: int, payload: DeviceUpdate):
 # 2) 프로필 음성 업로드 (DB: user_voice_profiles.voice_blob 사용)
 # =======================================================
 
+def compute_voice_embedding(wav_bytes: bytes) -> Optional[bytes]:
+    """
+    업로드된 wav 에서 ECAPA 임베딩을 한 번만 계산해서 DB 저장용 바이트로 반환.
+    실패하면 None (프로필은 저장되고, 나중에 backfill 로 채울 수 있음).
+    """
+    # ECAPA 모델 로드가 무거우니 첫 업로드 때 import
+    # (모델 호스트가 떠 있으면 API 프로세스는 모델을 올리지 않고 호스트에 요청만 보냄)
+    from .speaker.speaker_verification import extract_embedding_from_bytes
+
+    try:
+        return pack_embedding(extract_embedding_from_bytes(wav_bytes))
+    except Exception as e:
+        print(f"[WARN] Failed to compute voice embedding: {e}")
+        return None
+
+
 @router.post("/users/{user_id}/voice-profile")
-async def upload_voice_profile(
+def upload_voice_profile(
     user_id: int,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
@@ -94,13 +129,15 @@ async def upload_voice_profile(
     프로필 페이지에서 업로드한 음성을 DB BLOB으로 저장.
     - 프론트에서 audio/webm 으로 올라오면 webm -> wav 로 변환해서 저장
     - 이미 wav 인 경우에는 그대로 저장
+    동기 def: ffmpeg 변환 / ECAPA 추론 (첫 요청이면 모델 로드까지) 이 스레드풀에서 돌아서
+    이벤트 루프 (SSE / WebSocket push) 를 막지 않음
     """
 
     user = db.query(models.User).filter(models.User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    raw = await file.read()
+    raw = file.file.read()
     if not raw:
         raise HTTPException(status_code=400, detail="Empty file")
 
@@ -127,6 +164,10 @@ async def upload_voice_profile(
             detail=f"Failed to decode audio: {e}",
         )
 
+    # 🔥 3) 임베딩은 업로드 시점에 한 번만 계산해서 같이 저장
+    embedding = compute_voice_embedding(wav_bytes)
+    embedding_model = EMBEDDING_MODEL if embedding is not None else None
+
     profile = (
         db.query(models.UserVoiceProfile)
         .filter(models.UserVoiceProfile.user_id == user_id)
@@ -134,13 +175,24 @@ async def upload_voice_profile(
     )
 
     if profile is None:
-        profile = models.UserVoiceProfile(user_id=user_id, voice_blob=wav_bytes)
+        profile = models.UserVoiceProfile(
+            user_id=user_id,
+            voice_blob=wav_bytes,
+            embedding=embedding,
+            embedding_model=embedding_model,
+        )
         db.add(profile)
     else:
         profile.voice_blob = wav_bytes
+        profile.embedding = embedding
+        profile.embedding_model = embedding_model
 
     db.commit()
-    return {"message": "Voice profile saved", "user_id": user_id}
+    return {
+        "message": "Voice profile saved",
+        "user_id": user_id,
+        "embedding": embedding is not None,
+    }
 
 # =======================================================
 # 3) 영화 검색 + 나이 제한 (이제 JSON 말고 DB 기반)
@@ -151,49 +203,146 @@ class VoiceSearchRequest(BaseModel):
     # main_ai.py 에서 email 문자열을 넘겨주고 있으므로
     # 여기서도 user = 이메일 로 취급
     user: Optional[str] = None
+    # 요청한 스피커 기기 (없으면 기기 구분 없음)
+    device: Optional[str] = None
+    # 스피커 IntentRouter 결과 (없으면 여기서 분류). 퍼지 결과로 나이 제한을 걸지 판단할 때 씀
+    intent: Optional[str] = None
 
 
 class VoiceSearchResult(BaseModel):
     raw_text: str
     query: str
-    count: int
+    count: int                  # results 길이 (top-k)
+    total: int = 0              # 일치한 전체 영화 수 (results 는 그중 점수 높은 top-k)
     results: List[Dict[str, Any]]
+    scores: List[float] = []
     user: Optional[str]
+    device: Optional[str] = None
     allowed: bool
     reason: Optional[str]
+    seq: int = 0
+
+
+MOVIES_MAX_PAGE_SIZE = 1000
+STREAM_THRESHOLD = 200  # 이보다 많은 결과는 StreamingResponse 로 조금씩 직렬화
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """"id,title,ageRating" -> ["id", "title", "ageRating"] (비어 있으면 None = 전체 필드)"""
+    if not fields:
+        return None
+    return [f.strip() for f in fields.split(",") if f.strip()] or None
+
+
+def stream_json(header: Dict[str, Any], results: List[Dict[str, Any]], chunk: int = 100):
+    """{"...header", "results": [...]} 를 결과 chunk 개씩 잘라서 yield"""
+    head = json.dumps(header, ensure_ascii=False, separators=(",", ":"))
+    yield head[:-1] + ',"results":['
+    for i in range(0, len(results), chunk):
+        part = ",".join(
+            json.dumps(m, ensure_ascii=False, separators=(",", ":"))
+            for m in results[i:i + chunk]
+        )
+        yield ("," if i else "") + part
+    yield "]}"
 
 
 @router.get("/movies")
-def get_movies(q: str = ""):
-    results = search_movies(q)
-    return {
-        "query": q,
-        "count": len(results),
-        "results": results,
-    }
+def get_movies(
+    q: str = "",
+    genre: Optional[str] = None,
+    year: Optional[int] = None,
+    ageRating: Optional[int] = None,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=MOVIES_MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    stream: bool = False,
+):
+    """
+    영화 검색 (페이지 단위).
+    - offset / limit: 페이지, 응답의 next_offset 으로 다음 페이지 요청 (마지막이면 null)
+      limit 을 안 주면 예전처럼 offset 부터 전부 (많으면 아래 스트리밍으로)
+    - fields: 필요한 필드만 (예: fields=id,title,ageRating)
+    - stream=true 이거나 결과가 많으면 JSON 을 스트리밍으로 보냄
+    """
+    page = movie_catalog.page(
+        q, offset=offset, limit=limit, fields=parse_fields(fields),
+        genre=genre, year=year, age_rating=ageRating,
+    )
+    results = page.pop("results")
+    page.pop("required_age")
+    header = {"query": q, **page}
+
+    if stream or len(results) > STREAM_THRESHOLD:
+        return StreamingResponse(stream_json(header, results), media_type="application/json")
+    return {**header, "results": results}
+
+
+@router.get("/movies/{movie_id}")
+def get_movie_detail(movie_id: int, fields: Optional[str] = None):
+    movie = get_movie(movie_id)
+    if movie is None:
+        raise HTTPException(status_code=404, detail="Movie not found")
+    return project(movie, parse_fields(fields))
+
+
+VOICE_SEARCH_TOP_K = 5
+
+# 음성 명령에서 제목 앞뒤로 붙는 말 (긴 것부터 떼어냄)
+QUERY_PREFIXES = sorted([
+    "search for",
+    "search",
+    "find me",
+    "find",
+    "play the movie",
+    "play movie",
+    "play",
+    "i want to watch",
+    "watch",
+    "show me",
+    "the movie",
+    "movie",
+    "영화 찾아줘",
+    "영화 틀어줘",
+], key=len, reverse=True)
+
+QUERY_SUFFIXES = sorted([
+    "please",
+    "movie",
+    "for me",
+    "영화 찾아줘",
+    "영화 틀어줘",
+    "찾아줘",
+    "틀어줘",
+    "보여줘",
+    "영화",
+], key=len, reverse=True)
 
 
 def extract_query_from_text(text: str) -> str:
+    """
+    "play the movie inter stellar please" -> "inter stellar"
+    (clean_text 된 STT 결과 기준. 남은 제목은 search_movies / match_movies 가 오타까지 처리)
+    """
     t = text.strip()
     if not t:
         return ""
 
-    lowered = t.lower()
-
-    prefixes = [
-        "search",
-        "find",
-        "play",
-        "play the movie",
-        "play movie",
-        "movie",
-        "영화 찾아줘",
-        "영화 틀어줘",
-    ]
-
-    for prefix in prefixes:
-        if lowered.startswith(prefix):
-            return t[len(prefix):].strip(" ,")
+    changed = True
+    while changed and t:
+        changed = False
+        lowered = t.lower()
+        for prefix in QUERY_PREFIXES:
+            if lowered == prefix or lowered.startswith(prefix + " ") or lowered.startswith(prefix + ","):
+                t = t[len(prefix):].strip(" ,")
+                changed = True
+                break
+        lowered = t.lower()
+        for suffix in QUERY_SUFFIXES:
+            if lowered.endswith(" " + suffix) or (lowered.endswith(suffix) and not suffix.isascii()):
+                t = t[:len(t) - len(suffix)].strip(" ,")
+                changed = True
+                break
 
     return t
 
@@ -208,20 +357,26 @@ def get_user_age_from_db(email: Optional[str], db: Session) -> Optional[int]:
 
 
 def get_required_age(results: List[Dict[str, Any]]) -> int:
-    if not results:
-        return 0
-    return max(m.get("ageRating", 0) for m in results)
-
-
-_last_voice_search: Dict[str, Any] = {
-    "raw_text": "",
-    "query": "",
-    "count": 0,
-    "results": [],
-    "user": None,
-    "allowed": True,
-    "reason": None,
-}
+    # 카탈로그의 ageRating 버킷 인덱스로 계산 (결과 목록을 훑지 않음)
+    return movie_catalog.required_age_of(results)
+
+
+_intent_router = None
+
+
+def classify_intent(text: str) -> str:
+    """스피커가 intent 를 안 보냈을 때 (예: 웹) 로컬 IntentRouter 로 분류"""
+    global _intent_router
+    if _intent_router is None:
+        # 예시 문장 벡터를 만드니까 처음 쓸 때 import / 생성
+        from .ai.intent_router import IntentRouter
+        _intent_router = IntentRouter()
+    return _intent_router.route(text).intent
+
+
+# (user, device) 별 최신 검색 결과 + SSE 푸시
+voice_searches = VoiceSearchStore()
+SSE_KEEPALIVE_SECONDS = 15
 
 
 @router.post("/voice-search", response_model=VoiceSearchResult)
@@ -230,15 +385,29 @@ def voice_search(payload: VoiceSearchRequest, db: Session = Depends(get_db)):
     main_ai.py 에서 인식된 자연어 명령(text)과 화자 email(user)을 받아
     영화 검색 + 나이 제한 체크를 수행.
     """
-    global _last_voice_search
-
     raw_text = (payload.text or "").strip()
     user = payload.user
     query = extract_query_from_text(raw_text)
-    results = search_movies(query)
+    if query:
+        # STT 오타 허용 매칭 (점수 높은 순), 응답에는 top-k 만
+        all_matches = match_movie_details(query, k=None)
+        total = len(all_matches)
+        matches = all_matches[:VOICE_SEARCH_TOP_K]
+        results = [m.movie for m in matches]
+        scores = [m.score for m in matches]
+        # 퍼지 결과는 영화 검색 의도이거나 제목 대부분이 맞았을 때만 나이 제한에 반영
+        # ("how are you" 같은 일반 대화가 비슷한 제목 때문에 막히지 않게)
+        intent = payload.intent or classify_intent(raw_text)
+        required_age = get_required_age(age_gate_candidates(matches, intent))
+    else:
+        # 검색어가 없으면 전체 카탈로그 기준 (결과는 앞 페이지만)
+        page = movie_catalog.page("", limit=VOICE_SEARCH_TOP_K)
+        results = page["results"]
+        total = page["count"]
+        required_age = page["required_age"]
+        scores = []
 
     user_age = get_user_age_from_db(user, db)
-    required_age = get_required_age(results)
 
     allowed = True
     reason = None
@@ -247,21 +416,97 @@ def voice_search(payload: VoiceSearchRequest, db: Session = Depends(get_db)):
         allowed = False
         reason = f"Age restricted: user_age={user_age}, required_age={required_age}"
 
-    _last_voice_search = {
+    return voice_searches.put({
         "raw_text": raw_text,
         "query": query,
         "count": len(results),
+        "total": total,
         "results": results,
+        "scores": scores,
         "user": user,
+        "device": payload.device,
         "allowed": allowed,
         "reason": reason,
-    }
-    return _last_voice_search
+    })
 
 
 @router.get("/voice-search", response_model=VoiceSearchResult)
-def get_last_voice_search():
-    return _last_voice_search
+def get_last_voice_search(
+    user: Optional[str] = None,
+    device: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    """
+    user / device 의 최신 검색 결과 (둘 다 없으면 전체 중 최신).
+    fields=id 처럼 주면 results 를 그 필드만으로 줄여서 반환.
+    """
+    result = voice_searches.get(user, device)
+    selected = parse_fields(fields)
+    if not selected:
+        return result
+    return {**result, "results": [project(m, selected) for m in result["results"]]}
+
+
+@router.post("/voice-search/reset")
+def reset_voice_search(user: Optional[str] = None, device: Optional[str] = None):
+    """프론트가 결과를 처리한 뒤 지움 (user / device 없으면 전부)"""
+    return {"removed": voice_searches.reset(user, device)}
+
+
+@router.get("/voice-search/events")
+async def voice_search_events(
+    request: Request,
+    user: Optional[str] = None,
+    device: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    """
+    새 검색 결과를 Server-Sent Events 로 push (폴링 대신 EventSource 로 구독).
+    재연결 시 Last-Event-ID 보다 새로운 결과가 있으면 바로 한 번 보내줌.
+    """
+    selected = parse_fields(fields)
+    sub = voice_searches.subscribe(user, device)
+
+    def encode(event: Dict[str, Any]) -> str:
+        if selected:
+            event = {**event, "results": [project(m, selected) for m in event["results"]]}
+        data = json.dumps(event, ensure_ascii=False, separators=(",", ":"))
+        return f"id: {event['seq']}\nevent: voice-search\ndata: {data}\n\n"
+
+    async def events():
+        try:
+            last_id = request.headers.get("last-event-id")
+            try:
+                seen = int(last_id or 0)
+            except ValueError:
+                # 숫자가 아닌 Last-Event-ID (프록시 / 다른 서버가 붙인 값) 는 처음 연결한 것으로 봄
+                seen = 0
+            latest = voice_searches.get(user, device)
+            if last_id is not None and latest["seq"] > seen:
+                yield encode(latest)
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(sub.queue.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                if event.get("kind") == "resync":
+                    # 큐가 넘쳐서 밀린 결과를 버렸음 -> 지금 최신 결과 하나로 따라잡음
+                    event = voice_searches.get(user, device)
+                    if not event["seq"]:
+                        continue
+                yield encode(event)
+        finally:
+            voice_searches.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 # =======================================================
@@ -359,8 +604,79 @@ def login(login_req: LoginRequest, db: Session = Depends(get_db)):
 # 5) Zones (DB)
 # =======================================================
 
-@router.get("/zones", response_model=List[schemas.ZoneOut])
-def list_zones(db: Session = Depends(get_db)):
+# /devices-db, /zones 버전 (ETag / ?since= 변경분). 기기 변경은 이벤트 버스에서 받음
+state = StateVersion()
+device_events.add_listener(state.on_device_events)
+
+
+def table_signature(db: Session, table: str) -> Tuple:
+    """
+    테이블 요약 (집계 쿼리 한 번, 행 수십 개라 싸다). API 밖에서 쓴 변경 확인용 -
+    행 추가/삭제, 존 이동, 상태 (id * 길이: on/off/locked/unlocked), 이름 길이가 바뀌면 값이 바뀜
+    """
+    if table == "devices":
+        d = models.Device
+        columns = (
+            func.count(d.id), func.max(d.id), func.sum(d.id * d.zone_id),
+            func.sum(d.id * func.length(d.status)), func.sum(func.length(d.name) + func.length(d.type)),
+        )
+    else:
+        z = models.Zone
+        columns = (
+            func.count(z.id), func.max(z.id), func.sum(z.id * z.order_index),
+            func.sum(func.length(z.name) + func.coalesce(func.length(z.display_name), 0)),
+        )
+    return tuple(db.query(*columns).one())
+
+
+def refresh_state(db: Session, tables=TABLES) -> None:
+    """버스 / bump 로 안 들어온 DB 변경이 있으면 버전을 올림 (ETag / since 가 오래된 데이터를 안 주게)"""
+    for table in tables:
+        if state.validate(table, table_signature(db, table)):
+            print(f"[STATE] {table} changed outside the API (dropped event / script / SQL) -> full resync")
+
+
+def versioned(table: str, request: Request, response: Response, since: Optional[int], db: Session):
+    """
+    조건부 GET 공통 처리.
+    - 먼저 DB signature 확인 (refresh_state)
+    - If-None-Match 가 현재 ETag 와 같으면 304 Response (집계 쿼리 말고는 DB 조회 없음)
+    - since 가 있고 변경 기록 범위 안이면 (바뀐 id, 삭제된 id, 버전)
+    - 아니면 None (-> 전체 응답)
+    """
+    refresh_state(db, (table,))
+    etag = state.etag(table)
+    version = state.table_version(table)
+    headers = {"ETag": etag, "X-State-Version": str(version)}
+    if state.matches(table, request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    if since is None:
+        return None
+    changes = state.changes_since(table, since)
+    if changes is None:
+        return None
+    return (*changes, version)
+
+
+@router.get("/zones", response_model=Union[List[schemas.ZoneOut], schemas.ZoneDelta])
+def list_zones(
+    request: Request,
+    response: Response,
+    since: Optional[int] = None,
+    db: Session = Depends(get_db),
+):
+    """?since=<version> 이면 그 뒤로 바뀐 존 / 삭제된 존 id 만 (기록 범위 밖이면 전체 목록)"""
+    result = versioned("zones", request, response, since, db)
+    if isinstance(result, Response):
+        return result
+    if result is not None:
+        changed, deleted, version = result
+        rows = (
+            db.query(models.Zone).filter(models.Zone.id.in_(changed)).order_by(models.Zone.order_index).all()
+            if changed else []
+        )
+        return {"version": version, "changed": rows, "deleted": deleted}
     return db.query(models.Zone).order_by(models.Zone.order_index).all()
 
 
@@ -370,6 +686,8 @@ def create_zone(zone_in: schemas.ZoneCreate, db: Session = Depends(get_db)):
     db.add(zone)
     db.commit()
     db.refresh(zone)
+    device_index.invalidate()
+    state.bump("zones", [zone.id])
     return zone
 
 
@@ -380,10 +698,15 @@ def delete_zone(zone_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Zone not found")
 
     # 해당 존에 속한 디바이스들도 같이 삭제
-    db.query(models.Device).filter(models.Device.zone_id == zone_id).delete()
+    devices = db.query(models.Device).filter(models.Device.zone_id == zone_id)
+    removed = [device_out(d) for d in devices]
+    devices.delete()
 
     db.delete(zone)
     db.commit()
+    device_index.invalidate()
+    state.bump("zones", [zone_id], deleted=True)
+    publish_device_changes(removed, kind="deleted")
     return Response(status_code=204)
 
 
@@ -391,8 +714,26 @@ def delete_zone(zone_id: int, db: Session = Depends(get_db)):
 # 6) Devices (DB)
 # =======================================================
 
-@router.get("/devices-db", response_model=List[schemas.DeviceOut])
-def list_devices_db(db: Session = Depends(get_db)):
+def device_out(device: models.Device) -> Dict[str, Any]:
+    """ORM 기기 -> DeviceOut dict (상태 변경 이벤트용)"""
+    return schemas.DeviceOut.model_validate(device).model_dump()
+
+
+@router.get("/devices-db", response_model=Union[List[schemas.DeviceOut], schemas.DeviceDelta])
+def list_devices_db(
+    request: Request,
+    response: Response,
+    since: Optional[int] = None,
+    db: Session = Depends(get_db),
+):
+    """?since=<version> 이면 그 뒤로 바뀐 기기 / 삭제된 기기 id 만 (기록 범위 밖이면 전체 목록)"""
+    result = versioned("devices", request, response, since, db)
+    if isinstance(result, Response):
+        return result
+    if result is not None:
+        changed, deleted, version = result
+        rows = db.query(models.Device).filter(models.Device.id.in_(changed)).all() if changed else []
+        return {"version": version, "changed": rows, "deleted": deleted}
     return db.query(models.Device).all()
 
 
@@ -402,6 +743,8 @@ def create_device(device_in: schemas.DeviceCreate, db: Session = Depends(get_db)
     db.add(h)
     db.commit()
     db.refresh(h)
+    device_index.invalidate()
+    publish_device_changes([device_out(h)], kind="created")
     return h
 
 
@@ -416,6 +759,7 @@ def update_device_db(device_id: int, update: schemas.DeviceUpdate, db: Session =
 
     db.commit()
     db.refresh(device)
+    publish_device_changes([device_out(device)])
     return device
 
 
@@ -425,11 +769,39 @@ def delete_device_db(device_id: int, db: Session = Depends(get_db)):
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
 
+    removed = device_out(device)
     db.delete(device)
     db.commit()
+    device_index.invalidate()
+    publish_device_changes([removed], kind="deleted")
     return Response(status_code=204)
 
 
+# =======================================================
+# 6-1) Home snapshot (대시보드: 존 + 존별 기기를 요청 한 번에)
+# =======================================================
+
+home_snapshot = SnapshotCache(state)
+
+
+@router.get("/home/snapshot")
+def get_home_snapshot(request: Request, db: Session = Depends(get_db)):
+    """
+    {"version", "zones": [{...ZoneOut, "devices": [DeviceOut, ...]}, ...]}
+    존 / 기기 버전이 그대로면 캐시된 JSON 을 그대로 (If-None-Match 가 맞으면 304)
+    """
+    refresh_state(db)
+    etag = home_snapshot.etag()
+    if etag_matches(etag, request.headers.get("if-none-match")):
+        return Response(status_code=304, headers={"ETag": etag})
+    body, key = home_snapshot.get(db)
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": home_snapshot.etag(key), "X-State-Version": str(max(key))},
+    )
+
+
 # =======================================================
 # 7) Device Control (AI 스피커 → DB 상태 제어)
 # =======================================================
@@ -446,50 +818,152 @@ def device_control(cmd: DeviceControlRequest, db: Session = Depends(get_db)):
     AI 스피커가 자연어를 해석해서,
     zone + device_type + action 형태로 보내주면
     해당 존의 해당 타입 기기들을 DB에서 찾아 상태를 변경.
+    (실제 로직은 device_service - 스피커 in-process 전송과 공유)
     """
+    try:
+        return control_devices(db, cmd.zone, cmd.device_type, cmd.action)
+    except DeviceNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
 
-    query = db.query(models.Device).join(models.Zone)
 
-    if cmd.zone:
-        zone_like = f"%{cmd.zone}%"
-        query = query.filter(
-            or_(
-                models.Zone.name.ilike(zone_like),
-                models.Zone.display_name.ilike(zone_like),
-            )
-        )
+@router.post("/device-control/batch", response_model=List[schemas.DeviceOut])
+def device_control_batch(batch: schemas.DeviceBatchRequest, db: Session = Depends(get_db)):
+    """
+    여러 기기 조작을 한 번에 (한 트랜잭션, 커밋 한 번).
+    하나라도 맞는 기기가 없으면 아무것도 안 바꾸고 404.
+    """
+    if not batch.operations:
+        raise HTTPException(status_code=400, detail="No operations")
+    try:
+        return apply_operations(db, [op.model_dump() for op in batch.operations])
+    except DeviceNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
 
-    if cmd.device_type:
-        query = query.filter(models.Device.type == cmd.device_type)
 
-    devices = query.all()
-    if not devices:
-        raise HTTPException(status_code=404, detail="No matching devices found")
+# =======================================================
+# 8) Scenes (이름 붙인 기기 조작 묶음, 스피커에서 "good night" 한 마디로 실행)
+# =======================================================
 
-    action = cmd.action.lower()
+@router.get("/scenes", response_model=List[schemas.SceneOut])
+def get_scenes(db: Session = Depends(get_db)):
+    return list_scenes(db)
 
-    def map_status(device_type: str, action: str) -> str:
-        if device_type in ["light", "tv", "ac"]:
-            if action in ["on", "turn_on", "켜", "켜줘"]:
-                return "on"
-            if action in ["off", "turn_off", "꺼", "꺼줘"]:
-                return "off"
-        if device_type == "door":
-            if action in ["lock", "잠가", "잠가줘"]:
-                return "locked"
-            if action in ["unlock", "열어", "열어줘"]:
-                return "unlocked"
-        return action
 
-    for dev in devices:
-        new_status = map_status(dev.type, action)
-        dev.status = new_status
+@router.post("/scenes", response_model=schemas.SceneOut)
+def create_scene(scene_in: schemas.SceneCreate, db: Session = Depends(get_db)):
+    if not scene_in.operations:
+        raise HTTPException(status_code=400, detail="No operations")
+    if find_scene(db, scene_in.name) is not None:
+        raise HTTPException(status_code=409, detail="Scene already exists")
 
+    scene = models.Scene(
+        name=scene_in.name,
+        display_name=scene_in.display_name,
+        actions_json=json.dumps(
+            [op.model_dump(exclude_none=True) for op in scene_in.operations], ensure_ascii=False
+        ),
+    )
+    db.add(scene)
     db.commit()
+    db.refresh(scene)
+    return scene_to_dict(scene)
+
+
+@router.delete("/scenes/{scene_id}", status_code=204)
+def delete_scene(scene_id: int, db: Session = Depends(get_db)):
+    scene = db.query(models.Scene).filter(models.Scene.id == scene_id).first()
+    if not scene:
+        raise HTTPException(status_code=404, detail="Scene not found")
 
-    for dev in devices:
-        db.refresh(dev)
+    db.delete(scene)
+    db.commit()
+    return Response(status_code=204)
+
+
+@router.post("/scenes/{name}/run", response_model=List[schemas.DeviceOut])
+def run_scene_endpoint(name: str, db: Session = Depends(get_db)):
+    """장면 실행: 조작 전체를 /device-control/batch 와 같은 한 트랜잭션으로"""
+    try:
+        return run_scene(db, name)
+    except (SceneNotFound, DeviceNotFound) as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+# =======================================================
+# 9) Device Events (상태 변경 push: WebSocket)
+# =======================================================
+
+class DeviceEventsIn(BaseModel):
+    events: List[Dict[str, Any]]
+
+
+@router.post("/device-events", status_code=204)
+def post_device_events(body: DeviceEventsIn, request: Request):
+    """
+    다른 프로세스(스피커)가 DB 에 직접 쓴 변경을 버스로 전달받음
+    (device_events.HttpEventForwarder 가 보냄). DEVICE_EVENTS_TOKEN 헤더 / loopback 만 허용
+    """
+    client_host = request.client.host if request.client else None
+    if not event_source_allowed(client_host, request.headers.get(EVENTS_TOKEN_HEADER)):
+        raise HTTPException(status_code=403, detail="Device events not allowed from this client")
+    device_events.publish(
+        {**e, "source": e.get("source") or "speaker"} for e in body.events if e.get("device")
+    )
+    return Response(status_code=204)
+
+
+@router.websocket("/ws/devices")
+async def device_events_ws(
+    ws: WebSocket,
+    zone: Optional[List[int]] = Query(None),
+    since: Optional[int] = None,
+):
+    """
+    기기 상태 변경 push.
+    - ?zone=1&zone=2 : 해당 존 기기 이벤트만
+    - ?since=<seq>   : 재연결 시 그 뒤 이벤트를 먼저 보내줌 (놓친 게 너무 많으면 {"kind": "resync"})
+    - 클라이언트가 느려서 큐가 넘쳐도 {"kind": "resync"} (밀린 이벤트는 버림)
+    - 클라이언트가 {"zones": [1, 2]} (또는 null) 을 보내면 필터 변경
+    """
+    await ws.accept()
+    sub = device_events.subscribe(zone)
+    receiver = getter = None
+    try:
+        await ws.send_json({"kind": "hello", "seq": device_events.seq})
+        if since is not None:
+            missed = device_events.since(since, sub.zones)
+            if missed is None:
+                await ws.send_json({"kind": "resync", "seq": device_events.seq})
+            else:
+                for event in missed:
+                    await ws.send_json(event)
+
+        receiver = asyncio.ensure_future(ws.receive_text())
+        while True:
+            getter = asyncio.ensure_future(sub.queue.get())
+            done, _ = await asyncio.wait({getter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+
+            if getter in done:
+                await ws.send_json(getter.result())
+            else:
+                getter.cancel()
+
+            if receiver in done:
+                text = receiver.result()  # 연결이 끊겼으면 WebSocketDisconnect
+                try:
+                    message = json.loads(text)
+                    if isinstance(message, dict) and "zones" in message:
+                        zones = message["zones"]
+                        sub.zones = frozenset(int(z) for z in zones) if zones else None
+                except (ValueError, TypeError):
+                    print("[EVENTS] ignored ws message:", text[:100])
+                receiver = asyncio.ensure_future(ws.receive_text())
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        device_events.unsubscribe(sub)
+        for task in (receiver, getter):
+            if task is not None:
+                task.cancel()
 
-    return devices
 
 app.include_router(router)
\ No newline at end of file
@@ -3,17 +3,100 @@ import os
 from dotenv import load_dotenv
 
 # Wake words
-WAKE_WORDS = ["Activate, Hello, Hi, Help me"]
+WAKE_WORDS = ["activate", "hello", "hi", "help me"]
+WAKE_TEMPLATE_DIR = Path(__file__).resolve().parent / "wake_templates"  # <phrase>/*.wav MFCC 템플릿
+WAKE_DTW_THRESHOLD = 9.0  # 템플릿 DTW 거리 기준 (마이크/환경에 맞게 조정)
+# 템플릿으로 확정 못 한 후보를 Whisper 로 확인하는 최소 간격 / 계속 아니면 늘어나는 최대 간격 (초)
+WAKE_CONFIRM_INTERVAL = 1.5
+WAKE_CONFIRM_MAX_INTERVAL = 8.0
+WAKE_PRE_SILENCE_MS = 300  # 후보는 앞에 이만큼 조용했던 짧은 발화만 (대화/TV 중간 단어는 버림)
 
 # Speaker verification
 DIRECTORY_PATH = Path("voice_samples")
 THRESHOLD = 0.16
+SPEAKER_REFRESH_SECONDS = 30  # DB 음성 프로필 재조회 주기 (바뀐 유저만 재인코딩)
 
 # Audio recording
 SAMPLE_RATE = 16000
 RECORD_SECONDS = 3
 VOICE_INPUT = "voice_sample.wav"
+RING_BUFFER_SECONDS = 30  # VoiceRecorder 가 메모리에 들고 있는 최근 오디오 길이
+
+# Command endpointing (VAD)
+COMMAND_ONSET_TIMEOUT = 5.0      # 이 시간 안에 말을 시작 안 하면 취소
+COMMAND_TRAILING_SILENCE = 0.7   # 말 끝난 뒤 이만큼 조용하면 명령 끝
+COMMAND_MAX_SECONDS = 10.0       # 명령 최대 길이
+
+# 스트리밍 STT (말하는 중에 부분 인식 결과를 냄, 켜고 끄기는 아래 STREAMING_STT)
+STREAM_STEP_SECONDS = 1.0        # 새 오디오가 이만큼 쌓일 때마다 창을 다시 디코딩
+STREAM_TRIM_SECONDS = 4.0        # 확정된 앞부분이 이보다 길면 창에서 잘라냄 (다음 디코딩이 짧아짐)
 
 load_dotenv()
 
+# (선택) DB 음성 blob / 임베딩 content-hash 캐시 폴더. 비워두면 디스크에 아무것도 안 씀
+VOICE_BLOB_CACHE_DIR = os.getenv("VOICE_BLOB_CACHE_DIR")
+
+# 명령 STT 를 스트리밍(말하는 중 부분 인식)으로 할지 (기본 false: 다 듣고 한 번에).
+# 켜면 디코딩은 백그라운드 스레드에서 (CPU 에서 base 모델 디코딩이 STREAM_STEP_SECONDS 보다 느리면 이득이 없음)
+STREAMING_STT = os.getenv("STREAMING_STT", "false").lower() == "true"
+
+# Whisper STT: 모델 크기 / 언어 힌트 / 어휘 prompt (존·기기 이름, 영화 제목)
+#   STT_LANGUAGE 기본 "auto": 매번 감지 (한국어/영어 둘 다). 한 언어만 쓰면 "en" / "ko" 로 고정 (감지 생략)
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
+STT_LANGUAGE = os.getenv("STT_LANGUAGE", "auto")
+STT_VOCAB_REFRESH_SECONDS = float(os.getenv("STT_VOCAB_REFRESH_SECONDS", "300"))
+STT_PROMPT_MAX_CHARS = 600   # Whisper prompt 는 최대 224 토큰 (넘으면 앞부분이 잘림)
+
+# 모델 호스트 (python -m smarterspeaker.speaker.model_host): Whisper/ECAPA 를 이 프로세스 하나만 로드
+#   auto: 호스트가 떠 있으면 쓰고 없으면 프로세스 안에서 로드 / on: 호스트만 사용 / off: 항상 로컬 로드
+MODEL_HOST = os.getenv("MODEL_HOST", "auto").lower()
+MODEL_HOST_ADDRESS = os.getenv("MODEL_HOST_ADDRESS", "127.0.0.1:50710")
+# 호스트 인증 키 (요청이 pickle 이라 키를 아는 프로세스는 호스트에서 코드를 실행할 수 있음).
+# 비워두면 호스트가 실행할 때마다 랜덤 키를 만들어 MODEL_HOST_KEY_FILE (0600) 에 쓰고, 같은 유저 클라이언트가 읽음
+MODEL_HOST_AUTHKEY = os.getenv("MODEL_HOST_AUTHKEY", "").encode() or None
+MODEL_HOST_KEY_FILE = Path(os.getenv("MODEL_HOST_KEY_FILE", Path.home() / ".smarterspeaker" / "model_host.key"))
+MODEL_HOST_BATCH_MS = float(os.getenv("MODEL_HOST_BATCH_MS", "15"))   # 임베딩 요청을 모으는 시간
+MODEL_HOST_MAX_BATCH = int(os.getenv("MODEL_HOST_MAX_BATCH", "16"))   # ECAPA 한 번에 넣는 최대 음성 수
+
+# Gemini: 의도/엔티티/응답을 한 번의 JSON 호출로 받을지 (false 면 기존 3단계 호출)
+GEMINI_SINGLE_PASS = os.getenv("GEMINI_SINGLE_PASS", "true").lower() != "false"
+
+# Gemini 응답 캐시 (사용자별, TTL 초 / 최대 항목 수 / 비슷한 문장 재사용 기준, 0 이면 정확히 같은 문장만)
+GEMINI_CACHE_TTL = float(os.getenv("GEMINI_CACHE_TTL", "600"))
+GEMINI_CACHE_SIZE = int(os.getenv("GEMINI_CACHE_SIZE", "256"))
+GEMINI_CACHE_SIMILARITY = float(os.getenv("GEMINI_CACHE_SIMILARITY", "0.9"))
+
+# Gemini 대화 세션 (최대 세션 수 / 유휴 삭제 초 / 사용자당 유지 턴 수 / history 토큰 예산)
+GEMINI_MAX_SESSIONS = int(os.getenv("GEMINI_MAX_SESSIONS", "32"))
+GEMINI_SESSION_IDLE_SECONDS = float(os.getenv("GEMINI_SESSION_IDLE_SECONDS", "1800"))
+GEMINI_HISTORY_TURNS = int(os.getenv("GEMINI_HISTORY_TURNS", "10"))
+GEMINI_HISTORY_TOKENS = int(os.getenv("GEMINI_HISTORY_TOKENS", "2000"))
+
+# /voice-search 결과 저장 (사용자/기기별 최신 결과 유지 시간, 최대 개수)
+VOICE_SEARCH_TTL = float(os.getenv("VOICE_SEARCH_TTL", "300"))
+VOICE_SEARCH_MAX_ENTRIES = int(os.getenv("VOICE_SEARCH_MAX_ENTRIES", "256"))
+
+# 스피커 -> FastAPI 백엔드 (공용 HTTP 클라이언트: 응답 타임아웃 / 연결 타임아웃 / 재시도 횟수)
+BACKEND_URL = os.getenv("BACKEND_URL", "http://127.0.0.1:8000")
+BACKEND_TIMEOUT = float(os.getenv("BACKEND_TIMEOUT", "3.0"))
+BACKEND_CONNECT_TIMEOUT = float(os.getenv("BACKEND_CONNECT_TIMEOUT", "0.5"))
+BACKEND_RETRIES = int(os.getenv("BACKEND_RETRIES", "2"))
+VOICE_SEARCH_TIMEOUT = float(os.getenv("VOICE_SEARCH_TIMEOUT", "1.5"))
+
+# 기기 제어 전송: auto (BACKEND_URL 이 localhost 면 in-process) / inprocess / http
+DEVICE_CONTROL_TRANSPORT = os.getenv("DEVICE_CONTROL_TRANSPORT", "auto")
+
+# 기기 인덱스 (존/기기 구성) 를 DB 확인 없이 믿는 최대 시간 (초). 그 전에도 매 조회마다 행 수/id 확인은 함
+DEVICE_INDEX_MAX_AGE = float(os.getenv("DEVICE_INDEX_MAX_AGE", "30"))
+
+# POST /device-events (스피커 -> API 이벤트 전달) 공유 토큰. 비워두면 loopback 에서 온 요청만 받음
+# (API 가 reverse proxy 뒤에 있으면 모든 요청이 loopback 으로 보이니까 토큰을 꼭 설정)
+DEVICE_EVENTS_TOKEN = os.getenv("DEVICE_EVENTS_TOKEN") or None
+
+# 스피커가 장면(scene) 이름 목록을 다시 읽는 주기 (초)
+SCENE_REFRESH_SECONDS = float(os.getenv("SCENE_REFRESH_SECONDS", "60"))
+
+# 이 스피커 기기 이름 (/voice-search 결과를 기기별로 구분)
+DEVICE_ID = os.getenv("SPEAKER_DEVICE_ID", "speaker-1")
+
 MASTER_KEY = os.getenv("MASTER_KEY", "01046480328")  # 원하는 값으로
\ No newline at end of file
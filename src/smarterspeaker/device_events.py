@@ -0,0 +1,189 @@
+# src/smarterspeaker/device_events.py
+"""
+기기 상태 변경 이벤트 버스.
+
+예전에는 대시보드(speaker-web)가 /devices-db 를 1.5초마다 폴링해야 상태를 알 수 있었고,
+스피커(main_ai)가 DB 에 직접 쓴 변경은 아무도 몰랐다.
+
+- 상태를 바꾸는 곳(/device-control, /devices-db/{id}, 장면, 스피커)은 전부 publish_device_changes 호출
+- API 프로세스: DeviceEventBus 가 seq 를 붙이고 WebSocket 구독자에게 존 필터로 push
+  (최근 history 개는 들고 있어서 재연결 시 since=seq 로 놓친 것만 다시 받음)
+- 스피커 프로세스: 같은 함수가 HttpEventForwarder 로 POST /device-events (백그라운드 스레드,
+  음성 명령 처리는 안 기다림). 아무나 이벤트를 넣지 못하게 DEVICE_EVENTS_TOKEN 헤더
+  (설정 안 했으면 loopback 에서 온 요청만) 확인
+"""
+import asyncio
+import hmac
+import ipaddress
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional
+
+from smarterspeaker.config import DEVICE_EVENTS_TOKEN
+from smarterspeaker.voice_search_store import Subscriber
+
+EVENTS_TOKEN_HEADER = "X-Device-Events-Token"
+
+# kind: status (상태 변경) / created / deleted
+Event = Dict[str, Any]
+
+
+def device_event(device: Dict[str, Any], kind: str = "status", source: str = "api") -> Event:
+    """기기 dict (schemas.DeviceOut 형태) -> 이벤트 (seq 는 버스가 붙임)"""
+    return {"kind": kind, "source": source, "ts": time.time(), "device": device}
+
+
+@dataclass(eq=False)
+class DeviceSubscriber(Subscriber):
+    zones: Optional[FrozenSet[int]] = None   # None 이면 전체 존
+
+    def wants(self, event: Event) -> bool:
+        return self.zones is None or event["device"].get("zone_id") in self.zones
+
+
+class DeviceEventBus:
+    def __init__(self, history: int = 256):
+        self._lock = threading.Lock()
+        self._history: "deque[Event]" = deque(maxlen=history)
+        self._subscribers: List[DeviceSubscriber] = []
+        self._listeners: List[Callable[[List[Event]], Any]] = []
+        self._seq = 0
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def publish(self, events: Iterable[Event]) -> List[Event]:
+        """seq 붙여서 history 에 넣고 구독자에게 push. (스레드풀 / 이벤트 루프 어디서든 호출 가능)"""
+        with self._lock:
+            published = []
+            for event in events:
+                self._seq += 1
+                event = {**event, "seq": self._seq}
+                self._history.append(event)
+                published.append(event)
+            subscribers = list(self._subscribers)
+
+        for listener in self._listeners:
+            listener(published)
+
+        for sub in subscribers:
+            wanted = [e for e in published if sub.wants(e)]
+            if not wanted:
+                continue
+            try:
+                for event in wanted:
+                    sub.loop.call_soon_threadsafe(sub.push, event)
+            except RuntimeError:
+                # 이벤트 루프가 이미 닫힘 (연결 끊긴 구독자)
+                self.unsubscribe(sub)
+        return published
+
+    def add_listener(self, listener: Callable[[List[Event]], Any]) -> None:
+        """publish 때마다 (같은 스레드에서) 불림. 예: state_version 의 버전 증가"""
+        self._listeners.append(listener)
+
+    def since(self, seq: int, zones: Optional[FrozenSet[int]] = None) -> Optional[List[Event]]:
+        """
+        seq 이후 이벤트 (존 필터 적용). history 에서 이미 밀려나서 빈틈이 있으면 None
+        (-> 클라이언트가 전체 목록을 다시 읽어야 함)
+        """
+        with self._lock:
+            if self._history and seq < self._history[0]["seq"] - 1:
+                return None
+            if seq > self._seq:
+                # 서버가 재시작돼서 seq 가 다시 시작됨
+                return None
+            events = [e for e in self._history if e["seq"] > seq]
+        return [e for e in events if zones is None or e["device"].get("zone_id") in zones]
+
+    def subscribe(self, zones: Optional[Iterable[int]] = None, maxsize: int = 64) -> DeviceSubscriber:
+        """이벤트 루프 안(async 엔드포인트)에서 호출"""
+        sub = DeviceSubscriber(
+            asyncio.Queue(maxsize=maxsize),
+            asyncio.get_running_loop(),
+            zones=frozenset(zones) if zones else None,
+        )
+        with self._lock:
+            self._subscribers.append(sub)
+        return sub
+
+    def unsubscribe(self, sub: DeviceSubscriber) -> None:
+        with self._lock:
+            if sub in self._subscribers:
+                self._subscribers.remove(sub)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+
+def is_loopback(host: Optional[str]) -> bool:
+    try:
+        return ipaddress.ip_address(host or "").is_loopback
+    except ValueError:
+        return False
+
+
+def event_source_allowed(client_host: Optional[str], token: Optional[str],
+                         expected: Optional[str] = DEVICE_EVENTS_TOKEN) -> bool:
+    """POST /device-events 를 받아도 되는지: 토큰을 설정했으면 토큰 일치, 아니면 loopback 만"""
+    if expected:
+        return token is not None and hmac.compare_digest(token.encode(), expected.encode())
+    return is_loopback(client_host)
+
+
+class HttpEventForwarder:
+    """
+    다른 프로세스(스피커)에서 생긴 변경을 API 서버 버스로 전달 (POST /device-events).
+    큐 + 백그라운드 스레드 하나라서 순서는 유지되고 호출한 쪽은 안 기다린다.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self._queue: "queue.Queue[List[Event]]" = queue.Queue(maxsize=maxsize)
+        self._thread = threading.Thread(target=self._run, name="device-events", daemon=True)
+        self._thread.start()
+
+    def __call__(self, events: List[Event]) -> None:
+        try:
+            self._queue.put_nowait(events)
+        except queue.Full:
+            print("[EVENTS] forward queue full, dropping", len(events), "events")
+
+    def _run(self) -> None:
+        from smarterspeaker.http_client import get_client
+
+        while True:
+            events = self._queue.get()
+            try:
+                headers = {EVENTS_TOKEN_HEADER: DEVICE_EVENTS_TOKEN} if DEVICE_EVENTS_TOKEN else None
+                get_client().post("/device-events", json={"events": events}, headers=headers).raise_for_status()
+            except Exception as e:
+                print("[EVENTS] forward error:", e)
+
+
+# API 프로세스의 버스 (api.py 의 WebSocket 이 구독)
+bus = DeviceEventBus()
+
+_publisher: Callable[[List[Event]], Any] = bus.publish
+
+
+def set_publisher(publisher: Callable[[List[Event]], Any]) -> None:
+    """이 프로세스의 변경을 어디로 보낼지 (기본: 이 프로세스 버스, 스피커: HttpEventForwarder)"""
+    global _publisher
+    _publisher = publisher
+
+
+def publish_device_changes(devices: Iterable[Dict[str, Any]], kind: str = "status",
+                           source: str = "api") -> None:
+    events = [device_event(d, kind, source) for d in devices]
+    if not events:
+        return
+    try:
+        _publisher(events)
+    except Exception as e:
+        # 이벤트 전달 실패로 기기 제어가 실패하면 안 됨
+        print("[EVENTS] publish error:", e)
@@ -0,0 +1,332 @@
+# src/smarterspeaker/device_service.py
+"""
+기기 제어 서비스 레이어.
+
+/device-control 엔드포인트(api.py)와 스피커 쪽 in-process 전송(smarthome_client.py)이
+같은 함수를 불러서, 기기 찾기 / 상태 매핑(map_status) / 커밋 동작이 항상 같다.
+
+기기 찾기는 메모리 인덱스(DeviceIndex)로:
+예전에는 매 호출마다 Zone.name ILIKE '%x%' OR display_name ILIKE '%x%' 조인 쿼리를 돌렸는데,
+앞에 % 가 붙은 패턴은 인덱스를 못 타서 존/기기가 늘수록 느려진다.
+존/기기 구성(id, 이름, 타입, 존)은 거의 안 바뀌니까 메모리에 들고 있고,
+상태 변경은 UPDATE devices SET status=... WHERE id IN (...) 한 번 (매핑된 상태별로)
+"""
+import json
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from . import models
+from .config import DEVICE_INDEX_MAX_AGE
+from .device_events import publish_device_changes
+
+
+class DeviceNotFound(LookupError):
+    """zone / device_type 에 맞는 기기가 없음 (HTTP 에서는 404)"""
+
+
+def map_status(device_type: str, action: str) -> str:
+    """음성/AI 액션 -> DB 에 저장할 기기 상태"""
+    if device_type in ["light", "tv", "ac"]:
+        if action in ["on", "turn_on", "켜", "켜줘"]:
+            return "on"
+        if action in ["off", "turn_off", "꺼", "꺼줘"]:
+            return "off"
+    if device_type == "door":
+        if action in ["lock", "잠가", "잠가줘"]:
+            return "locked"
+        if action in ["unlock", "열어", "열어줘"]:
+            return "unlocked"
+    return action
+
+
+def normalize_zone(zone: Optional[str]) -> str:
+    """존 별칭 비교용 (ILIKE 처럼 대소문자 무시)"""
+    return (zone or "").strip().lower()
+
+
+class DeviceIndex:
+    """
+    존 별칭(name / display_name) + 기기 타입 -> 기기 목록 메모리 인덱스.
+
+    - 존 검색은 예전 ILIKE '%x%' 와 같은 부분 문자열 매칭. 존 별칭들을 한 번 훑고
+      검색어별로 결과를 캐시 (존은 많아야 수십 개라 훑는 것도 싸다)
+    - 존/기기 CRUD 후에는 invalidate() -> 다음 resolve 때 다시 만듦
+    - 다른 프로세스에서 바뀐 건 invalidate 가 안 온다 (예: 스피커 in-process 전송은 API 서버의
+      CRUD 를 모름). 그래서 resolve 때마다 집계 쿼리 한 번 (signature: 존/기기 행 수, 최대 id,
+      기기 id*zone_id 합) 으로 추가/삭제/존 이동을 확인하고, 이름/타입 변경처럼 집계로 안 보이는 건
+      max_age 초 지나면 다시 만듦. UPDATE 된 행 수가 안 맞을 때도 한 번 다시 만들어서 재시도
+    """
+
+    def __init__(self, max_age: float = DEVICE_INDEX_MAX_AGE, clock=time.monotonic):
+        self._lock = threading.Lock()
+        self._built = False
+        self.max_age = max_age
+        self.clock = clock
+        self.built_at = 0.0
+        self.signature: Optional[Tuple] = None
+        self.generation = 0     # 다시 만들 때마다 +1
+        # device id -> {"id", "name", "type", "zone_id"} (status 는 안 들고 있음)
+        self.devices: Dict[int, Dict] = {}
+        self.zone_aliases: Dict[int, Tuple[str, ...]] = {}
+        self.by_zone_type: Dict[Tuple[int, str], List[int]] = {}
+        self.by_zone: Dict[int, List[int]] = {}
+        self.by_type: Dict[str, List[int]] = {}
+        self._zone_matches: Dict[str, Tuple[int, ...]] = {}
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._built = False
+
+    @staticmethod
+    def _signature(db: Session) -> Tuple:
+        """존/기기 구성 요약 (왕복 한 번). 기기 추가/삭제/존 이동, 존 추가/삭제면 값이 바뀜"""
+        device, zone = models.Device, models.Zone
+        row = db.query(
+            db.query(func.count(device.id)).scalar_subquery(),
+            db.query(func.max(device.id)).scalar_subquery(),
+            db.query(func.sum(device.id * device.zone_id)).scalar_subquery(),
+            db.query(func.count(zone.id)).scalar_subquery(),
+            db.query(func.max(zone.id)).scalar_subquery(),
+        ).one()
+        return tuple(row)
+
+    def _stale(self, db: Session) -> bool:
+        if not self._built or self.clock() - self.built_at >= self.max_age:
+            return True
+        return self._signature(db) != self.signature
+
+    def _build(self, db: Session) -> None:
+        # signature 를 먼저 읽음: 읽는 도중 바뀌면 다음 확인 때 다시 만들게
+        signature = self._signature(db)
+        zones = db.query(models.Zone.id, models.Zone.name, models.Zone.display_name).all()
+        rows = db.query(
+            models.Device.id, models.Device.name, models.Device.type, models.Device.zone_id
+        ).all()
+
+        zone_aliases = {
+            zone_id: tuple(a for a in (normalize_zone(name), normalize_zone(display_name)) if a)
+            for zone_id, name, display_name in zones
+        }
+
+        devices = {}
+        by_zone_type = defaultdict(list)
+        by_zone = defaultdict(list)
+        by_type = defaultdict(list)
+        for device_id, name, device_type, zone_id in rows:
+            devices[device_id] = {"id": device_id, "name": name, "type": device_type, "zone_id": zone_id}
+            by_zone_type[(zone_id, device_type)].append(device_id)
+            by_zone[zone_id].append(device_id)
+            by_type[device_type].append(device_id)
+
+        self.devices = devices
+        self.zone_aliases = zone_aliases
+        self.by_zone_type = dict(by_zone_type)
+        self.by_zone = dict(by_zone)
+        self.by_type = dict(by_type)
+        self._zone_matches = {}
+        self._built = True
+        self.signature = signature
+        self.built_at = self.clock()
+        self.generation += 1
+        print(f"[DEVICES] index built: {len(zones)} zones, {len(devices)} devices (gen {self.generation})")
+
+    def ensure(self, db: Session, rebuild: bool = False) -> None:
+        with self._lock:
+            if rebuild or not self._built:
+                self._build(db)
+
+    def match_zones(self, zone: str) -> Tuple[int, ...]:
+        """정규화된 존 문자열 -> 부분 문자열로 맞는 zone ids (ILIKE '%zone%' 와 같음)"""
+        matches = self._zone_matches.get(zone)
+        if matches is None:
+            matches = tuple(
+                zone_id for zone_id, aliases in self.zone_aliases.items()
+                if any(zone in alias for alias in aliases)
+            )
+            self._zone_matches[zone] = matches
+        return matches
+
+    def lookup(self, zone: Optional[str], device_type: Optional[str]) -> List[int]:
+        zone = normalize_zone(zone)
+        if not zone:
+            if device_type:
+                return list(self.by_type.get(device_type, ()))
+            return list(self.devices)
+
+        ids = []
+        for zone_id in self.match_zones(zone):
+            if device_type:
+                ids.extend(self.by_zone_type.get((zone_id, device_type), ()))
+            else:
+                ids.extend(self.by_zone.get(zone_id, ()))
+        return ids
+
+    def lookup_operation(self, op: Dict) -> List[int]:
+        """기기 조작 하나 (device_id 또는 zone / device_type) -> device ids"""
+        device_id = op.get("device_id")
+        if device_id is not None:
+            return [device_id] if device_id in self.devices else []
+        return self.lookup(op.get("zone"), op.get("device_type"))
+
+    def resolve_many(self, db: Session, operations: List[Dict]) -> List[List[Dict]]:
+        """
+        조작별 기기 정보 (id, name, type, zone_id) 목록.
+        찾은 게 있어도 인덱스가 DB 와 다르면 (signature / max_age) 다시 만든 뒤에 찾음.
+        그래도 못 찾은 조작이 있으면 (signature 로 안 보이는 존 이름 변경 등) 한 번 더 만들어서 재시도
+        """
+        with self._lock:
+            fresh = self._stale(db)
+            if fresh:
+                self._build(db)
+            matched = [self.lookup_operation(op) for op in operations]
+            if not fresh and not all(matched):
+                self._build(db)
+                matched = [self.lookup_operation(op) for op in operations]
+            return [[self.devices[i] for i in ids] for ids in matched]
+
+    def resolve(self, db: Session, zone: Optional[str], device_type: Optional[str]) -> List[Dict]:
+        """zone + device_type 에 맞는 기기 정보 목록"""
+        return self.resolve_many(db, [{"zone": zone, "device_type": device_type}])[0]
+
+    def stats(self) -> Dict:
+        return {
+            "generation": self.generation,
+            "age": self.clock() - self.built_at if self._built else None,
+            "zones": len(self.zone_aliases),
+            "devices": len(self.devices),
+            "cached_zone_queries": len(self._zone_matches),
+        }
+
+
+# 프로세스 전체에서 공유 (api.py 의 존/기기 CRUD 가 invalidate)
+device_index = DeviceIndex()
+
+
+def find_devices(db: Session, zone: Optional[str], device_type: Optional[str]) -> List[Dict]:
+    """zone + device_type 에 맞는 기기 정보 (id, name, type, zone_id) 목록 - DB 조회 없음"""
+    return device_index.resolve(db, zone, device_type)
+
+
+def describe_operation(op: Dict) -> str:
+    if op.get("device_id") is not None:
+        return f"device_id={op['device_id']}"
+    return f"zone={op.get('zone')}, device_type={op.get('device_type')}"
+
+
+def _apply_status(db: Session, results: List[Dict]) -> int:
+    """최종 상태별로 UPDATE ... WHERE id IN (...) 한 번씩. 바뀐 행 수 반환"""
+    groups: Dict[str, List[int]] = defaultdict(list)
+    for dev in results:
+        groups[dev["status"]].append(dev["id"])
+
+    updated = 0
+    for status, ids in groups.items():
+        updated += (
+            db.query(models.Device)
+            .filter(models.Device.id.in_(ids))
+            .update({models.Device.status: status}, synchronize_session=False)
+        )
+    return updated
+
+
+def apply_operations(db: Session, operations: List[Dict], source: str = "api",
+                     _retry: bool = True) -> List[Dict]:
+    """
+    기기 조작 목록을 한 트랜잭션으로 적용 (커밋 한 번).
+    조작은 {"device_id"} 또는 {"zone", "device_type"} + "action" dict.
+    같은 기기를 여러 조작이 건드리면 뒤의 것이 이긴다.
+    결과는 바뀐 기기 dict 목록 (schemas.DeviceOut 형태).
+    하나라도 맞는 기기가 없으면 아무것도 안 바꾸고 DeviceNotFound.
+    커밋 후 상태 변경 이벤트 발행 (source: "api" / "speaker" ...)
+    """
+    matched = device_index.resolve_many(db, operations)
+
+    final: Dict[int, Dict] = {}
+    for op, devices in zip(operations, matched):
+        if not devices:
+            raise DeviceNotFound(f"No matching devices found ({describe_operation(op)})")
+        action = op["action"].lower()
+        for dev in devices:
+            final[dev["id"]] = {**dev, "status": map_status(dev["type"], action)}
+
+    results = list(final.values())
+    if _apply_status(db, results) != len(results):
+        # 다른 프로세스에서 기기가 지워짐 -> 인덱스 다시 만들고 한 번 더
+        db.rollback()
+        if not _retry:
+            raise DeviceNotFound("Devices changed while applying operations")
+        device_index.ensure(db, rebuild=True)
+        return apply_operations(db, operations, source, _retry=False)
+
+    db.commit()
+    publish_device_changes(results, source=source)
+    return results
+
+
+def control_devices(
+    db: Session,
+    zone: Optional[str],
+    device_type: Optional[str],
+    action: str,
+    source: str = "api",
+) -> List[Dict]:
+    """
+    zone + device_type 에 맞는 기기들의 상태를 action 에 맞게 변경하고 커밋.
+    결과는 /device-control 응답과 같은 기기 dict 목록 (schemas.DeviceOut 형태).
+    맞는 기기가 없으면 DeviceNotFound.
+    """
+    try:
+        return apply_operations(db, [{"zone": zone, "device_type": device_type, "action": action}], source)
+    except DeviceNotFound:
+        raise DeviceNotFound("No matching devices found")
+
+
+# =======================================================
+# 장면(Scene): 이름 붙인 기기 조작 묶음 (예: "good night")
+# =======================================================
+
+class SceneNotFound(LookupError):
+    """이름에 맞는 장면이 없음 (HTTP 에서는 404)"""
+
+
+def scene_to_dict(scene: models.Scene) -> Dict:
+    """schemas.SceneOut 형태"""
+    return {
+        "id": scene.id,
+        "name": scene.name,
+        "display_name": scene.display_name,
+        "operations": json.loads(scene.actions_json),
+    }
+
+
+def list_scenes(db: Session) -> List[Dict]:
+    return [scene_to_dict(s) for s in db.query(models.Scene).order_by(models.Scene.id).all()]
+
+
+def find_scene(db: Session, name: str) -> Optional[models.Scene]:
+    """name / display_name 으로 장면 찾기 (대소문자 무시)"""
+    key = normalize_zone(name)
+    return (
+        db.query(models.Scene)
+        .filter(
+            or_(
+                func.lower(models.Scene.name) == key,
+                func.lower(models.Scene.display_name) == key,
+            )
+        )
+        .first()
+    )
+
+
+def run_scene(db: Session, name: str, source: str = "api") -> List[Dict]:
+    """장면의 조작들을 apply_operations 한 번으로 (왕복 / 커밋 한 번)"""
+    scene = find_scene(db, name)
+    if scene is None:
+        raise SceneNotFound(f"Scene not found: {name}")
+    print(f"[SCENE] run '{scene.name}'")
+    return apply_operations(db, json.loads(scene.actions_json), source)
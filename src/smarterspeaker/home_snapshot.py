@@ -0,0 +1,82 @@
+# src/smarterspeaker/home_snapshot.py
+"""
+대시보드용 집 전체 스냅샷 (/home/snapshot): 존 목록 + 존별 기기 목록을 한 번에.
+
+예전에는 대시보드가 /zones, /devices-db 를 따로 불러서 클라이언트에서 합쳤다.
+- 조회: Zone + devices 를 joinedload 로 쿼리 한 번 (존마다 기기 lazy load 안 함)
+- 직렬화한 bytes 를 state_version 버전(존 / 기기)별로 캐시해서, 안 바뀌었으면 DB 조회도 직렬화도 없음
+- JSON 인코딩은 orjson 이 있으면 orjson, 없으면 표준 json
+"""
+import json
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session, joinedload
+
+from . import models, schemas
+from .state_version import StateVersion
+
+try:
+    import orjson
+except ImportError:  # 선택 의존성
+    orjson = None
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def build_snapshot(db: Session) -> Dict[str, Any]:
+    zones = (
+        db.query(models.Zone)
+        .options(joinedload(models.Zone.devices))
+        .order_by(models.Zone.order_index, models.Zone.id)
+        .all()
+    )
+    return {
+        "zones": [
+            {
+                **schemas.ZoneOut.model_validate(z).model_dump(),
+                "devices": [
+                    schemas.DeviceOut.model_validate(d).model_dump()
+                    for d in sorted(z.devices, key=lambda d: d.id)
+                ],
+            }
+            for z in zones
+        ]
+    }
+
+
+class SnapshotCache:
+    def __init__(self, state: StateVersion):
+        self.state = state
+        self._lock = threading.Lock()
+        self._key: Optional[Tuple[int, int]] = None
+        self._body = b""
+        self.builds = 0
+
+    def key(self) -> Tuple[int, int]:
+        return self.state.table_version("zones"), self.state.table_version("devices")
+
+    def etag(self, key: Optional[Tuple[int, int]] = None) -> str:
+        zones, devices = key or self.key()
+        return f'W/"home-{zones}-{devices}"'
+
+    def get(self, db: Session) -> Tuple[bytes, Tuple[int, int]]:
+        """(JSON bytes, 버전 키). 버전이 그대로면 캐시된 bytes"""
+        # 조회 전에 버전을 읽어둠: 조회 중에 바뀌면 다음 요청에서 다시 만듦
+        key = self.key()
+        with self._lock:
+            if key == self._key:
+                return self._body, key
+
+        snapshot = build_snapshot(db)
+        snapshot["version"] = max(key)
+        body = dumps(snapshot)
+        with self._lock:
+            if self._key is None or max(key) >= max(self._key):
+                self._key, self._body = key, body
+            self.builds += 1
+        return body, key
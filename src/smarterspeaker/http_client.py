@@ -0,0 +1,262 @@
+# src/smarterspeaker/http_client.py
+"""
+스피커 -> FastAPI 백엔드 HTTP 호출 공용 클라이언트.
+
+예전에는 호출마다 requests.post 를 새로 불러서 명령 하나당 TCP 연결을 새로 맺었다.
+
+- requests.Session + HTTPAdapter 풀: keep-alive 로 연결 재사용
+  (uvicorn 은 평문 HTTP/2 를 안 받고 requests 는 pipelining 을 안 해서, 연결 재사용까지만)
+- 재시도: 연결을 못 맺은 실패 (ConnectTimeout / NewConnectionError) 는 항상,
+  그 외 연결 에러 (끊김/리셋) / 읽기 타임아웃 / 502·503·504 는 idempotent=True 인 호출만
+  (요청이 서버에 이미 갔을 수 있어서 POST 를 다시 보내면 두 번 실행될 수 있음)
+  (지수 backoff + full jitter)
+- 서킷 브레이커: 연속 실패가 쌓이면 잠깐 바로 실패 처리해서 명령 처리가 타임아웃에 안 묶이게
+- 엔드포인트별 지연시간 히스토그램 (stats())
+"""
+import random
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from smarterspeaker.config import (
+    BACKEND_URL,
+    BACKEND_TIMEOUT,
+    BACKEND_CONNECT_TIMEOUT,
+    BACKEND_RETRIES,
+)
+
+# 지연시간 히스토그램 구간 (ms), 마지막은 +inf
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+RETRY_STATUS = (502, 503, 504)
+
+
+class BackendUnavailable(requests.ConnectionError):
+    """서킷이 열려 있어서 요청을 보내지 않음"""
+
+
+def connect_failed(error: requests.RequestException) -> bool:
+    """연결 단계에서 실패 (요청 바이트가 서버로 안 나감) -> 어떤 메서드든 재시도해도 안전"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    # requests 는 urllib3 MaxRetryError(reason=NewConnectionError) 로 감싸서 줌
+    reason = error.args[0] if error.args else None
+    reason = getattr(reason, "reason", reason)
+    return isinstance(reason, NewConnectionError)
+
+
+class LatencyHistogram:
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.errors = 0
+        self.rejected = 0   # 서킷이 열려 있어서 안 보낸 요청
+
+    def observe(self, ms: float, ok: bool = True) -> None:
+        self.counts[bisect_left(self.buckets, ms)] += 1
+        self.total += 1
+        self.sum_ms += ms
+        if not ok:
+            self.errors += 1
+
+    def percentile(self, p: float) -> Optional[float]:
+        """구간 상한 기준 대략적인 p 분위수 (ms). 마지막 구간이면 None (= 최대 구간 초과)"""
+        if not self.total:
+            return None
+        target = p * self.total
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= target:
+                return self.buckets[i] if i < len(self.buckets) else None
+        return None
+
+    def summary(self) -> Dict:
+        return {
+            "count": self.total,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "avg_ms": self.sum_ms / self.total if self.total else 0.0,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "buckets": dict(zip([f"<={b}" for b in self.buckets] + ["+inf"], self.counts)),
+        }
+
+
+class CircuitBreaker:
+    """
+    closed: 정상 / open: reset_timeout 동안 바로 실패 /
+    half-open: 그 뒤 요청 하나만 시험으로 보내서 성공하면 closed
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 10.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record(self, ok: bool) -> None:
+        with self._lock:
+            self._probing = False
+            if ok:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                self.opened_at = self.clock()
+
+
+class BackendClient:
+    def __init__(
+        self,
+        base_url: str = BACKEND_URL,
+        timeout: float = BACKEND_TIMEOUT,
+        connect_timeout: float = BACKEND_CONNECT_TIMEOUT,
+        retries: int = BACKEND_RETRIES,
+        backoff_base: float = 0.05,
+        backoff_cap: float = 0.5,
+        pool_size: int = 8,
+        breaker: CircuitBreaker = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.breaker = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        # 재시도는 아래에서 직접 (urllib3 재시도는 끔)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def _histogram(self, key: str) -> LatencyHistogram:
+        with self._lock:
+            if key not in self.histograms:
+                self.histograms[key] = LatencyHistogram()
+            return self.histograms[key]
+
+    def _backoff(self, attempt: int) -> float:
+        # full jitter: 0 ~ min(cap, base * 2^attempt)
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        timeout: Optional[float] = None,
+        idempotent: bool = False,
+        **kwargs,
+    ) -> requests.Response:
+        """
+        백엔드 요청. 실패하면 requests 예외 (서킷이 열려 있으면 BackendUnavailable).
+        연결을 못 맺은 실패만 항상 재시도, idempotent=True 면 끊김 / 읽기 타임아웃 / 502·503·504 도.
+        """
+        hist = self._histogram(f"{method} {path}")
+        if not self.breaker.allow():
+            hist.rejected += 1
+            raise BackendUnavailable(f"backend circuit open ({self.base_url})")
+
+        url = f"{self.base_url}{path}"
+        attempt = 0
+        ok = False
+
+        # allow() 뒤에는 어떤 경로로 나가든 record() 를 한 번 불러야 함 (안 그러면 half-open 시험 요청이 안 끝남)
+        try:
+            while True:
+                start = time.perf_counter()
+                retryable = False
+                try:
+                    res = self.session.request(
+                        method, url, timeout=(self.connect_timeout, timeout or self.timeout), **kwargs
+                    )
+                except requests.ConnectionError as e:
+                    # ConnectTimeout 포함. 연결 뒤 끊긴 경우는 서버가 이미 처리했을 수도 있음
+                    error, retryable = e, idempotent or connect_failed(e)
+                except requests.Timeout as e:
+                    error, retryable = e, idempotent
+                except requests.RequestException as e:
+                    # ChunkedEncodingError / TooManyRedirects 등: 실패로만 기록하고 재시도 안 함
+                    error = e
+                else:
+                    elapsed = (time.perf_counter() - start) * 1000
+                    server_error = res.status_code >= 500
+                    hist.observe(elapsed, ok=not server_error)
+                    if not (idempotent and res.status_code in RETRY_STATUS and attempt < self.retries):
+                        ok = not server_error
+                        return res
+                    res.close()
+                    error, retryable = None, True
+
+                if error is not None:
+                    hist.observe((time.perf_counter() - start) * 1000, ok=False)
+
+                if not retryable or attempt >= self.retries:
+                    raise error
+
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+        finally:
+            self.breaker.record(ok)
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("idempotent", True)
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            endpoints = {k: h.summary() for k, h in self.histograms.items()}
+        return {"breaker": self.breaker.state, "endpoints": endpoints}
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_client: Optional[BackendClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> BackendClient:
+    """프로세스 전체에서 공유하는 BackendClient (연결 풀 공유)"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = BackendClient()
+        return _client
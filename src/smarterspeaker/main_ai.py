@@ -1,30 +1,52 @@
 from smarterspeaker.models import User, Zone, Device, UserVoiceProfile
 import tempfile
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, defer
 from sqlalchemy import create_engine
 from smarterspeaker.models import User, Zone, Device  # SpeakerProfile 제거 (현재 미사용)
 from smarterspeaker.db import DATABASE_URL  # DB URL
 
 from .speaker.voice_recorder import VoiceRecorder
-from .smarthome_client import control_device
+from .smarthome_client import control_device, find_scene_in_text, make_transport, run_scene, set_transport
+from .http_client import get_client
+from .device_events import HttpEventForwarder, publish_device_changes, set_publisher
 from .speaker.audio_to_text import AudioToText
+from .speaker.vocabulary import Vocabulary
 from .speaker.wake_word_activation import WakeWordActivation
+from .speaker.keyword_spotter import KeywordSpotter
+from .speaker.vad import CommandEndpointer
+from .speaker.streaming_stt import StreamingWorker
 from .speaker.speaker_verification import SpeakerVerifier
+from .speaker.embedding_index import EMBEDDING_MODEL, unpack_embedding
+from .speaker.audio_buffers import VoiceBlobCache, blob_digest
 from .ai.gemini_ai import GeminiAI
+from .ai.response_cache import ResponseCache
 from .ai.permission_manager import PermissionManager
-from .config import THRESHOLD
+from .ai.intent_router import IntentRouter, extract_device_slots, local_reply
+from .config import (
+    THRESHOLD,
+    SPEAKER_REFRESH_SECONDS,
+    VOICE_BLOB_CACHE_DIR,
+    WAKE_WORDS,
+    GEMINI_SINGLE_PASS,
+    DEVICE_ID,
+    VOICE_SEARCH_TIMEOUT,
+    STREAMING_STT,
+)
 
 from playsound import playsound
 from dotenv import load_dotenv
-from typing import Dict
+from typing import Dict, Optional
+from contextlib import closing
 
-import shutil
+import asyncio
 import json
-import requests
+import time
 import os
 
 BASE_DIR = os.path.dirname(__file__)
-VOICE_DB_DIR = os.path.join(BASE_DIR, "voices_from_db")
+
+# FastAPI 백엔드 공용 클라이언트 (keep-alive 풀 / 재시도 / 서킷 브레이커, smarthome_client 와 공유)
+backend = get_client()
 
 # 환경 변수 로드
 load_dotenv()
@@ -36,75 +58,103 @@ load_dotenv()
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 기기 제어: API 서버가 같은 호스트면 이 세션으로 device_service 를 직접 호출 (HTTP 왕복 없음)
+set_transport(make_transport(session_factory=SessionLocal))
+
+# 스피커가 DB 에 직접 쓴 기기 상태 변경은 API 서버 이벤트 버스로 전달 (대시보드 WebSocket push)
+set_publisher(HttpEventForwarder())
+
 
 def get_db():
     """새 SQLAlchemy 세션을 반환. 호출한 쪽에서 db.close() 해줘야 함."""
     return SessionLocal()
 
 
+def device_dict(device: Device) -> Dict:
+    """상태 변경 이벤트용 (schemas.DeviceOut 형태)"""
+    return {
+        "id": device.id,
+        "name": device.name,
+        "type": device.type,
+        "zone_id": device.zone_id,
+        "status": device.status,
+    }
+
+
+def load_stt_vocabulary():
+    """STT initial_prompt 용 (존 이름들, 기기 이름/타입들, 영화 제목들)"""
+    from .movies import load_movies
+
+    db = get_db()
+    try:
+        zones = [name for row in db.query(Zone.name, Zone.display_name) for name in row]
+        devices = [name for row in db.query(Device.name, Device.type) for name in row]
+    finally:
+        db.close()
+    titles = [m.get("title") for m in load_movies()]
+    return zones, devices, titles
+
+
 # =========================================================
 #  화자 인증용 사용자 정보 로드 (DB 기반)
 # =========================================================
 
-def load_speaker_users():
+def load_speaker_users(cache: Optional[VoiceBlobCache] = None):
     """
-    DB user_voice_profiles에서 음성 blob을 읽어와
+    DB user_voice_profiles에서 음성 프로필을 읽어와
     SpeakerVerifier.identify_speaker()가 기대하는 users 딕셔너리 형태로 변환한다.
+    디스크에는 아무것도 쓰지 않고 전부 메모리에서 넘긴다.
 
     최종 반환 구조 예시 (email 기준):
 
     {
       "daniel@gmail.com": {
-        "voice_dir": "voices_from_db/daniel_at_gmail_com"
+        "embedding": np.ndarray (192,),     # 업로드 때 계산된 임베딩이 있으면
+        "signature": b"...",
+      },
+      "mom@gmail.com": {
+        "voice_blob": memoryview(...),      # 아직 backfill 안 된 프로필
+        "signature": "<sha256>",
       },
       ...
     }
 
-    여기서 voice_dir는 smarterspeaker/ 기준의 **상대 경로**이다.
-    SpeakerVerifier.identify_speaker() 쪽에서는 이 path를 받아
-    그 폴더 안의 모든 wav 파일을 이용해 화자 인증을 수행한다.
+    임베딩이 있는 프로필은 voice_blob 을 아예 읽지 않는다 (오디오 디코딩 없음).
+    voice_blob 은 memoryview 로 넘겨서 복사 없이 NumPy 로 바로 디코딩된다.
+    cache(VOICE_BLOB_CACHE_DIR)가 있으면 blob 을 해시 이름으로 한 번만 저장한다.
     """
-
-    # 🔥 1) 디렉토리 초기화: 예전에 남아 있던 유저 폴더들 제거
-    voices_root = os.path.join(BASE_DIR, "voices_from_db")
-    if os.path.exists(voices_root):
-        shutil.rmtree(voices_root)
-    os.makedirs(voices_root, exist_ok=True)
-
-    # 🔥 2) DB에서 현재 등록된 voice profile만 다시 채움
     db = get_db()
     speakers = {}
 
     try:
-        profiles = db.query(UserVoiceProfile).join(User).all()
+        # voice_blob 은 임베딩이 없는 프로필에서만 lazy 로드
+        profiles = (
+            db.query(UserVoiceProfile)
+            .join(User)
+            .options(defer(UserVoiceProfile.voice_blob))
+            .all()
+        )
         if not profiles:
             print("[WARN] No UserVoiceProfile rows found in DB.")
-            return speakers
 
         for p in profiles:
             email = p.user.email
 
-            # 이메일을 폴더명으로 쓸 수 있게 sanitize
-            safe_name = (
-                email.replace("@", "_at_")
-                .replace(":", "_")
-                .replace("/", "_")
-            )
-            user_folder = os.path.join(voices_root, safe_name)
-            os.makedirs(user_folder, exist_ok=True)
-
-            # 각 유저마다 폴더 안에 enroll.wav 로 음성 저장
-            file_path = os.path.join(user_folder, "enroll.wav")
-            with open(file_path, "wb") as f:
-                f.write(p.voice_blob)
+            if p.embedding is not None and p.embedding_model == EMBEDDING_MODEL:
+                speakers[email] = {
+                    "embedding": unpack_embedding(p.embedding),
+                    "signature": p.embedding,
+                }
+                continue
 
-            # SpeakerVerifier가 기대하는 구조:
-            # dict -> info.get("voice_dir") 로 경로를 읽음
-            # 여기서는 BASE_DIR 기준 상대 경로를 넣어준다.
-            rel_user_folder = os.path.relpath(user_folder, BASE_DIR)
+            blob = memoryview(p.voice_blob)
+            digest = blob_digest(blob)
+            if cache is not None:
+                cache.store_blob(blob, digest)  # 같은 해시면 다시 쓰지 않음
 
             speakers[email] = {
-                "voice_dir": rel_user_folder
+                "voice_blob": blob,
+                "signature": digest,
             }
 
         print("[DEBUG] Loaded speaker users from DB:", list(speakers.keys()))
@@ -148,7 +198,9 @@ def update_device_status_db(device_id: int, new_status: str):
             print(f"❗ Device not found in DB: id={device_id}")
             return
         device.status = new_status
+        changed = device_dict(device)   # 커밋하면 속성이 만료돼서 미리 꺼내둠
         db.commit()
+        publish_device_changes([changed], source="speaker")
         print(f"✅ Device updated in DB: id={device_id}, status={new_status}")
     except Exception as e:
         print("❗ Error updating device in DB:", e)
@@ -167,74 +219,54 @@ def try_handle_smart_home(text: str) -> bool:
     - zone
     - device_type
     - action
-    을 간단한 규칙으로 추출한 뒤,
+    을 간단한 규칙으로 추출한 뒤 (ai.intent_router.extract_device_slots),
     세 개가 다 결정되면 handle_device_command를 호출한다.
 
     처리했으면 True, 아니면 False 반환.
     """
-    t = text.strip()
-    t_lower = t.lower()
-
-    zone = None
-    device_type = None
-    action = None
-
-    # ===== 1) 존 추출 =====
-    # 거실 / 침실
-    if "거실" in t or "living room" in t_lower:
-        zone = "Living"
-    elif "침실" in t or "안방" in t or "bedroom" in t_lower:
-        zone = "Bedroom"
-    # 현관 / 문 / front door
-    elif "현관" in t or "문" in t or "door" in t_lower or "front door" in t_lower:
-        zone = "Entrance"   # DB에서 현관 문이 속한 존 이름에 맞춰서
-
-    # ===== 2) 기기 타입 추출 =====
-    if "불" in t or "전등" in t or "light" in t_lower:
-        device_type = "light"
-    elif "에어컨" in t or "aircon" in t_lower or "ac" in t_lower:
-        device_type = "ac"
-    elif "티비" in t or "tv" in t_lower:
-        device_type = "tv"
-    elif "문" in t or "door" in t_lower or "front door" in t_lower:
-        device_type = "door"
-
-    # ===== 3) 액션 추출 =====
-    if "켜" in t or "on" in t_lower:
-        action = "on"
-    elif "꺼" in t or "off" in t_lower:
-        action = "off"
-    elif "잠가" in t or "lock" in t_lower:
-        action = "lock"
-    elif "열어" in t or "unlock" in t_lower or "open" in t_lower:
-        action = "unlock"
-
-    # ===== 4) 최소 조건 체크 =====
-    if not (device_type and action):
-        # 기기 타입이나 액션을 못 찾으면 스마트홈 명령이 아님
+    slots = extract_device_slots(text)
+    if slots is None:
         return False
 
-    # zone 이 빠진 경우 기본값 적용 (에어컨/문 같이 global 장치용)
-    if zone is None:
-        if device_type == "ac":
-            zone = "Living"      # 기본 에어컨 존
-        elif device_type == "door":
-            zone = "Entrance"    # 기본 현관 문 존
-
-    # 그래도 zone이 없으면 포기
-    if zone is None:
-        return False
+    zone, device_type, action = slots
 
-    # ===== 5) 실제 제어 호출 =====
+    # ===== 실제 제어 호출 =====
     print(f"[SMART_HOME] zone={zone}, type={device_type}, action={action}")
     handle_device_command(zone, device_type, action)
 
     return True
 
+def try_handle_scene(user: str, text: str, permission_manager) -> bool:
+    """
+    문장에 DB 에 등록된 장면 이름("good night" 등)이 있으면 그 장면을 한 번에 실행.
+    처리했으면 True, 아니면 False 반환.
+    """
+    scene = find_scene_in_text(text)
+    if scene is None:
+        return False
+
+    # 장면에 들어 있는 기기 타입 중 하나라도 막혀 있으면 거부
+    device_types = " ".join(op.get("device_type") or "" for op in scene["operations"])
+    allowed, permission_message = permission_manager.check_permission(
+        user, "smart_home", {"device": device_types}, text
+    )
+    if not allowed:
+        print(f"🚫 Permission denied: {permission_message}")
+        tts_speak(permission_message)
+        return True
+
+    print(f"[SCENE] {scene['name']} ({len(scene['operations'])} operations)")
+    result = run_scene(scene["name"])
+    print(f"[SPEAKER] scene result: {result}")
+    if result is None:
+        tts_speak("Sorry, I couldn't run that scene.")
+    return True
+
+
 def handle_device_command(zone: str, device_type: str, action: str) -> None:
     """
     zone / device_type / action 값을 받아서
-    실제로 FastAPI 서버에 /device-control 요청을 보내는 함수.
+    기기 제어 전송(smarthome_client: 같은 호스트면 in-process, 아니면 HTTP)으로 보내는 함수.
     """
     print(f"[SPEAKER] control request: zone={zone}, type={device_type}, action={action}")
     result = control_device(zone, device_type, action)
@@ -245,78 +277,254 @@ def handle_device_command(zone: str, device_type: str, action: str) -> None:
 # =========================================================
 
 def main():
-    # 🔹 DB 기반 화자 인증용 users 딕셔너리 로드
-    speaker_users = load_speaker_users()
+    # 🔹 DB 기반 화자 인증용 users 딕셔너리 로드 (디스크에 wav 를 풀지 않음)
+    voice_cache = VoiceBlobCache(VOICE_BLOB_CACHE_DIR) if VOICE_BLOB_CACHE_DIR else None
+    speaker_users = load_speaker_users(voice_cache)
     if not speaker_users:
         print("[WARN] No speaker users loaded from DB. Voice authentication will always fail until a profile is registered.")
 
-    # 🔹 SpeakerVerifier는 ECAPA 모델을 로드하므로 한 번만 생성해서 재사용
-    speaker_verifier = SpeakerVerifier()
+    # 🔹 SpeakerVerifier는 ECAPA 인코더(이 프로세스에 하나, 또는 모델 호스트)를 쓰므로 한 번만 생성해서 재사용
+    #    (등록 음성 임베딩도 verifier 안의 인덱스에 캐시됨)
+    speaker_verifier = SpeakerVerifier(cache=voice_cache)
+    speaker_verifier.refresh_index(speaker_users)
+    speaker_users_loaded_at = time.monotonic()
 
     # Initialize Gemini AI
-    gemini = GeminiAI(api_key=os.getenv("GEMINI_API_KEY"))
+    gemini = GeminiAI(api_key=os.getenv("GEMINI_API_KEY"), single_pass=GEMINI_SINGLE_PASS,
+                      cache=ResponseCache())
 
     # Initialize permission manager
     permission_manager = PermissionManager()
 
     # Initialize AudioToText and VoiceRecorder objects once (important!)
-    audio_processor = AudioToText()
+    audio_processor = AudioToText(vocabulary=Vocabulary(load_stt_vocabulary))
     voice_recorder = VoiceRecorder()
 
-    while True:
-        # 1. Voice recording
-        recorded_file = voice_recorder.record()
-        wake = WakeWordActivation(audio_processor, "Hello")
+    # 🔹 wake word 감지기도 한 번만 생성 (루프마다 새로 만들지 않음)
+    #    - KeywordSpotter: 10ms hop 스트리밍 + MFCC 템플릿 매칭 (Whisper 안 씀)
+    #    - WakeWordActivation: 템플릿으로 확정 못 한 후보만 Whisper 로 확인
+    spotter = KeywordSpotter(WAKE_WORDS)
+    wake = WakeWordActivation(audio_processor, WAKE_WORDS)
+
+    print(f"👂 Listening for wake words: {WAKE_WORDS}")
+    with closing(voice_recorder.stream()) as mic_frames:
+        for frames in mic_frames:
+            # 1. Streaming wake word detection
+            hit = spotter.push(frames)
+            if hit is None:
+                continue
+
+            # 2. Wake word verification (후보일 때만 Whisper 사용)
+            if hit.needs_confirmation:
+                activated = wake.is_activated(hit.audio)
+                spotter.confirmation_result(activated)
+                if not activated:
+                    continue
+
+            # 🔹 프로필이 추가/변경됐을 수 있으니 주기적으로 다시 읽음
+            #    (바뀐 유저만 인덱스에서 재인코딩됨)
+            if time.monotonic() - speaker_users_loaded_at > SPEAKER_REFRESH_SECONDS:
+                speaker_users = load_speaker_users(voice_cache)
+                speaker_users_loaded_at = time.monotonic()
 
-        # 2. Wake word verification
-        if wake.is_activated("voice_sample.wav"):
             # 3. Speaker authentication (DB 기반 users 사용)
+            #    wake word 직전 RECORD_SECONDS 구간을 파일 없이 그대로 ECAPA 비교
             user = speaker_verifier.identify_speaker(
-                recorded_file, speaker_users, THRESHOLD
+                hit.audio, speaker_users, THRESHOLD
             )
-
             if user is not None:
-                # user 는 화자 인증 결과 (이메일) 이라고 가정
-                user_email = user
-
-                # 기본 display name 은 이메일 앞부분
-                display_name = user_email.split("@")[0]
-
-                # DB 에서 진짜 이름 가져오기 시도
-                db = get_db()
-                try:
-                    db_user = db.query(User).filter(User.email == user_email).first()
-                    if db_user and db_user.name:
-                        display_name = db_user.name
-                except Exception as e:
-                    print(f"[WARN] Failed to load name for {user_email}: {e}")
-                finally:
-                    db.close()
-
-                print(f"✅ Authentication successful: {user_email} ({display_name})")
-
-                # 이름 기반 인사
-                greeting = f"Hello {display_name}, what can I help you with today?"
-                print(f"🤖 {greeting}")
-                tts_speak(greeting)
-
-                # Enter command mode (내부 로직은 여전히 이메일 기준)
-                print(f"\n🎯 {display_name}'s AI Assistant Mode")
-                command_mode(
-                    user_email,
-                    voice_recorder,
-                    audio_processor,
-                    gemini,
-                    permission_manager,
-                )
                 break
 
+            spotter.reset()
+
+    # user 는 화자 인증 결과 (이메일) 이라고 가정
+    user_email = user
+
+    # 기본 display name 은 이메일 앞부분
+    display_name = user_email.split("@")[0]
+
+    # DB 에서 진짜 이름 가져오기 시도
+    db = get_db()
+    try:
+        db_user = db.query(User).filter(User.email == user_email).first()
+        if db_user and db_user.name:
+            display_name = db_user.name
+    except Exception as e:
+        print(f"[WARN] Failed to load name for {user_email}: {e}")
+    finally:
+        db.close()
+
+    print(f"✅ Authentication successful: {user_email} ({display_name})")
+
+    # 이름 기반 인사
+    greeting = f"Hello {display_name}, what can I help you with today?"
+    print(f"🤖 {greeting}")
+    tts_speak(greeting)
+
+    # Enter command mode (내부 로직은 여전히 이메일 기준)
+    print(f"\n🎯 {display_name}'s AI Assistant Mode")
+    command_mode(
+        user_email,
+        voice_recorder,
+        audio_processor,
+        gemini,
+        permission_manager,
+    )
+
+
+
+def request_voice_search(command_text: str, user: str, intent: Optional[str] = None) -> Optional[Dict]:
+    """
+    /voice-search 로 영화 검색 + 나이 제한 체크.
+    나이 제한에 걸리면 여기서 TTS 로 안내까지 함.
+    연결 에러면 None, 그 외에는 API 응답(dict, 실패 시 빈 dict) 반환.
+    """
+    try:
+        print("🌐 Sending recognized text to movie search API...")
+        resp = backend.post(
+            "/voice-search",
+            # 화자 / 기기 이름 / 로컬 라우터 의도도 같이 전송 (의도는 퍼지 결과 나이 제한 판단용)
+            json={"text": command_text, "user": user, "device": DEVICE_ID, "intent": intent},
+            timeout=VOICE_SEARCH_TIMEOUT,
+        )
+
+        if not resp.ok:
+            print(f"⚠️ Movie API returned status {resp.status_code}")
+            return {}
+
+        api_data = resp.json()
+        allowed = api_data.get("allowed", True)
+        reason = api_data.get("reason")
+
+        # 🔒 나이 제한 걸린 경우
+        if not allowed:
+            print("🚫 Movie blocked by age restriction:", reason)
+            if reason:
+                tts_speak(reason)
+            else:
+                tts_speak("Sorry, this movie is restricted due to your age.")
+        return api_data
+    except Exception as e:
+        print(f"⚠️ Movie API connection error: {e}")
+        return None
+
+
+async def search_and_process(gemini, user: str, command_text: str, intent: Optional[str] = None):
+    """
+    /voice-search(스레드) 와 Gemini(process_command_async) 를 동시에 시작.
+    검색이 연결 에러(None)거나 나이 제한에 걸리면 Gemini 태스크는 취소하고 결과를 버린다.
+    Gemini 응답은 commit=False 로 받아서, 나이 제한을 통과한 뒤에만 캐시 / 대화 history 에 확정한다.
+    (movie, result) 반환. result 는 Gemini 를 안 쓴 경우 None
+    """
+    answer = asyncio.create_task(gemini.process_command_async(user, command_text, commit=False))
+    try:
+        movie = await asyncio.to_thread(request_voice_search, command_text, user, intent)
+    except BaseException:
+        answer.cancel()
+        gemini.discard(user)
+        raise
+    if movie is None or not movie.get("allowed", True):
+        answer.cancel()
+        await asyncio.gather(answer, return_exceptions=True)
+        gemini.discard(user)
+        return movie, None
+    result = await answer
+    gemini.commit(user, command_text, result)
+    return movie, result
+
+
+def handle_local_intent(user: str, command_text: str, route, permission_manager) -> bool:
+    """
+    IntentRouter 가 확신한 명령을 Gemini 없이 처리. 처리했으면 True.
+    """
+    if route.intent == "smart_home":
+        slots = route.slots
+        allowed, permission_message = permission_manager.check_permission(
+            user, "smart_home", {"device": slots["device_type"]}, command_text
+        )
+        if not allowed:
+            print(f"🚫 Permission denied: {permission_message}")
+            tts_speak(permission_message)
+            return True
+
+        print(f"[SMART_HOME] zone={slots['zone']}, type={slots['device_type']}, action={slots['action']}")
+        handle_device_command(slots["zone"], slots["device_type"], slots["action"])
+        return True
+
+    if route.intent == "movie_search":
+        movie = request_voice_search(command_text, user, route.intent)
+        # total: 일치한 전체 수 (count 는 돌려받은 top-k 길이), 예전 백엔드면 count
+        found = (movie or {}).get("total") or (movie or {}).get("count")
+        if movie and movie.get("allowed", True) and found:
+            tts_speak(f"Found {found} result(s) for {movie.get('query') or command_text}.")
+        elif movie is not None and movie.get("allowed", True):
+            tts_speak("Sorry, I couldn't find that movie.")
+        return True
+
+    reply = local_reply(route.intent, command_text)
+    if reply:
+        print(f"🤖 Local response: {reply}")
+        tts_speak(reply)
+        return True
+
+    return False
+
+
+def listen_command(endpointer, voice_recorder, audio_processor, intent_router):
+    """
+    명령 하나 듣고 (텍스트, 라우팅 결과) 반환. 말이 없으면 (None, None).
+
+    STREAMING_STT 면 말하는 중에 오디오를 스트리밍 STT 워커(백그라운드 디코딩)에 넣어서 부분 인식 결과를 내고,
+    확정된 부분 텍스트로 미리 라우팅해둔다 (최종 텍스트가 같으면 그 결과를 그대로 씀).
+    말이 끝난 뒤에는 아직 확정 안 된 꼬리 구간만 디코딩하면 된다.
+    """
+    if not STREAMING_STT:
+        command_audio = endpointer.capture(voice_recorder)
+        if command_audio is None:
+            return None, None
+        print("🔄 Converting speech to text...")
+        command_text = audio_processor.transcribe(command_audio)
+        return command_text, intent_router.route(command_text)
+
+    early_routes = {}
+
+    def on_partial(hyp):
+        # 디코딩 워커 스레드에서 불림 (캡처 루프는 안 막음)
+        print(f"[STT] partial: {hyp.committed} | {hyp.tentative}")
+        if hyp.new_words and hyp.committed not in early_routes:
+            route = intent_router.route(hyp.committed)
+            early_routes[hyp.committed] = route
+            print(f"[ROUTER] early intent={route.intent} confidence={route.confidence:.2f} local={route.local}")
+
+    worker = StreamingWorker(audio_processor.stream(), on_partial=on_partial)
+    if endpointer.capture(voice_recorder, on_audio=worker.feed) is None:
+        worker.close()
+        return None, None
+
+    final = worker.finish()
+    print(f"[STT] final after {worker.stream.decodes} decodes, {worker.skipped} skipped "
+          f"({final.audio_seconds:.2f}s audio)")
+    command_text = final.text
+    route = early_routes.get(command_text) or intent_router.route(command_text)
+    return command_text, route
 
 
 def command_mode(user: str, voice_recorder, audio_processor, gemini, permission_manager):
     """Continuous command processing mode"""
     print("📋 Command examples: 'What's the weather?', 'Play music', 'Turn on lights', etc.")
+    endpointer = CommandEndpointer()
+    intent_router = IntentRouter()
+    # Gemini 비동기 호출용 이벤트 루프 (명령마다 새로 만들지 않음 - 비동기 클라이언트가 루프에 묶임)
+    loop = asyncio.new_event_loop()
+    try:
+        _command_loop(user, voice_recorder, audio_processor, gemini, permission_manager,
+                      endpointer, intent_router, loop)
+    finally:
+        loop.close()
+
 
+def _command_loop(user, voice_recorder, audio_processor, gemini, permission_manager,
+                  endpointer, intent_router, loop):
     while True:
         try:
             print("\n" + "=" * 50)
@@ -330,18 +538,29 @@ def command_mode(user: str, voice_recorder, audio_processor, gemini, permission_
                 print(f"👋 {user} logged out.")
                 break
 
-            # Record command
+            # Record command + speech to text: VAD 로 말 시작 ~ 끝(무음)까지 (파일 저장 없음)
             print("🎤 Please speak your command...")
-            command_file = voice_recorder.record("command.wav", duration=5)
-
-            # Convert speech to text
             try:
-                print("🔄 Converting speech to text...")
-                command_text = audio_processor.transcribe(command_file)
-                print(f"📝 Recognized command: {command_text}")
+                command_text, route = listen_command(endpointer, voice_recorder, audio_processor, intent_router)
             except Exception as e:
                 print(f"❌ Speech conversion error: {e}")
                 continue
+            if command_text is None:
+                print("❌ No speech detected. Please try again.")
+                continue
+            print(f"📝 Recognized command: {command_text}")
+
+            # 🔹 등록된 장면 이름이 들어 있으면 바로 실행 (기기 조작 여러 개를 한 번에)
+            if try_handle_scene(user, command_text, permission_manager):
+                continue
+
+            # 🔹 0차: 로컬 의도 라우터 - 확실한 명령은 Gemini 없이 기기 안에서 처리
+            print(
+                f"[ROUTER] intent={route.intent} confidence={route.confidence:.2f} "
+                f"margin={route.margin:.2f} local={route.local}"
+            )
+            if route.local and handle_local_intent(user, command_text, route, permission_manager):
+                continue
 
             # 🔹 1차로 스마트홈 명령인지 먼저 체크
             if try_handle_smart_home(command_text):
@@ -349,46 +568,20 @@ def command_mode(user: str, voice_recorder, audio_processor, gemini, permission_
                 # 영화 검색 / Gemini 처리로 내려가지 않고 다음 명령으로
                 continue
 
-            # 🔹 영화 검색 API 호출
-            try:
-                print("🌐 Sending recognized text to movie search API...")
-                resp = requests.post(
-                    "http://127.0.0.1:8000/voice-search",
-                    json={"text": command_text, "user": user},  # 화자 이름도 같이 전송
-                    timeout=1.5,
-                )
-
-                if resp.ok:
-                    api_data = resp.json()
-                    allowed = api_data.get("allowed", True)
-                    reason = api_data.get("reason")
-
-                    # 🔒 나이 제한 걸린 경우
-                    if not allowed:
-                        print("🚫 Movie blocked by age restriction:", reason)
-                        if reason:
-                            tts_speak(reason)
-                        else:
-                            tts_speak("Sorry, this movie is restricted due to your age.")
-                        continue
-                else:
-                    print(f"⚠️ Movie API returned status {resp.status_code}")
-            except Exception as e:
-                print(f"⚠️ Movie API connection error: {e}")
-                # 여기서 바로 continue 해서 Gemini까지 안 넘김
-                continue
-
             if not command_text.strip():
                 print("❌ Command not recognized. Please try again.")
                 continue
 
-            # Process with Gemini AI
+            # 🔹 영화 검색 API 호출 + Gemini AI 를 동시에
+            #    연결 에러 / 나이 제한이면 Gemini 결과는 쓰지 않음 (태스크 취소)
             try:
                 print("🤖 Processing with Gemini AI...")
-                result = gemini.process_command(user, command_text)
+                _, result = loop.run_until_complete(search_and_process(gemini, user, command_text, route.intent))
             except Exception as e:
                 print(f"❌ AI processing error: {e}")
                 continue
+            if result is None:
+                continue
 
             # Permission check
             if result['action']:
@@ -424,9 +617,6 @@ def command_mode(user: str, voice_recorder, audio_processor, gemini, permission_
 #  액션 실행 / TTS / 세션 관련 함수들
 # =========================================================
 
-BACKEND_URL = "http://127.0.0.1:8000"   # FastAPI 서버 주소 (현재는 직접 DB 사용하지만 남겨둠)
-
-
 def execute_action(action: Dict):
     """Execute AI generated action (DB 기반으로 디바이스 상태 갱신)"""
 
@@ -464,7 +654,9 @@ def execute_action(action: Dict):
 
         # Step 4: DB에 상태 업데이트
         device.status = next_status
+        changed = device_dict(device)   # 커밋하면 속성이 만료돼서 미리 꺼내둠
         db.commit()
+        publish_device_changes([changed], source="speaker")
         print(f"✅ Device updated (DB): id={device_id}, status={next_status}")
     except Exception as e:
         print("❗ Error updating device in DB:", e)
@@ -516,7 +708,8 @@ def start_ai_session_with_components(user: str, audio_processor, voice_recorder)
     try:
         # Initialize Gemini AI
         print("[DEBUG] Initializing Gemini AI...")
-        gemini = GeminiAI(api_key=os.getenv("GEMINI_API_KEY"))
+        gemini = GeminiAI(api_key=os.getenv("GEMINI_API_KEY"), single_pass=GEMINI_SINGLE_PASS,
+                          cache=ResponseCache())
         print("[DEBUG] Gemini AI initialized")
 
         # Initialize permission manager
@@ -547,7 +740,8 @@ def start_ai_session_with_existing_components(user: str, audio_processor=None, v
         print("[DEBUG] Initializing Gemini AI...")
         api_key = os.getenv("GEMINI_API_KEY")
         print(f"[DEBUG] API Key exists: {api_key is not None}")
-        gemini = GeminiAI(api_key=api_key)
+        gemini = GeminiAI(api_key=api_key, single_pass=GEMINI_SINGLE_PASS,
+                          cache=ResponseCache())
         print("[DEBUG] Gemini AI initialized")
 
         # Initialize permission manager
@@ -558,7 +752,7 @@ def start_ai_session_with_existing_components(user: str, audio_processor=None, v
         # Use existing audio components or create new ones
         if audio_processor is None or voice_recorder is None:
             print("[DEBUG] Creating new audio components...")
-            audio_processor = AudioToText()
+            audio_processor = AudioToText(vocabulary=Vocabulary(load_stt_vocabulary))
             voice_recorder = VoiceRecorder()
             print("[DEBUG] Audio components created")
         else:
@@ -590,7 +784,8 @@ def start_ai_session(user: str):
         print("[DEBUG] Initializing Gemini AI...")
         api_key = os.getenv("GEMINI_API_KEY")
         print(f"[DEBUG] API Key exists: {api_key is not None}")
-        gemini = GeminiAI(api_key=api_key)
+        gemini = GeminiAI(api_key=api_key, single_pass=GEMINI_SINGLE_PASS,
+                          cache=ResponseCache())
         print("[DEBUG] Gemini AI initialized")
 
         # Initialize permission manager
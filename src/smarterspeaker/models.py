@@ -48,6 +48,17 @@ class Device(Base):
     zone = relationship("Zone", back_populates="devices")
 
 
+class Scene(Base):
+    """이름 붙인 기기 조작 묶음 (예: "good night" -> 거실 불 끄기, 현관문 잠그기 ...)"""
+    __tablename__ = "scenes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(100), unique=True, nullable=False)
+    display_name = Column(String(100), nullable=True)
+    # [{"zone": "living", "device_type": "light", "action": "off"}, {"device_id": 3, "action": "lock"}, ...]
+    actions_json = Column(Text, nullable=False)
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -81,4 +92,9 @@ class UserVoiceProfile(Base):
     # DB에는 audio_path, embedding_json 대신 voice_blob 하나만 사용
     voice_blob = Column(LargeBinary, nullable=False)
 
+    # 업로드 시점에 한 번 계산해둔 ECAPA 임베딩 (float32 x 192 = 768 bytes)
+    # 예전에 저장된 프로필은 NULL -> src/backfill_voice_embeddings.py 로 채움
+    embedding = Column(LargeBinary, nullable=True)
+    embedding_model = Column(String(100), nullable=True)
+
     user = relationship("User", back_populates="voice_profile")
@@ -0,0 +1,224 @@
+# src/smarterspeaker/movie_match.py
+"""
+STT 오류에 강한 영화 제목 매칭.
+
+Whisper 결과(AudioToText.clean_text: 소문자 + 구두점 제거)는 제목을 자주 틀린다.
+  "inter stellar", "intersteller", "parasight", "la la lend" ...
+
+- 단어 단위로 교정: SymSpell 방식 (어휘의 삭제 변형을 미리 만들어 두고
+  검색어 삭제 변형과 맞춰서 후보를 찾은 뒤 편집 거리로 확인)
+- 발음 키: 모음/비슷한 자음을 합친 키가 같으면 후보로 인정 ("parasight" ~ "parasite")
+  키가 PHONETIC_MIN_KEY 글자 이상인 단어만 ("how are you" 를 붙인 "howareyou" 는 "her" 와 키가 "hr" 로 같음)
+- 붙여 쓰기 / 띄어 쓰기: 검색어의 이웃 단어를 붙인 것도 어휘에서 찾음 ("inter stellar", 편집 거리로만)
+- 점수: 단어 순서와 무관하게 검색어 단어별 최고 유사도를 평균 (제목 쪽 커버리지도 일부 반영)
+"""
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+MAX_EDIT_DISTANCE = 2
+PREFIX_LENGTH = 7          # SymSpell: 앞 7글자의 삭제 변형만 저장 (메모리 절약)
+PHONETIC_SIMILARITY = 0.75  # 발음 키만 같을 때 단어 유사도
+PHONETIC_MIN_KEY = 4       # 이보다 짧은 발음 키는 너무 많은 단어와 겹쳐서 안 씀
+MIN_SCORE = 0.75           # 이 점수 미만 퍼지 결과는 버림 ("who are you" -> "Your Name" 0.5)
+MAX_JOIN = 3               # 붙여서 확인할 이웃 단어 수
+
+_PHONETIC_RULES = [
+    (r"^kn", "n"), (r"^wr", "r"), (r"ph", "f"), (r"^gh", "g"), (r"gh", ""), (r"ck", "k"), (r"sh", "s"), (r"ch", "k"),
+    (r"th", "t"), (r"wh", "w"), (r"qu", "kw"), (r"x", "ks"),
+    (r"[cqg]", "k"), (r"[zs]", "s"), (r"[dt]", "t"), (r"[bp]", "p"), (r"[fv]", "f"),
+    (r"[mn]", "n"),
+]
+
+
+def phonetic_key(word: str) -> str:
+    """대충 비슷하게 들리면 같은 키 (첫 글자 + 자음 뼈대)"""
+    word = re.sub(r"[^a-z0-9]", "", word.lower())
+    if not word:
+        return ""
+    if word.isdigit():
+        return word
+    first = word[0]
+    for pattern, repl in _PHONETIC_RULES:
+        word = re.sub(pattern, repl, word)
+    # 첫 글자 뒤의 모음 / 반모음 제거 + 연속 중복 제거
+    body = re.sub(r"[aeiouyhw]", "", word[1:])
+    body = re.sub(r"(.)\1+", r"\1", body)
+    head = "a" if first in "aeiouy" else (word[:1] or first)
+    return head + body
+
+
+def edit_distance(a: str, b: str, max_dist: int = MAX_EDIT_DISTANCE) -> int:
+    """Damerau-Levenshtein (인접 교환 포함). max_dist 를 넘으면 max_dist + 1."""
+    if a == b:
+        return 0
+    if abs(len(a) - len(b)) > max_dist:
+        return max_dist + 1
+
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if (prev2 is not None and i > 1 and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+            row_min = min(row_min, cur[j])
+        if row_min > max_dist:
+            return max_dist + 1
+        prev2, prev = prev, cur
+    return min(prev[-1], max_dist + 1)
+
+
+def max_distance_for(word: str) -> int:
+    """짧은 단어는 오타 1개까지만 (3글자에 2개 허용하면 아무거나 맞음)"""
+    if len(word) <= 2:
+        return 0
+    if len(word) <= 5:
+        return 1
+    return MAX_EDIT_DISTANCE
+
+
+def _deletes(word: str, depth: int) -> Set[str]:
+    out = {word}
+    frontier = {word}
+    for _ in range(depth):
+        nxt = set()
+        for w in frontier:
+            for i in range(len(w)):
+                nxt.add(w[:i] + w[i + 1:])
+        out |= nxt
+        frontier = nxt
+    return out
+
+
+class SymSpellIndex:
+    """어휘 단어의 삭제 변형 -> 원래 단어들"""
+
+    def __init__(self, words: Iterable[str] = ()):
+        self.words: Set[str] = set()
+        self.deletes: Dict[str, Set[str]] = defaultdict(set)
+        for w in words:
+            self.add(w)
+
+    def add(self, word: str) -> None:
+        if word in self.words:
+            return
+        self.words.add(word)
+        for d in _deletes(word[:PREFIX_LENGTH], max_distance_for(word)):
+            self.deletes[d].add(word)
+
+    def lookup(self, word: str) -> Dict[str, int]:
+        """{어휘 단어: 편집 거리} (거리 허용 범위 안의 것만)"""
+        max_dist = max_distance_for(word)
+        if word in self.words and max_dist == 0:
+            return {word: 0}
+
+        found: Dict[str, int] = {}
+        for d in _deletes(word[:PREFIX_LENGTH], max_dist):
+            for cand in self.deletes.get(d, ()):
+                if cand in found:
+                    continue
+                limit = min(max_dist, max_distance_for(cand))
+                dist = edit_distance(word, cand, limit)
+                if dist <= limit:
+                    found[cand] = dist
+        return found
+
+
+class FuzzyMatch(NamedTuple):
+    pos: int              # 제목 위치
+    score: float          # 0~1
+    title_cover: float    # 제목 단어 중 검색어와 맞은 비율
+
+
+class FuzzyTitleMatcher:
+    """
+    제목 목록 (normalize_title 된 것) 에 대한 퍼지 매처.
+    match() 는 [(제목 위치, 점수 0~1)] 를 점수 순으로 반환.
+    """
+
+    def __init__(self, titles: List[str], token_index: Dict[str, List[int]]):
+        self.titles = titles
+        self.title_tokens = [t.split() for t in titles]
+        self.token_index = token_index
+        self.symspell = SymSpellIndex(token_index.keys())
+
+        self.phonetic_index: Dict[str, Set[str]] = defaultdict(set)
+        for tok in token_index:
+            key = phonetic_key(tok)
+            if key:
+                self.phonetic_index[key].add(tok)
+
+        # 띄어쓰기 전부 뺀 제목 -> 위치 ("lalaland" -> La La Land)
+        self.compact_index: Dict[str, List[int]] = defaultdict(list)
+        for i, t in enumerate(titles):
+            self.compact_index[t.replace(" ", "")].append(i)
+
+    def _token_matches(self, word: str, phonetic: bool = True) -> Dict[str, float]:
+        """검색어 단어 하나 -> {어휘 단어: 유사도}"""
+        out: Dict[str, float] = {}
+        for cand, dist in self.symspell.lookup(word).items():
+            out[cand] = 1.0 - dist / max(len(word), len(cand))
+        key = phonetic_key(word) if phonetic else ""
+        if len(key) >= PHONETIC_MIN_KEY:
+            for cand in self.phonetic_index.get(key, ()):
+                if cand not in out:
+                    out[cand] = PHONETIC_SIMILARITY
+        return out
+
+    def match(self, query: str, k: int = 5, min_score: float = MIN_SCORE,
+              allowed: Set[int] = None) -> List[Tuple[int, float]]:
+        return [(m.pos, m.score) for m in self.match_details(query, k, min_score, allowed)]
+
+    def match_details(self, query: str, k: Optional[int] = 5, min_score: float = MIN_SCORE,
+                      allowed: Optional[Set[int]] = None) -> List[FuzzyMatch]:
+        """match() 와 같은 순서, 제목 커버리지 포함 (k=None 이면 기준 넘은 결과 전부)"""
+        words = query.split()
+        if not words:
+            return []
+
+        # 검색어 단어 i 가 어휘 단어들과 얼마나 비슷한지 (붙여 쓴 이웃 단어 포함, 붙인 건 발음 키 안 씀)
+        per_word: List[Dict[str, float]] = [self._token_matches(w) for w in words]
+        for n in range(2, MAX_JOIN + 1):
+            for i in range(len(words) - n + 1):
+                joined = "".join(words[i:i + n])
+                for cand, sim in self._token_matches(joined, phonetic=False).items():
+                    for j in range(i, i + n):
+                        if sim > per_word[j].get(cand, 0.0):
+                            per_word[j][cand] = sim
+
+        # 제목 위치별로 검색어 단어마다 최고 유사도 + 맞은 제목 단어 (posting list 한 번씩만 훑음)
+        best: Dict[int, List[float]] = {}
+        matched: Dict[int, Set[str]] = defaultdict(set)
+        for i, matches in enumerate(per_word):
+            for tok, sim in matches.items():
+                for pos in self.token_index.get(tok, ()):
+                    if allowed is not None and pos not in allowed:
+                        continue
+                    row = best.get(pos)
+                    if row is None:
+                        row = best[pos] = [0.0] * len(words)
+                    if sim > row[i]:
+                        row[i] = sim
+                    matched[pos].add(tok)
+
+        scored = []
+        for pos in self.compact_index.get("".join(words), ()):
+            if allowed is None or pos in allowed:
+                scored.append(FuzzyMatch(pos, 1.0, 1.0))
+                best.pop(pos, None)
+
+        for pos, row in best.items():
+            # 순서 무관: 검색어 쪽 커버리지 (단어별 최고 유사도 평균) + 제목 쪽 커버리지
+            query_cover = sum(row) / len(words)
+            title_cover = min(1.0, len(matched[pos]) / len(self.title_tokens[pos]))
+            score = 0.8 * query_cover + 0.2 * title_cover
+            if score >= min_score:
+                scored.append(FuzzyMatch(pos, score, title_cover))
+
+        scored.sort(key=lambda m: (-m.score, m.pos))
+        return scored[:k]
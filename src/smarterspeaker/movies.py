@@ -1,27 +1,393 @@
 # src/smarterspeaker/movies.py
 import json
+import os
+import re
+import threading
+from collections import defaultdict
 from pathlib import Path
-from typing import List, Dict
+from typing import Iterable, List, Dict, NamedTuple, Optional, Tuple
+
+from .movie_match import MIN_SCORE, FuzzyTitleMatcher
 
 # 프로젝트 루트 기준 경로 계산
 BASE_DIR = Path(__file__).resolve().parents[2]  # .../software-engineering-project
 MOVIES_FILE = BASE_DIR / "movies.json"
 
+# 부분 문자열 결과가 없을 때 퍼지 매칭 최소 점수 (0~1)
+FUZZY_MIN_SCORE = MIN_SCORE
+
+# 퍼지 결과로 나이 제한을 걸려면: 영화 검색 의도이거나, 검색어가 제목 단어의 이만큼 이상을 덮어야 함
+# (일반 대화 "how are you" 가 비슷한 제목 때문에 막히지 않게)
+AGE_GATE_TITLE_COVER = 0.6
+
+
+def normalize_title(text: str) -> str:
+    """소문자 + 구두점 제거 + 공백 정리 ("Mad Max: Fury Road" -> "mad max fury road")"""
+    text = re.sub(r"[^\w\s]", " ", (text or "").lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def trigrams(text: str, pad: bool = False) -> List[str]:
+    if pad:
+        text = f"  {text} "
+    return [text[i:i + 3] for i in range(len(text) - 2)]
+
+
+class TitleMatch(NamedTuple):
+    movie: Dict
+    score: float
+    substring: bool       # 제목에 검색어가 그대로 들어 있음 (예전 검색과 같은 결과)
+    title_cover: float    # 퍼지: 제목 단어 중 검색어와 맞은 비율
+
+
+def age_gate_candidates(matches: Iterable[TitleMatch], intent: Optional[str] = None) -> List[Dict]:
+    """
+    나이 제한 판단에 쓸 영화만.
+    부분 문자열 결과는 항상, 퍼지 결과는 영화 검색 의도이거나 제목 대부분이 맞았을 때만.
+    """
+    return [
+        m.movie for m in matches
+        if m.substring or intent == "movie_search" or m.title_cover >= AGE_GATE_TITLE_COVER
+    ]
+
+
+def project(movie: Dict, fields: Optional[List[str]]) -> Dict:
+    """fields 에 있는 키만 남긴 dict (None 이면 원본 그대로)"""
+    if not fields:
+        return movie
+    return {f: movie[f] for f in fields if f in movie}
+
+
+class CatalogIndex:
+    """
+    movies.json 한 버전의 영화 목록 + 인덱스 전부.
+    만든 뒤에는 바꾸지 않는다 - MovieCatalog 는 새 CatalogIndex 를 만들어 참조 하나만 교체하고,
+    검색은 시작할 때 잡은 CatalogIndex 하나만 끝까지 쓴다 (titles 는 새것, token_index 는 옛것 같은 일이 없음).
+    """
+
+    def __init__(self, movies: List[Dict]):
+        titles = [normalize_title(m.get("title", "")) for m in movies]
+
+        tokens: Dict[str, List[int]] = defaultdict(list)
+        grams: Dict[str, List[int]] = defaultdict(list)
+        genres: Dict[str, List[int]] = defaultdict(list)
+        years: Dict[int, List[int]] = defaultdict(list)
+        ages: Dict[int, List[int]] = defaultdict(list)
+
+        for i, (movie, title) in enumerate(zip(movies, titles)):
+            for tok in set(title.split()):
+                tokens[tok].append(i)
+            for g in set(trigrams(title, pad=True)):
+                grams[g].append(i)
+            genres[str(movie.get("genre", "")).lower()].append(i)
+            if movie.get("year") is not None:
+                years[int(movie["year"])].append(i)
+            ages[int(movie.get("ageRating", 0) or 0)].append(i)
+
+        self.movies = movies
+        self.titles = titles
+        self.token_index = dict(tokens)
+        self.trigram_index = dict(grams)
+        self.genre_index = dict(genres)
+        self.year_index = dict(years)
+        self.age_index = dict(ages)
+        self.matcher = FuzzyTitleMatcher(titles, self.token_index)
+
+        # 나이 제한 확인용: ageRating -> 위치 집합 (높은 나이부터)
+        self.age_sets = {age: frozenset(pos) for age, pos in ages.items()}
+        self.ages_desc = sorted(self.age_sets, reverse=True)
+        self.id_index = {m.get("id"): i for i, m in enumerate(movies)}
+
+    def filter_positions(
+        self,
+        genre: Optional[str] = None,
+        year: Optional[int] = None,
+        age_rating: Optional[int] = None,
+        max_age_rating: Optional[int] = None,
+    ) -> Optional[set]:
+        """필터 조건에 맞는 영화 위치 집합 (필터가 없으면 None = 전체)"""
+        selected: Optional[set] = None
+
+        def narrow(positions):
+            nonlocal selected
+            positions = set(positions)
+            selected = positions if selected is None else selected & positions
+
+        if genre:
+            narrow(self.genre_index.get(genre.lower(), ()))
+        if year is not None:
+            narrow(self.year_index.get(int(year), ()))
+        if age_rating is not None:
+            narrow(self.age_index.get(int(age_rating), ()))
+        if max_age_rating is not None:
+            narrow(i for age, pos in self.age_index.items() if age <= max_age_rating for i in pos)
+        return selected
+
+    def substring_candidates(self, q: str) -> set:
+        """q 를 포함할 수 있는 영화 위치 (호출한 쪽에서 q in title 로 확인)"""
+        if len(q) < 3:
+            # 짧은 검색어: q 가 들어 있는 trigram 들의 posting 합집합
+            # (제목 앞뒤를 공백으로 채워 두어서 제목 안의 1~2글자는 반드시 어떤 trigram 안에 있음)
+            out = set()
+            for g, p in self.trigram_index.items():
+                if q in g:
+                    out.update(p)
+            return out
+
+        postings = []
+        for g in set(trigrams(q)):
+            p = self.trigram_index.get(g)
+            if not p:
+                return set()
+            postings.append(p)
+        postings.sort(key=len)
+        out = set(postings[0])
+        for p in postings[1:]:
+            out.intersection_update(p)
+            if not out:
+                break
+        return out
+
+    def substring_score(self, q: str, pos: int) -> float:
+        title = self.titles[pos]
+        if title == q:
+            return 1.0
+        if title.startswith(q):
+            base = 0.9
+        elif f" {q}" in f" {title}":
+            base = 0.8   # 단어 경계에서 시작
+        else:
+            base = 0.6
+        # 짧은 제목일수록 (검색어가 제목의 큰 부분일수록) 위로
+        return base + 0.09 * len(q) / len(title)
+
+    def substring_scores(self, q: str, allowed: Optional[set]) -> Dict[int, float]:
+        candidates = self.substring_candidates(q)
+        if allowed is not None:
+            candidates &= allowed
+        return {pos: self.substring_score(q, pos) for pos in candidates if q in self.titles[pos]}
+
+    def ranked_positions(self, q: str, allowed: Optional[set], limit: Optional[int] = None) -> List[int]:
+        """정규화된 검색어 -> 점수 순 영화 위치"""
+        if not q:
+            positions = range(len(self.movies)) if allowed is None else sorted(allowed)
+            return list(positions[:limit] if limit else positions)
+
+        scores = self.substring_scores(q, allowed)
+        if not scores:
+            # 부분 문자열로 못 찾으면 오타 허용 검색
+            k = limit or len(self.movies)
+            return [i for i, _ in self.matcher.match(q, k, FUZZY_MIN_SCORE, allowed)]
+
+        ranked = sorted(scores, key=lambda pos: (-scores[pos], pos))
+        return ranked[:limit] if limit else ranked
+
+    def required_age(self, positions: Iterable[int]) -> int:
+        """
+        위치 목록 중 가장 높은 ageRating.
+        결과를 훑지 않고 연령 버킷(보통 4~5개)을 높은 것부터 교집합 확인.
+        """
+        if not isinstance(positions, (set, frozenset)):
+            positions = set(positions)
+        if not positions:
+            return 0
+        for age in self.ages_desc:
+            if not self.age_sets[age].isdisjoint(positions):
+                return age
+        return 0
+
+
+class MovieCatalog:
+    """
+    movies.json 을 한 번만 읽어서 메모리에 인덱스(CatalogIndex)로 들고 있는 카탈로그.
+
+    - 파일 mtime / size 가 바뀌었을 때만 다시 로드
+    - 토큰 역색인 (token -> 영화 위치)
+    - trigram 역색인: 부분 문자열 후보를 posting list 교집합으로 좁힌 뒤 확인
+    - 결과가 없으면 movie_match.FuzzyTitleMatcher 로 STT 오타 허용 검색
+    - genre / year / ageRating 필터는 미리 만든 인덱스에서 바로 꺼냄
+    """
+
+    def __init__(self, path: Path = MOVIES_FILE):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._index = CatalogIndex([])
+
+    # -----------------------------------------------------
+    #  로드 / 인덱스
+    # -----------------------------------------------------
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def refresh(self) -> bool:
+        """파일이 바뀌었으면 다시 읽고 인덱스 재구성. 다시 읽었으면 True."""
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return False
+
+        with self._lock:
+            if stamp == self._stamp:
+                return False
+            movies = []
+            if stamp is not None:
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        movies = json.load(f)
+                except ValueError as e:
+                    # 파일을 쓰는 중이면 이전 인덱스를 계속 쓰고 다음 검색 때 다시 시도
+                    print(f"[MOVIES] could not parse {self.path}: {e}")
+                    return False
+            # 새 인덱스를 다 만든 다음 참조 하나만 교체
+            self._index = CatalogIndex(movies)
+            self._stamp = stamp
+            print(f"[MOVIES] catalog loaded: {len(movies)} movies")
+            return True
+
+    def snapshot(self) -> CatalogIndex:
+        """최신 CatalogIndex (검색 하나 동안 이것만 씀)"""
+        self.refresh()
+        return self._index
+
+    @property
+    def movies(self) -> List[Dict]:
+        return self._index.movies
+
+    def all(self) -> List[Dict]:
+        return self.snapshot().movies
+
+    # -----------------------------------------------------
+    #  검색
+    # -----------------------------------------------------
+
+    def filter_positions(self, **filters) -> Optional[set]:
+        """필터 조건에 맞는 영화 위치 집합 (필터가 없으면 None = 전체)"""
+        return self.snapshot().filter_positions(**filters)
+
+    def search(
+        self,
+        query: str = "",
+        genre: Optional[str] = None,
+        year: Optional[int] = None,
+        age_rating: Optional[int] = None,
+        max_age_rating: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict]:
+        """
+        제목 검색 + 필터. 점수 높은 순.
+        query 가 비어 있으면 필터에 맞는 전체 영화 (파일 순서).
+        """
+        idx = self.snapshot()
+        allowed = idx.filter_positions(genre, year, age_rating, max_age_rating)
+        positions = idx.ranked_positions(normalize_title(query), allowed, limit)
+        return [idx.movies[i] for i in positions]
+
+    def page(
+        self,
+        query: str = "",
+        offset: int = 0,
+        limit: Optional[int] = 50,
+        fields: Optional[List[str]] = None,
+        **filters,
+    ) -> Dict:
+        """
+        검색 결과 한 페이지 + 전체 개수 + 전체 결과의 최대 관람 연령.
+        limit=None 이면 offset 부터 끝까지.
+        fields 를 주면 그 필드만 담은 dict 로 (예: ["id", "title", "ageRating"]).
+        """
+        idx = self.snapshot()
+        allowed = idx.filter_positions(**filters)
+        positions = idx.ranked_positions(normalize_title(query), allowed)
+        window = positions[offset:] if limit is None else positions[offset:offset + limit]
+        end = offset + len(window)
+        return {
+            "count": len(positions),
+            "offset": offset,
+            "limit": limit,
+            "next_offset": end if end < len(positions) else None,
+            "required_age": idx.required_age(positions),
+            "results": [project(idx.movies[i], fields) for i in window],
+        }
+
+    def get(self, movie_id: int) -> Optional[Dict]:
+        idx = self.snapshot()
+        pos = idx.id_index.get(movie_id)
+        return None if pos is None else idx.movies[pos]
+
+    def required_age_of(self, movies: Iterable[Dict]) -> int:
+        """영화 dict 목록(검색 결과)의 최대 ageRating (id 로 위치를 찾아 required_age)"""
+        idx = self.snapshot()
+        return idx.required_age(
+            idx.id_index[m["id"]] for m in movies if m.get("id") in idx.id_index
+        )
+
+    def match(self, query: str, k: int = 5, min_score: float = FUZZY_MIN_SCORE,
+              **filters) -> List[Tuple[Dict, float]]:
+        """
+        STT 결과용 top-k 검색: [(영화, 점수 0~1)].
+        부분 문자열 일치와 퍼지 매칭 결과를 합쳐서 점수 순으로.
+        """
+        return [(m.movie, m.score) for m in self.match_details(query, k, min_score, **filters)]
+
+    def match_details(self, query: str, k: Optional[int] = 5, min_score: float = FUZZY_MIN_SCORE,
+                      **filters) -> List[TitleMatch]:
+        """match() 와 같은 순서, 결과마다 부분 문자열 일치 여부 / 제목 커버리지까지 (k=None 이면 전부)"""
+        idx = self.snapshot()
+        allowed = idx.filter_positions(**filters)
+        q = normalize_title(query)
+        if not q:
+            return []
+
+        found: Dict[int, TitleMatch] = {
+            m.pos: TitleMatch(idx.movies[m.pos], m.score, False, m.title_cover)
+            for m in idx.matcher.match_details(q, k, min_score, allowed)
+        }
+        for pos, score in idx.substring_scores(q, allowed).items():
+            prev = found.get(pos)
+            found[pos] = TitleMatch(
+                idx.movies[pos],
+                max(prev.score if prev else 0.0, min(1.0, score)),
+                True,
+                max(prev.title_cover if prev else 0.0, len(q) / len(idx.titles[pos])),
+            )
+
+        ranked = sorted(found.items(), key=lambda x: (-x[1].score, x[0]))[:k]
+        return [m._replace(score=round(m.score, 3)) for _, m in ranked]
+
+
+# 프로세스 전체에서 공유하는 카탈로그 (첫 검색 때 로드)
+catalog = MovieCatalog()
+
 
 def load_movies() -> List[Dict]:
-    """Load all movies from movies.json."""
-    with open(MOVIES_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+    """Load all movies from movies.json (cached, reloaded when the file changes)."""
+    return catalog.all()
+
 
+def get_movie(movie_id: int) -> Optional[Dict]:
+    return catalog.get(movie_id)
 
-def search_movies(query: str) -> List[Dict]:
+
+def search_movies(query: str, **filters) -> List[Dict]:
     """
-    Return movies whose title contains the query (case-insensitive).
+    Return movies whose title contains the query (case-insensitive), best match first.
+    Falls back to STT-error-tolerant fuzzy matching when nothing contains the query.
     If query is empty, return all movies.
+    Optional filters: genre, year, age_rating, max_age_rating, limit.
     """
-    movies = load_movies()
-    if not query:
-        return movies
+    return catalog.search(query, **filters)
+
+
+def match_movies(query: str, k: int = 5, **filters) -> List[Tuple[Dict, float]]:
+    """Top-k (movie, score) pairs for a noisy spoken title."""
+    return catalog.match(query, k, **filters)
+
 
-    q = query.lower()
-    return [m for m in movies if q in m["title"].lower()]
+def match_movie_details(query: str, k: Optional[int] = 5, **filters) -> List[TitleMatch]:
+    """match_movies with substring / title-coverage info (for age gating)."""
+    return catalog.match_details(query, k, **filters)
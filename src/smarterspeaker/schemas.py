@@ -1,7 +1,7 @@
 # src/smarterspeaker/schemas.py
 
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 # ===========================
@@ -71,3 +71,46 @@ class DeviceOut(DeviceBase):
     id: int
 
     model_config = {"from_attributes": True}
+
+
+# ?since=<version> 변경분 응답 (바뀐 행 + 삭제된 id)
+class ZoneDelta(BaseModel):
+    version: int
+    changed: List[ZoneOut]
+    deleted: List[int]
+
+
+class DeviceDelta(BaseModel):
+    version: int
+    changed: List[DeviceOut]
+    deleted: List[int]
+
+
+# ===========================
+# Batch / Scene Schemas
+# ===========================
+
+class DeviceOperation(BaseModel):
+    # device_id 로 기기 하나, 또는 zone / device_type 으로 여러 개
+    device_id: Optional[int] = None
+    zone: Optional[str] = None
+    device_type: Optional[str] = None
+    action: str
+
+
+class DeviceBatchRequest(BaseModel):
+    operations: List[DeviceOperation]
+
+
+class SceneBase(BaseModel):
+    name: str
+    display_name: Optional[str] = None
+    operations: List[DeviceOperation]
+
+
+class SceneCreate(SceneBase):
+    pass
+
+
+class SceneOut(SceneBase):
+    id: int
@@ -1,28 +1,177 @@
 # src/smarterspeaker/smarthome_client.py
+"""
+스피커 -> 기기 제어 전송.
 
-import requests
+- HttpDeviceTransport: FastAPI 서버의 /device-control 로 POST (서버가 다른 호스트일 때)
+- InProcessDeviceTransport: 같은 호스트면 device_service 를 직접 호출 (HTTP / JSON 왕복 없음)
 
-BACKEND_URL = "http://127.0.0.1:8000"
+둘 다 device_service 를 거치므로 결과(DeviceOut dict 목록)와
+상태 매핑(map_status)이 같다. 실패하면 둘 다 None.
+
+장면(scene): run_scene 한 번 = 왕복 한 번 + 커밋 한 번.
+스피커는 장면 이름 목록(find_scene_in_text)을 SCENE_REFRESH_SECONDS 동안 캐시한다.
+"""
+import time
+from typing import Dict, List, Optional
+from urllib.parse import quote, urlparse
+
+from .ai.intent_router import normalize
+from .config import BACKEND_URL, DEVICE_CONTROL_TRANSPORT, SCENE_REFRESH_SECONDS
+from .http_client import get_client
+
+LOCAL_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+
+class HttpDeviceTransport:
+    name = "http"
+
+    def control(self, zone: str, device_type: str, action: str) -> Optional[List[Dict]]:
+        payload = {
+            "zone": zone,          # 예: "Living"
+            "device_type": device_type,  # 예: "light"
+            "action": action,      # 예: "on"
+        }
+
+        print(f"[CLIENT] POST /device-control {payload}")
+        # 같은 상태로 다시 설정하는 요청이라 재시도해도 안전 (idempotent)
+        return self._call("POST", "/device-control", json=payload, idempotent=True)
+
+    def run_scene(self, name: str) -> Optional[List[Dict]]:
+        print(f"[CLIENT] POST /scenes/{name}/run")
+        return self._call("POST", f"/scenes/{quote(name, safe='')}/run", idempotent=True)
+
+    def list_scenes(self) -> Optional[List[Dict]]:
+        return self._call("GET", "/scenes")
+
+    def _call(self, method: str, path: str, **kwargs):
+        try:
+            res = get_client().request(method, path, **kwargs)
+        except Exception as e:
+            print(f"[CLIENT] {path} connection error:", e)
+            return None
+
+        try:
+            res.raise_for_status()
+        except Exception as e:
+            print(f"[CLIENT] {path} error:", e, res.text)
+            return None
+
+        return res.json()
+
+
+class InProcessDeviceTransport:
+    name = "inprocess"
+
+    def __init__(self, session_factory=None):
+        if session_factory is None:
+            from .db import SessionLocal
+            session_factory = SessionLocal
+        self.session_factory = session_factory
+
+    def control(self, zone: str, device_type: str, action: str) -> Optional[List[Dict]]:
+        # DB 모듈은 여기서만 import (HTTP 전송만 쓰는 원격 스피커는 DB 설정이 없어도 됨)
+        from .device_service import control_devices
+
+        print(f"[CLIENT] device-control (in-process) zone={zone}, type={device_type}, action={action}")
+        return self._call(control_devices, zone, device_type, action, source="speaker")
+
+    def run_scene(self, name: str) -> Optional[List[Dict]]:
+        from .device_service import run_scene
+
+        print(f"[CLIENT] run scene (in-process) {name}")
+        return self._call(run_scene, name, source="speaker")
+
+    def list_scenes(self) -> Optional[List[Dict]]:
+        from .device_service import list_scenes
+
+        return self._call(list_scenes)
+
+    def _call(self, fn, *args, **kwargs):
+        from .device_service import DeviceNotFound, SceneNotFound
+
+        db = self.session_factory()
+        try:
+            return fn(db, *args, **kwargs)
+        except (DeviceNotFound, SceneNotFound) as e:
+            print(f"[CLIENT] {fn.__name__} error:", e)
+            return None
+        except Exception as e:
+            db.rollback()
+            print(f"[CLIENT] {fn.__name__} DB error:", e)
+            return None
+        finally:
+            db.close()
+
+
+def make_transport(mode: str = DEVICE_CONTROL_TRANSPORT, session_factory=None):
+    """
+    mode: "http" / "inprocess" / "auto"
+    auto 면 BACKEND_URL 이 이 호스트(localhost)일 때 in-process, 아니면 HTTP.
+    """
+    mode = (mode or "auto").lower()
+    if mode == "auto":
+        host = urlparse(BACKEND_URL).hostname
+        mode = "inprocess" if host in LOCAL_HOSTS else "http"
+    if mode == "inprocess":
+        return InProcessDeviceTransport(session_factory)
+    return HttpDeviceTransport()
+
+
+_transport = None
+
+
+def set_transport(transport) -> None:
+    global _transport
+    _transport = transport
+    print(f"[CLIENT] device-control transport: {transport.name}")
+
+
+def get_transport():
+    if _transport is None:
+        set_transport(make_transport())
+    return _transport
 
 
 def control_device(zone: str, device_type: str, action: str):
     """
-    AI 스피커에서 존/타입/액션으로 요청할 때
-    FastAPI 서버의 /device-control (DB 기반)으로 보내는 함수
+    AI 스피커에서 존/타입/액션으로 기기 제어.
+    결과는 /device-control 응답과 같은 기기 dict 목록, 실패하면 None.
+    """
+    return get_transport().control(zone, device_type, action)
+
+
+def run_scene(name: str):
+    """장면 실행. 결과는 바뀐 기기 dict 목록, 실패하면 None."""
+    return get_transport().run_scene(name)
+
+
+_scenes: List[Dict] = []
+_scenes_loaded_at: Optional[float] = None
+
+
+def cached_scenes(max_age: float = SCENE_REFRESH_SECONDS) -> List[Dict]:
+    """장면 목록 (max_age 초 동안 캐시, 못 읽으면 이전 목록 유지)"""
+    global _scenes, _scenes_loaded_at
+    now = time.monotonic()
+    if _scenes_loaded_at is None or now - _scenes_loaded_at >= max_age:
+        scenes = get_transport().list_scenes()
+        if scenes is not None:
+            _scenes = scenes
+        _scenes_loaded_at = now
+    return _scenes
+
+
+def find_scene_in_text(text: str) -> Optional[Dict]:
+    """
+    문장에 장면 이름(name / display_name)이 들어 있으면 그 장면 dict.
+    여러 개면 가장 긴 이름 ("good night" 보다 "good night kids").
+    단어 시작에서만 맞춤 (뒤쪽은 "굿나잇으로" 처럼 조사가 붙을 수 있어서 열어둠)
     """
-    payload = {
-        "zone": zone,          # 예: "Living"
-        "device_type": device_type,  # 예: "light"
-        "action": action,      # 예: "on"
-    }
-
-    print(f"[CLIENT] POST /device-control {payload}")
-    res = requests.post(f"{BACKEND_URL}/device-control", json=payload, timeout=3)
-
-    try:
-        res.raise_for_status()
-    except Exception as e:
-        print("[CLIENT] device-control error:", e, res.text)
-        return None
-
-    return res.json()
+    padded = f" {normalize(text)}"
+    best, best_len = None, 0
+    for scene in cached_scenes():
+        for alias in (scene.get("name"), scene.get("display_name")):
+            alias = normalize(alias or "")
+            if alias and len(alias) > best_len and f" {alias}" in padded:
+                best, best_len = scene, len(alias)
+    return best
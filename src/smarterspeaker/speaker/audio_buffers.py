@@ -0,0 +1,159 @@
+# src/smarterspeaker/speaker/audio_buffers.py
+
+import hashlib
+import os
+import struct
+import tempfile
+from io import BytesIO
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+# WAVE_FORMAT_PCM / WAVE_FORMAT_IEEE_FLOAT / WAVE_FORMAT_EXTENSIBLE
+_PCM = 1
+_IEEE_FLOAT = 3
+_EXTENSIBLE = 0xFFFE
+
+
+def blob_digest(blob: BytesLike) -> str:
+    """음성 blob 의 sha256 (캐시 키 / 인덱스 signature 로 사용)."""
+    return hashlib.sha256(blob).hexdigest()
+
+
+def _parse_wav_header(buf: memoryview) -> Optional[Tuple[int, int, int, int, int, int]]:
+    """
+    RIFF/WAVE 헤더를 직접 파싱해서
+    (format, channels, sample_rate, bits_per_sample, data_offset, data_size) 반환.
+    못 읽으면 None.
+    """
+    if len(buf) < 12 or bytes(buf[0:4]) != b"RIFF" or bytes(buf[8:12]) != b"WAVE":
+        return None
+
+    fmt = None
+    pos = 12
+    while pos + 8 <= len(buf):
+        chunk_id = bytes(buf[pos:pos + 4])
+        (chunk_size,) = struct.unpack_from("<I", buf, pos + 4)
+        body = pos + 8
+
+        if chunk_id == b"fmt ":
+            audio_format, channels, sample_rate = struct.unpack_from("<HHI", buf, body)
+            (bits,) = struct.unpack_from("<H", buf, body + 14)
+            if audio_format == _EXTENSIBLE and chunk_size >= 26:
+                (audio_format,) = struct.unpack_from("<H", buf, body + 24)
+            fmt = (audio_format, channels, sample_rate, bits)
+
+        elif chunk_id == b"data" and fmt is not None:
+            # 스트리밍으로 저장된 wav 는 data 크기가 0xFFFFFFFF 인 경우가 있음
+            data_size = min(chunk_size, len(buf) - body)
+            audio_format, channels, sample_rate, bits = fmt
+            return audio_format, channels, sample_rate, bits, body, data_size
+
+        pos = body + chunk_size + (chunk_size & 1)  # 청크는 2바이트 정렬
+
+    return None
+
+
+def decode_wav_bytes(blob: BytesLike) -> Tuple[np.ndarray, int]:
+    """
+    wav 바이트 -> (float32 mono 배열, sample_rate).
+
+    16bit PCM / float32 wav 는 디스크를 거치지 않고 np.frombuffer 로
+    blob 메모리를 그대로 바라보는 view 를 만든 뒤 float32 로 한 번만 변환한다.
+    그 외 포맷은 soundfile 로 넘긴다.
+    """
+    buf = memoryview(blob).cast("B")
+    header = _parse_wav_header(buf)
+
+    if header is not None:
+        audio_format, channels, sample_rate, bits, offset, size = header
+        dtype = None
+        if audio_format == _PCM and bits == 16:
+            dtype = np.dtype("<i2")
+        elif audio_format == _IEEE_FLOAT and bits == 32:
+            dtype = np.dtype("<f4")
+
+        if dtype is not None and channels > 0:
+            frame_bytes = dtype.itemsize * channels
+            frames = size // frame_bytes
+            view = np.frombuffer(buf, dtype=dtype, count=frames * channels, offset=offset)
+            view = view.reshape(frames, channels)
+
+            if dtype.kind == "i":
+                data = view.astype(np.float32)
+                data /= 32768.0
+            else:
+                data = view.astype(np.float32)
+
+            if channels > 1:
+                data = data.mean(axis=1)  # stereo -> mono
+            else:
+                data = data.reshape(-1)
+            return data, sample_rate
+
+    # 24bit PCM 등 직접 처리 안 하는 포맷
+    import soundfile as sf
+
+    data, sample_rate = sf.read(BytesIO(buf), dtype="float32", always_2d=True)
+    return data.mean(axis=1), sample_rate
+
+
+class VoiceBlobCache:
+    """
+    content-hash(sha256) 기반 디스크 캐시 (선택 사항).
+
+        <root>/<digest>.wav   원본 음성 (디버깅/외부 툴용)
+        <root>/<digest>.npy   그 음성으로 계산한 임베딩
+
+    파일 이름이 내용의 해시라서 같은 프로필은 절대 다시 쓰지 않고,
+    tmp 파일 + os.replace 로 써서 여러 스피커 프로세스가 같은 폴더를 써도 안전하다.
+    """
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _atomic_write(self, path: Path, data: BytesLike) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    def blob_path(self, digest: str) -> Path:
+        return self.root / f"{digest}.wav"
+
+    def store_blob(self, blob: BytesLike, digest: Optional[str] = None) -> Path:
+        """blob 을 캐시에 저장 (이미 있으면 아무것도 안 함) 후 경로 반환."""
+        digest = digest or blob_digest(blob)
+        path = self.blob_path(digest)
+        if not path.exists():
+            self._atomic_write(path, blob)
+        return path
+
+    def load_embedding(self, digest: str) -> Optional[np.ndarray]:
+        path = self.root / f"{digest}.npy"
+        if not path.exists():
+            return None
+        try:
+            return np.load(path)
+        except Exception as e:
+            print(f"[WARN] Broken embedding cache {path}: {e}")
+            return None
+
+    def store_embedding(self, digest: str, embedding: np.ndarray) -> None:
+        path = self.root / f"{digest}.npy"
+        if path.exists():
+            return
+        buf = BytesIO()
+        np.save(buf, np.asarray(embedding, dtype=np.float32))
+        self._atomic_write(path, buf.getbuffer())
@@ -1,17 +1,48 @@
-from faster_whisper import WhisperModel
+import numpy as np
 import string
 
+from smarterspeaker.config import WHISPER_MODEL
+from .decoding_profiles import get_profile
+from .model_host import get_whisper
+from .streaming_stt import StreamingTranscriber
+
 class AudioToText:
 
-    def __init__(self):
-        self.model = WhisperModel("base", device="cpu", compute_type="int8")
+    def __init__(self, model_size=WHISPER_MODEL, profile="command", vocabulary=None):
+        # WhisperModel 또는 모델 호스트 프록시 (같은 크기는 프로세스/머신에 하나만 로드)
+        self.model = get_whisper(model_size)
+        # 기본 디코딩 프로필 (decoding_profiles: command / wake / dictation)
+        self.profile = get_profile(profile)
+        # speaker.vocabulary.Vocabulary: 존/기기 이름, 영화 제목 initial_prompt (None 이면 안 씀)
+        self.vocabulary = vocabulary
 
     def clean_text(self, text):
         translator = str.maketrans('', '', string.punctuation)
         return text.translate(translator).lower()
 
-    def transcribe(self, filename):
-        segments, info = self.model.transcribe(filename)
+    def _as_input(self, audio):
+        """wav 경로는 그대로, 배열은 faster-whisper 가 받는 [-1, 1] float32 1차원으로"""
+        if isinstance(audio, np.ndarray):
+            if audio.dtype == np.int16:
+                audio = audio.astype(np.float32) / 32768.0
+            else:
+                audio = audio.astype(np.float32, copy=False)
+            audio = audio.reshape(-1)
+        return audio
+
+    def options(self, profile=None, prompt=None, language=None, **overrides):
+        """프로필 + 어휘 prompt(+ 스트리밍 문맥 prompt) -> model.transcribe 인자"""
+        profile = get_profile(profile) if profile is not None else self.profile
+        vocab = self.vocabulary.prompt() if (profile.use_vocabulary and self.vocabulary) else None
+        prompt = " ".join(p for p in (vocab, prompt) if p) or None
+        return profile.options(prompt=prompt, language=language, **overrides)
+
+    def transcribe(self, audio, profile=None):
+        """
+        audio: wav 파일 경로 또는 16kHz 배열 (VoiceRecorder 링버퍼 view 그대로 가능)
+        profile: "command" / "wake" / "dictation" (None 이면 기본 프로필)
+        """
+        segments, info = self.model.transcribe(self._as_input(audio), **self.options(profile))
 
         print(f"Detected language: {info.language} ({info.language_probability:.2f})")
         print("Transcript:")
@@ -20,4 +51,27 @@ class AudioToText:
         for segment in segments:
             print(f"[{segment.start:.2f}-{segment.end:.2f}] {segment.text}")
             transcript += segment.text + " "
-        return self.clean_text(transcript.strip())
\ No newline at end of file
+        return self.clean_text(transcript.strip())
+
+    def transcribe_words(self, audio, prompt=None, language=None, profile=None):
+        """
+        단어 타임스탬프까지 디코딩 (스트리밍용). (faster-whisper Word 목록, 언어) 반환.
+        prompt: 앞에서 이미 확정된 텍스트 (창에서 잘라낸 부분의 문맥)
+        """
+        segments, info = self.model.transcribe(
+            self._as_input(audio),
+            **self.options(
+                profile,
+                prompt=prompt,
+                language=language,
+                word_timestamps=True,
+                without_timestamps=False,
+                condition_on_previous_text=False,
+            ),
+        )
+        words = [w for segment in segments for w in (segment.words or [])]
+        return words, info.language
+
+    def stream(self, **kwargs):
+        """발화 하나용 스트리밍 세션 (push 로 오디오 조각을 넣으면 partial 결과)"""
+        return StreamingTranscriber(self, **kwargs)
@@ -0,0 +1,98 @@
+# src/smarterspeaker/speaker/decoding_profiles.py
+"""
+Whisper 디코딩 프로필.
+
+예전에는 모든 클립을 기본값(beam 5, 타임스탬프, 언어 자동 감지)으로 디코딩했다.
+짧은 명령 / wake word 확인에는 과하고, 긴 받아쓰기에는 그 설정이 맞다.
+
+- command  : 짧은 명령 (VAD 로 이미 잘린 구간). greedy, 타임스탬프 없음, 어휘 prompt
+- wake     : wake word 확인 (1~2초). greedy, 타임스탬프 없음, fallback 없음
+             (prompt 는 안 씀 - wake word 를 prompt 로 주면 없는 말도 들었다고 할 수 있음)
+- dictation: 긴 자유 발화. beam 5, 타임스탬프, 언어 감지, 내장 VAD 필터 (기존 동작에 가까움)
+
+command / wake 언어는 STT_LANGUAGE (기본 auto = 감지). 영어만 쓰는 집이면 "en" 으로 고정해서 감지 생략
+"""
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Optional, Tuple
+
+from smarterspeaker.config import STT_LANGUAGE
+
+# faster-whisper 기본 temperature fallback
+DEFAULT_TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+
+def language_hint(language: Optional[str]) -> Optional[str]:
+    """"auto" / 빈 값 -> None (Whisper 가 감지)"""
+    if not language or language.lower() == "auto":
+        return None
+    return language
+
+
+@dataclass(frozen=True)
+class DecodingProfile:
+    name: str
+    beam_size: int = 5
+    best_of: int = 5
+    without_timestamps: bool = False
+    language: Optional[str] = None
+    vad_filter: bool = False
+    condition_on_previous_text: bool = True
+    temperature: Tuple[float, ...] = DEFAULT_TEMPERATURES
+    use_vocabulary: bool = False    # 존/기기 이름, 영화 제목을 initial_prompt 로
+
+    def options(self, prompt: Optional[str] = None, language: Optional[str] = None, **overrides) -> Dict[str, Any]:
+        """WhisperModel.transcribe(**options) 인자"""
+        options = {
+            "beam_size": self.beam_size,
+            "best_of": self.best_of,
+            "without_timestamps": self.without_timestamps,
+            "language": language or self.language,
+            "vad_filter": self.vad_filter,
+            "condition_on_previous_text": self.condition_on_previous_text,
+            "temperature": list(self.temperature),
+            "initial_prompt": prompt,
+        }
+        options.update(overrides)
+        return options
+
+
+PROFILES: Dict[str, DecodingProfile] = {
+    "command": DecodingProfile(
+        "command",
+        beam_size=1,
+        best_of=1,
+        without_timestamps=True,
+        language=language_hint(STT_LANGUAGE),
+        condition_on_previous_text=False,
+        temperature=(0.0, 0.4),
+        use_vocabulary=True,
+    ),
+    "wake": DecodingProfile(
+        "wake",
+        beam_size=1,
+        best_of=1,
+        without_timestamps=True,
+        language=language_hint(STT_LANGUAGE),
+        condition_on_previous_text=False,
+        temperature=(0.0,),
+    ),
+    "dictation": DecodingProfile(
+        "dictation",
+        vad_filter=True,
+    ),
+}
+
+
+def get_profile(profile) -> DecodingProfile:
+    """이름 또는 DecodingProfile -> DecodingProfile"""
+    if isinstance(profile, DecodingProfile):
+        return profile
+    try:
+        return PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown decoding profile: {profile} (choose from {', '.join(PROFILES)})")
+
+
+def with_vocabulary(profile, use_vocabulary: bool) -> DecodingProfile:
+    """벤치마크용: 같은 프로필에서 어휘 prompt 만 켜고 끄기"""
+    return replace(get_profile(profile), use_vocabulary=use_vocabulary)
@@ -0,0 +1,138 @@
+# src/smarterspeaker/speaker/embedding_index.py
+
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+# ECAPA (spkrec-ecapa-voxceleb) 임베딩 차원
+EMBEDDING_DIM = 192
+
+# DB(user_voice_profiles.embedding_model)에 같이 저장하는 모델 버전 태그.
+# 모델이 바뀌면 이 값을 올리고 backfill_voice_embeddings.py --force 로 다시 계산.
+EMBEDDING_MODEL = "speechbrain/spkrec-ecapa-voxceleb@1"
+
+# little-endian float32 고정 (192 * 4 = 768 bytes)
+_EMBEDDING_DTYPE = np.dtype("<f4")
+
+
+def pack_embedding(vector: np.ndarray) -> bytes:
+    """(192,) 임베딩 -> DB 저장용 float32 바이트."""
+    vector = np.asarray(vector, dtype=_EMBEDDING_DTYPE).reshape(-1)
+    if vector.shape[0] != EMBEDDING_DIM:
+        raise ValueError(f"expected {EMBEDDING_DIM}-dim embedding, got {vector.shape[0]}")
+    return vector.tobytes()
+
+
+def unpack_embedding(blob: bytes) -> np.ndarray:
+    """DB 바이트 -> (192,) float32 배열 (복사 없이 읽기 전용 view)."""
+    vector = np.frombuffer(blob, dtype=_EMBEDDING_DTYPE)
+    if vector.shape[0] != EMBEDDING_DIM:
+        raise ValueError(f"expected {EMBEDDING_DIM}-dim embedding, got {vector.shape[0]}")
+    return vector
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """(N, D) 또는 (D,) 벡터를 L2 정규화해서 (N, D) float32 로 반환."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[np.newaxis, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class SpeakerEmbeddingIndex:
+    """
+    등록된 화자 임베딩을 메모리에 들고 있는 인덱스.
+
+    - 유저별로 등록 음성 임베딩(여러 개 가능)을 한 번만 계산해서 저장
+    - 전체를 정규화된 (M, D) 행렬 하나로 유지
+    - 녹음된 probe 임베딩 하나와 행렬곱 한 번으로 모든 유저 점수 계산
+
+    signature 는 "이 유저의 등록 음성이 바뀌었는지" 판단하는 값
+    (파일 mtime, blob 해시 등). 같으면 다시 인코딩하지 않는다.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+        self._prints: Dict[str, np.ndarray] = {}
+        self._signatures: Dict[str, Hashable] = {}
+
+        # 행렬은 변경이 생겼을 때만 다시 쌓는다
+        self._matrix: Optional[np.ndarray] = None
+        self._row_users: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._prints)
+
+    def __contains__(self, username: str) -> bool:
+        return username in self._prints
+
+    def users(self) -> List[str]:
+        return list(self._prints.keys())
+
+    def signature(self, username: str) -> Optional[Hashable]:
+        return self._signatures.get(username)
+
+    def is_current(self, username: str, signature: Hashable) -> bool:
+        return username in self._prints and self._signatures.get(username) == signature
+
+    def upsert(self, username: str, prints: np.ndarray, signature: Hashable = None) -> None:
+        """유저의 등록 임베딩을 추가/교체. prints 는 (D,) 또는 (K, D)."""
+        prints = normalize_rows(prints)
+        if prints.shape[1] != self.dim:
+            raise ValueError(
+                f"embedding dim mismatch for '{username}': {prints.shape[1]} != {self.dim}"
+            )
+        self._prints[username] = prints
+        self._signatures[username] = signature
+        self._matrix = None
+
+    def remove(self, username: str) -> None:
+        if self._prints.pop(username, None) is not None:
+            self._signatures.pop(username, None)
+            self._matrix = None
+
+    def retain(self, usernames) -> None:
+        """usernames 에 없는 유저는 인덱스에서 제거."""
+        keep = set(usernames)
+        for username in [u for u in self._prints if u not in keep]:
+            self.remove(username)
+
+    def _build_matrix(self) -> None:
+        rows = []
+        row_users = []
+        for username, prints in self._prints.items():
+            rows.append(prints)
+            row_users.extend([username] * prints.shape[0])
+
+        if rows:
+            self._matrix = np.vstack(rows)
+        else:
+            self._matrix = np.zeros((0, self.dim), dtype=np.float32)
+        self._row_users = row_users
+
+    def scores(self, probe: np.ndarray) -> Dict[str, float]:
+        """probe 임베딩에 대한 유저별 최고 cosine similarity."""
+        if self._matrix is None:
+            self._build_matrix()
+
+        if not self._row_users:
+            return {}
+
+        probe = normalize_rows(probe)[0]
+        row_scores = self._matrix @ probe  # (M,)
+
+        best: Dict[str, float] = {}
+        for username, score in zip(self._row_users, row_scores.tolist()):
+            if score > best.get(username, float("-inf")):
+                best[username] = score
+        return best
+
+    def best_match(self, probe: np.ndarray) -> Tuple[Optional[str], float]:
+        """(가장 점수가 높은 유저, 점수). 인덱스가 비어 있으면 (None, -inf)."""
+        per_user = self.scores(probe)
+        if not per_user:
+            return None, float("-inf")
+        username = max(per_user, key=per_user.get)
+        return username, per_user[username]
@@ -0,0 +1,378 @@
+# src/smarterspeaker/speaker/keyword_spotter.py
+
+import os
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from smarterspeaker.config import (
+    SAMPLE_RATE,
+    RECORD_SECONDS,
+    WAKE_TEMPLATE_DIR,
+    WAKE_DTW_THRESHOLD,
+    WAKE_CONFIRM_INTERVAL,
+    WAKE_CONFIRM_MAX_INTERVAL,
+    WAKE_PRE_SILENCE_MS,
+)
+from .vad import EnergyVAD, to_float32
+
+# =========================================================
+#  MFCC (numpy 만 사용, 10ms hop)
+# =========================================================
+
+N_FFT = 512
+WIN_MS = 25
+HOP_MS = 10
+N_MELS = 26
+N_MFCC = 13
+
+
+def _hz_to_mel(hz):
+    return 2595.0 * np.log10(1.0 + np.asarray(hz) / 700.0)
+
+
+def _mel_to_hz(mel):
+    return 700.0 * (10.0 ** (np.asarray(mel) / 2595.0) - 1.0)
+
+
+def _mel_filterbank(sample_rate: int, n_fft: int = N_FFT, n_mels: int = N_MELS) -> np.ndarray:
+    mel_points = np.linspace(_hz_to_mel(20.0), _hz_to_mel(sample_rate / 2), n_mels + 2)
+    bins = np.floor((n_fft + 1) * _mel_to_hz(mel_points) / sample_rate).astype(int)
+
+    fbank = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+    for m in range(1, n_mels + 1):
+        left, center, right = bins[m - 1], bins[m], bins[m + 1]
+        for k in range(left, center):
+            fbank[m - 1, k] = (k - left) / max(center - left, 1)
+        for k in range(center, right):
+            fbank[m - 1, k] = (right - k) / max(right - center, 1)
+    return fbank
+
+
+def _dct_matrix(n_in: int = N_MELS, n_out: int = N_MFCC) -> np.ndarray:
+    n = np.arange(n_in)
+    k = np.arange(n_out)[:, None]
+    return np.cos(np.pi / n_in * (n + 0.5) * k).astype(np.float32)
+
+
+_FBANK_CACHE: Dict[int, np.ndarray] = {}
+_DCT = _dct_matrix()
+
+
+def mfcc(signal: np.ndarray, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """float32 mono 신호 -> (frames, 13) MFCC (평균 정규화까지 적용)."""
+    signal = to_float32(signal)
+    win = int(sample_rate * WIN_MS / 1000)
+    hop = int(sample_rate * HOP_MS / 1000)
+    if signal.size < win:
+        signal = np.pad(signal, (0, win - signal.size))
+
+    # pre-emphasis
+    emphasized = np.append(signal[0], signal[1:] - 0.97 * signal[:-1])
+
+    n_frames = 1 + (emphasized.size - win) // hop
+    idx = np.arange(win)[None, :] + hop * np.arange(n_frames)[:, None]
+    frames = emphasized[idx] * np.hamming(win).astype(np.float32)
+
+    power = (np.abs(np.fft.rfft(frames, N_FFT)) ** 2) / N_FFT
+
+    fbank = _FBANK_CACHE.get(sample_rate)
+    if fbank is None:
+        fbank = _FBANK_CACHE[sample_rate] = _mel_filterbank(sample_rate)
+
+    mel = np.log(power @ fbank.T + 1e-10)
+    coeffs = mel @ _DCT.T
+    return coeffs - coeffs.mean(axis=0, keepdims=True)  # CMN
+
+
+def dtw_distance(a: np.ndarray, b: np.ndarray, band: float = 0.3) -> float:
+    """두 MFCC 시퀀스의 DTW 거리 (경로 길이로 정규화, Sakoe-Chiba band)."""
+    n, m = len(a), len(b)
+    if n == 0 or m == 0:
+        return float("inf")
+
+    cost = np.sqrt(((a[:, None, :] - b[None, :, :]) ** 2).sum(axis=2))
+    width = max(int(band * max(n, m)), abs(n - m) + 1)
+
+    acc = np.full((n + 1, m + 1), np.inf, dtype=np.float64)
+    acc[0, 0] = 0.0
+    for i in range(1, n + 1):
+        center = int(i * m / n)
+        lo = max(1, center - width)
+        hi = min(m, center + width)
+        for j in range(lo, hi + 1):
+            acc[i, j] = cost[i - 1, j - 1] + min(acc[i - 1, j - 1], acc[i - 1, j], acc[i, j - 1])
+
+    return float(acc[n, m] / (n + m))
+
+
+def trim_silence(audio: np.ndarray, sample_rate: int = SAMPLE_RATE, ratio: float = 0.1) -> np.ndarray:
+    """앞뒤 무음 제거 (가장 큰 hop 에너지의 ratio 배 미만인 구간)."""
+    audio = to_float32(audio)
+    hop = int(sample_rate * HOP_MS / 1000)
+    n = audio.size // hop
+    if n == 0:
+        return audio
+    rms = np.sqrt((audio[:n * hop].reshape(n, hop) ** 2).mean(axis=1))
+    voiced = np.nonzero(rms >= rms.max() * ratio)[0]
+    if voiced.size == 0:
+        return audio
+    return audio[voiced[0] * hop:(voiced[-1] + 1) * hop]
+
+
+def phrase_slug(phrase: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", phrase.lower()).strip("_")
+
+
+# =========================================================
+#  스트리밍 키워드 스포터
+# =========================================================
+
+@dataclass
+class WakeHit:
+    phrase: Optional[str]        # 템플릿 매칭된 문구 (템플릿이 없으면 None)
+    distance: float
+    audio: np.ndarray            # 히트 시점까지의 최근 RECORD_SECONDS 오디오 (float32)
+    needs_confirmation: bool     # True 면 Whisper 로 한 번 더 확인해야 함
+    latency: float               # 발화 끝 ~ 판정까지 걸린 시간 (초)
+
+
+class KeywordSpotter:
+    """
+    마이크 프레임을 10ms hop 으로 받아서 wake word 를 찾는 스트리밍 스포터.
+
+    - 평소에는 hop 마다 에너지만 계산 (거의 CPU 안 씀)
+    - 짧은 음성 구간이 끝나면 그 구간의 MFCC 를 등록된 템플릿들과 DTW 로 비교
+    - 문구별 템플릿이 하나도 없으면 "후보"로만 올려보내고 호출한 쪽에서 Whisper 로 확인
+      (앞이 조용했던 짧은 발화만, confirm_interval 간격으로. 확인이 계속 실패하면
+       - TV / 대화 - 간격을 max_confirm_interval 까지 두 배씩 늘림. confirmation_result() 로 결과 전달)
+
+    템플릿은 WAKE_TEMPLATE_DIR/<phrase_slug>/*.wav 에 두거나
+    `python -m smarterspeaker.speaker.keyword_spotter "hello"` 로 녹음한다.
+    """
+
+    def __init__(
+        self,
+        phrases: Iterable[str],
+        template_dir: Path = WAKE_TEMPLATE_DIR,
+        sample_rate: int = SAMPLE_RATE,
+        threshold: float = WAKE_DTW_THRESHOLD,
+        context_seconds: float = RECORD_SECONDS,
+        min_speech_ms: int = 200,
+        max_speech_ms: int = 1500,
+        trailing_silence_ms: int = 250,
+        pre_silence_ms: int = WAKE_PRE_SILENCE_MS,
+        confirm_interval: float = WAKE_CONFIRM_INTERVAL,
+        max_confirm_interval: float = WAKE_CONFIRM_MAX_INTERVAL,
+        clock=time.monotonic,
+    ):
+        self.phrases = [p.strip().lower() for p in phrases if p.strip()]
+        self.template_dir = Path(template_dir)
+        self.sample_rate = sample_rate
+        self.threshold = threshold
+
+        self.vad = EnergyVAD(sample_rate, hop_ms=HOP_MS)
+        self.hop_size = self.vad.hop_size
+        self.min_speech_hops = min_speech_ms // HOP_MS
+        self.max_speech_hops = max_speech_ms // HOP_MS
+        self.trailing_hops = trailing_silence_ms // HOP_MS
+        self.pre_silence_hops = pre_silence_ms // HOP_MS
+
+        # Whisper 확인 후보 간격 (확인 실패가 이어지면 늘어남)
+        self.confirm_interval = confirm_interval
+        self.max_confirm_interval = max_confirm_interval
+        self.clock = clock
+        self._confirm_gap = confirm_interval
+        self._next_confirm_at = 0.0
+        self.skipped_candidates = 0
+
+        # 최근 context_seconds 만큼의 hop 들 (+ hop 별 VAD 결과)
+        self._hops = deque(maxlen=int(context_seconds * 1000 / HOP_MS))
+        self._speech_flags = deque(maxlen=self._hops.maxlen)
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._speech_hops = 0
+        self._silence_hops = 0
+        self._in_speech = False
+
+        self.templates: Dict[str, List[np.ndarray]] = {}
+        self.reload_templates()
+
+    # -----------------------------------------------------
+    #  템플릿
+    # -----------------------------------------------------
+
+    def reload_templates(self) -> None:
+        import soundfile as sf
+
+        self.templates = {}
+        for phrase in self.phrases:
+            folder = self.template_dir / phrase_slug(phrase)
+            feats = []
+            if folder.exists():
+                for name in sorted(os.listdir(folder)):
+                    if not name.lower().endswith(".wav"):
+                        continue
+                    data, sr = sf.read(folder / name, dtype="float32", always_2d=True)
+                    feats.append(mfcc(data.mean(axis=1), sr))
+            self.templates[phrase] = feats
+
+        counts = {p: len(t) for p, t in self.templates.items()}
+        print(f"[WAKE] templates loaded: {counts}")
+        missing = [p for p, t in self.templates.items() if not t]
+        if missing:
+            print(
+                f"[WARN] no wake templates for {missing} in {self.template_dir}: "
+                f"candidates go to Whisper (rate-limited). Record some with "
+                f"`python -m smarterspeaker.speaker.keyword_spotter \"<phrase>\"`"
+            )
+
+    def enroll_template(self, phrase: str, audio: np.ndarray) -> Path:
+        """phrase 의 템플릿 하나를 저장하고 바로 반영."""
+        import soundfile as sf
+
+        audio = trim_silence(audio, self.sample_rate)
+        phrase = phrase.strip().lower()
+        folder = self.template_dir / phrase_slug(phrase)
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / f"{int(time.time() * 1000)}.wav"
+        sf.write(path, to_float32(audio), self.sample_rate)
+
+        if phrase not in self.phrases:
+            self.phrases.append(phrase)
+        self.templates.setdefault(phrase, []).append(mfcc(audio, self.sample_rate))
+        return path
+
+    # -----------------------------------------------------
+    #  스트리밍
+    # -----------------------------------------------------
+
+    def reset(self) -> None:
+        self._hops.clear()
+        self._speech_flags.clear()
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._speech_hops = 0
+        self._silence_hops = 0
+        self._in_speech = False
+
+    def push(self, frames: np.ndarray) -> Optional[WakeHit]:
+        """마이크 프레임(int16/float32) 을 넣는다. wake word 후보가 잡히면 WakeHit 반환."""
+        data = to_float32(frames)
+        if self._pending.size:
+            data = np.concatenate([self._pending, data])
+
+        hit = None
+        n_full = data.size // self.hop_size
+        for k in range(n_full):
+            hop = data[k * self.hop_size:(k + 1) * self.hop_size]
+            result = self._push_hop(hop)
+            if result is not None and hit is None:
+                hit = result
+
+        self._pending = data[n_full * self.hop_size:].copy()
+        return hit
+
+    def _push_hop(self, hop: np.ndarray) -> Optional[WakeHit]:
+        self._hops.append(hop)
+        speech = self.vad.is_speech(hop)
+        self._speech_flags.append(speech)
+
+        if not self._in_speech:
+            if speech:
+                self._in_speech = True
+                self._speech_hops = 1
+                self._silence_hops = 0
+            return None
+
+        self._speech_hops += 1
+        self._silence_hops = 0 if speech else self._silence_hops + 1
+
+        too_long = self._speech_hops > self.max_speech_hops
+        ended = self._silence_hops >= self.trailing_hops
+
+        if not (ended or too_long):
+            return None
+
+        total_hops = self._speech_hops
+        silence_hops = self._silence_hops
+        self._in_speech = False
+        self._speech_hops = 0
+        self._silence_hops = 0
+
+        # wake word 길이가 아니면 무시 (너무 짧은 잡음 / 긴 대화)
+        if too_long or total_hops - silence_hops < self.min_speech_hops:
+            return None
+
+        started = time.perf_counter()
+        hops = list(self._hops)
+        segment = np.concatenate(hops[-total_hops:len(hops) - silence_hops])
+        return self._match(segment, np.concatenate(hops), started, self._isolated(total_hops))
+
+    def _isolated(self, total_hops: int) -> bool:
+        """발화 시작 전 pre_silence_hops 동안 조용했는지 (기록이 모자라면 조용했던 걸로)"""
+        flags = list(self._speech_flags)
+        before = flags[max(0, len(flags) - total_hops - self.pre_silence_hops):max(0, len(flags) - total_hops)]
+        return not any(before)
+
+    def _candidate(self, distance: float, context: np.ndarray, started: float, isolated: bool) -> Optional[WakeHit]:
+        """Whisper 확인 후보. 말 중간에 나온 구간이나 확인 간격 안의 후보는 버림"""
+        now = self.clock()
+        if not isolated or now < self._next_confirm_at:
+            self.skipped_candidates += 1
+            return None
+        self._next_confirm_at = now + self._confirm_gap
+        return WakeHit(None, distance, context, True, time.perf_counter() - started)
+
+    def confirmation_result(self, activated: bool) -> None:
+        """호출한 쪽의 Whisper 확인 결과. 계속 아니면 (TV / 대화) 확인 간격을 두 배씩 늘림"""
+        if activated:
+            self._confirm_gap = self.confirm_interval
+            self._next_confirm_at = 0.0
+        else:
+            self._confirm_gap = min(self._confirm_gap * 2, self.max_confirm_interval)
+            self._next_confirm_at = self.clock() + self._confirm_gap
+
+    def _match(self, segment: np.ndarray, context: np.ndarray, started: float,
+               isolated: bool = True) -> Optional[WakeHit]:
+        has_templates = any(self.templates.values())
+        if not has_templates:
+            # 템플릿이 없으면 음성 구간을 후보로 올려서 Whisper 로 확인
+            return self._candidate(float("inf"), context, started, isolated)
+
+        feats = mfcc(segment, self.sample_rate)
+        best_phrase, best_dist = None, float("inf")
+        for phrase, templates in self.templates.items():
+            for template in templates:
+                dist = dtw_distance(feats, template)
+                if dist < best_dist:
+                    best_phrase, best_dist = phrase, dist
+
+        latency = time.perf_counter() - started
+        if best_dist <= self.threshold:
+            print(f"[WAKE] '{best_phrase}' dist={best_dist:.2f} ({latency * 1000:.0f} ms)")
+            return WakeHit(best_phrase, best_dist, context, False, latency)
+
+        # 템플릿 없는 문구가 있으면 그 문구일 수도 있으니 Whisper 확인으로 넘김
+        if any(not t for t in self.templates.values()):
+            return self._candidate(best_dist, context, started, isolated)
+        return None
+
+
+if __name__ == "__main__":
+    # 템플릿 녹음: python -m smarterspeaker.speaker.keyword_spotter "hello" [횟수]
+    import sys
+    import sounddevice as sd
+
+    phrase = sys.argv[1] if len(sys.argv) > 1 else "hello"
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    spotter = KeywordSpotter([phrase])
+
+    for i in range(count):
+        input(f"[{i + 1}/{count}] Press Enter and say '{phrase}'...")
+        audio = sd.rec(int(1.5 * SAMPLE_RATE), samplerate=SAMPLE_RATE, channels=1, dtype="float32")
+        sd.wait()
+        print("✅ Saved", spotter.enroll_template(phrase, audio[:, 0]))
@@ -0,0 +1,601 @@
+# src/smarterspeaker/speaker/model_host.py
+"""
+모델 호스트: Whisper / ECAPA 를 머신에서 한 번만 로드하고 로컬 소켓으로 요청을 받는다.
+
+예전에는 프로세스마다 모델을 따로 들고 있었다.
+- speaker_verification: import 할 때 _ecapa 한 번 + SpeakerVerifier() 에서 또 한 번 (ECAPA 2개)
+- AudioToText: Whisper 를 쓰는 프로세스마다 하나씩
+- 스피커 루프 / API(음성 업로드) / backfill 스크립트가 각자 torch + 모델을 올림
+
+실행 (src/ 에서, 다른 프로세스보다 먼저):
+    python -m smarterspeaker.speaker.model_host
+    python -m smarterspeaker.speaker.model_host --whisper-model base small   # 미리 올릴 Whisper 크기
+
+클라이언트는 get_encoder() / get_whisper() 만 쓰면 된다 (MODEL_HOST 설정):
+- auto: 호스트가 떠 있으면 호스트 사용, 없으면 이 프로세스에서 한 번만 로드
+- on  : 호스트만 사용 (없으면 에러)
+- off : 항상 로컬 로드
+
+- 전송: multiprocessing.connection (TCP localhost 또는 unix 소켓 경로, authkey 인증)
+  요청/응답이 pickle 이라 키가 곧 실행 권한: MODEL_HOST_AUTHKEY 를 안 정했으면 호스트가 실행마다
+  랜덤 키를 MODEL_HOST_KEY_FILE (0600) 에 쓰고 클라이언트가 연결할 때 읽음. unix 소켓도 0600
+- 임베딩: MODEL_HOST_BATCH_MS 동안 들어온 요청을 모아서 encode_batch 한 번 (길이가 다르면 0 으로 채우고 wav_lens 로 마스킹)
+- 전사: faster-whisper 는 호출 하나에 클립 하나라서 모델별 큐에서 순서대로 처리
+"""
+import argparse
+import os
+import queue
+import secrets
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+
+from smarterspeaker.config import (
+    MODEL_HOST,
+    MODEL_HOST_ADDRESS,
+    MODEL_HOST_AUTHKEY,
+    MODEL_HOST_BATCH_MS,
+    MODEL_HOST_KEY_FILE,
+    MODEL_HOST_MAX_BATCH,
+    SAMPLE_RATE,
+    WHISPER_MODEL,
+)
+from smarterspeaker.speaker.embedding_index import EMBEDDING_DIM
+
+ECAPA_SOURCE = "speechbrain/spkrec-ecapa-voxceleb"
+ECAPA_SAVEDIR = "pretrained_models/spkrec-ecapa-voxceleb"
+
+SampleRates = Union[int, Sequence[int]]
+
+
+class ModelHostUnavailable(ConnectionError):
+    """호스트에 연결할 수 없음 (안 떠 있거나 죽었음)"""
+
+
+class ModelHostError(RuntimeError):
+    """호스트에서 요청 처리 중 난 에러"""
+
+
+def parse_address(address: str):
+    """"127.0.0.1:50710" -> ("127.0.0.1", 50710), 그 외는 unix 소켓 경로 / named pipe 그대로"""
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit():
+        return host or "127.0.0.1", int(port)
+    return address
+
+
+def create_authkey(path: Path = MODEL_HOST_KEY_FILE) -> bytes:
+    """이번 실행용 랜덤 키를 만들어 path 에 씀 (이 유저만 읽기/쓰기, 0600)"""
+    key = secrets.token_hex(32).encode()
+    path = Path(path)
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    if tmp.exists():
+        tmp.unlink()
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    os.replace(tmp, path)
+    return key
+
+
+def load_authkey(path: Path = MODEL_HOST_KEY_FILE) -> bytes:
+    """호스트가 create_authkey 로 쓴 키 (MODEL_HOST_AUTHKEY 를 안 정했을 때)"""
+    try:
+        key = Path(path).read_bytes().strip()
+    except OSError as e:
+        raise ModelHostUnavailable(f"no model host key at {path}: {e}") from e
+    if not key:
+        raise ModelHostUnavailable(f"empty model host key at {path}")
+    return key
+
+
+def to_mono(data) -> np.ndarray:
+    """(samples,) 또는 (samples, channels) -> float32 (samples,)"""
+    data = np.asarray(data, dtype=np.float32)
+    if data.ndim == 2:
+        data = data.mean(axis=1)  # stereo -> mono
+    return np.ascontiguousarray(data.reshape(-1))
+
+
+# -----------------------------------------------------
+#  로컬 모델 (호스트 프로세스, 또는 호스트 없이 쓸 때)
+# -----------------------------------------------------
+
+class LocalEncoder:
+    """ECAPA EncoderClassifier 하나. 여러 음성을 0 패딩 + wav_lens 로 한 번에 인코딩"""
+
+    def __init__(self):
+        import torch
+        from speechbrain.inference import EncoderClassifier
+        from speechbrain.utils.fetching import LocalStrategy
+
+        self.torch = torch
+        self.model = EncoderClassifier.from_hparams(
+            source=ECAPA_SOURCE,
+            savedir=ECAPA_SAVEDIR,
+            # 🔥 윈도우에서 symlink 못 쓰니까 그냥 복사 전략으로 강제
+            local_strategy=LocalStrategy.COPY,
+        )
+
+    def _prepare(self, data, sample_rate: int):
+        waveform = self.torch.from_numpy(to_mono(data))
+        if sample_rate != SAMPLE_RATE:
+            # encode_file 처럼 모델 샘플레이트(16kHz)로 맞춤
+            import torchaudio
+
+            waveform = torchaudio.functional.resample(waveform, sample_rate, SAMPLE_RATE)
+        return waveform
+
+    def encode(self, waveforms: Sequence[np.ndarray], sample_rates: SampleRates = SAMPLE_RATE) -> np.ndarray:
+        """음성 n 개 -> (n, 192) 임베딩"""
+        if isinstance(sample_rates, int):
+            sample_rates = [sample_rates] * len(waveforms)
+        tensors = [self._prepare(w, sr) for w, sr in zip(waveforms, sample_rates)]
+
+        longest = max(t.shape[0] for t in tensors)
+        batch = self.torch.zeros(len(tensors), longest)
+        for i, t in enumerate(tensors):
+            batch[i, :t.shape[0]] = t
+        wav_lens = self.torch.tensor([t.shape[0] / longest for t in tensors])
+
+        with self.torch.no_grad():
+            emb = self.model.encode_batch(batch, wav_lens)  # (n, 1, 192)
+        return emb.squeeze(1).cpu().numpy()
+
+
+def load_local_whisper(model_size: str):
+    from faster_whisper import WhisperModel
+
+    return WhisperModel(model_size, device="cpu", compute_type="int8")
+
+
+# -----------------------------------------------------
+#  호스트 -> 클라이언트 전사 결과 (클라이언트에 faster-whisper 가 없어도 unpickle 되게)
+# -----------------------------------------------------
+
+class HostWord(NamedTuple):
+    start: float
+    end: float
+    word: str
+    probability: float
+
+
+class HostSegment(NamedTuple):
+    start: float
+    end: float
+    text: str
+    words: Optional[List[HostWord]]
+
+
+class HostInfo(NamedTuple):
+    language: str
+    language_probability: float
+    duration: float
+
+
+def _plain_transcription(segments, info):
+    """faster-whisper 제너레이터를 호스트에서 끝까지 돌려서 보낼 수 있는 값으로"""
+    plain = [
+        HostSegment(
+            s.start,
+            s.end,
+            s.text,
+            [HostWord(w.start, w.end, w.word, w.probability) for w in s.words] if s.words else None,
+        )
+        for s in segments
+    ]
+    return plain, HostInfo(info.language, info.language_probability, info.duration)
+
+
+# -----------------------------------------------------
+#  서버
+# -----------------------------------------------------
+
+@dataclass
+class _EmbedRequest:
+    waveforms: List[np.ndarray]
+    sample_rates: List[int]
+    future: Future
+
+
+@dataclass
+class _TranscribeRequest:
+    audio: Union[str, np.ndarray]
+    options: dict
+    future: Future
+
+
+class ModelHost:
+    def __init__(
+        self,
+        address: str = MODEL_HOST_ADDRESS,
+        authkey: Optional[bytes] = MODEL_HOST_AUTHKEY,
+        batch_ms: float = MODEL_HOST_BATCH_MS,
+        max_batch: int = MODEL_HOST_MAX_BATCH,
+        key_file: Path = MODEL_HOST_KEY_FILE,
+    ):
+        self.address = address
+        self.authkey = authkey      # None 이면 serve_forever 에서 랜덤 키 생성
+        self.key_file = Path(key_file)
+        self.batch_seconds = batch_ms / 1000.0
+        self.max_batch = max_batch
+
+        self._lock = threading.Lock()
+        self._encoder: Optional[LocalEncoder] = None
+        self._embed_queue: "queue.Queue[_EmbedRequest]" = queue.Queue()
+        # Whisper 크기별 (모델, 큐) - 모델 하나는 워커 하나가 순서대로 사용
+        self._whisper: Dict[str, object] = {}
+        self._stt_queues: Dict[str, "queue.Queue[_TranscribeRequest]"] = {}
+
+        # 연결 스레드 / 워커 스레드가 같이 올리는 카운터 (_count 로만 변경)
+        self._stats_lock = threading.Lock()
+        self.stats = {"embed_requests": 0, "embed_batches": 0, "embed_items": 0, "transcribe_requests": 0}
+
+    def _count(self, **increments: int) -> None:
+        with self._stats_lock:
+            for key, n in increments.items():
+                self.stats[key] += n
+
+    def stats_snapshot(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return dict(self.stats)
+
+    # --- 모델 로드 (한 번만) ---
+
+    def encoder(self) -> LocalEncoder:
+        with self._lock:
+            if self._encoder is None:
+                started = time.perf_counter()
+                self._encoder = LocalEncoder()
+                print(f"[MODEL] ECAPA loaded in {time.perf_counter() - started:.1f}s")
+            return self._encoder
+
+    def whisper(self, model_size: str):
+        with self._lock:
+            if model_size not in self._whisper:
+                started = time.perf_counter()
+                self._whisper[model_size] = load_local_whisper(model_size)
+                print(f"[MODEL] Whisper '{model_size}' loaded in {time.perf_counter() - started:.1f}s")
+            return self._whisper[model_size]
+
+    def preload(self, whisper_models: Sequence[str] = (WHISPER_MODEL,)) -> None:
+        self.encoder()
+        for model_size in whisper_models:
+            self.whisper(model_size)
+
+    # --- 임베딩: 짧게 모아서 한 번에 ---
+
+    def _embed_worker(self) -> None:
+        while True:
+            batch = [self._embed_queue.get()]
+            count = len(batch[0].waveforms)
+            deadline = time.monotonic() + self.batch_seconds
+            while count < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self._embed_queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                count += len(request.waveforms)
+            self._run_embed_batch(batch)
+
+    def _run_embed_batch(self, batch: List[_EmbedRequest]) -> None:
+        try:
+            vectors = self.encoder().encode(
+                [w for r in batch for w in r.waveforms],
+                [sr for r in batch for sr in r.sample_rates],
+            )
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0].future.set_exception(e)
+                return
+            # 망가진 음성 하나 때문에 같이 묶인 요청까지 실패하지 않게 하나씩 다시
+            for request in batch:
+                self._run_embed_batch([request])
+            return
+
+        self._count(embed_batches=1, embed_items=len(vectors))
+        pos = 0
+        for request in batch:
+            n = len(request.waveforms)
+            request.future.set_result(vectors[pos:pos + n])
+            pos += n
+
+    def embed(self, waveforms: List[np.ndarray], sample_rates: List[int]) -> np.ndarray:
+        if not waveforms:
+            return np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+        self._count(embed_requests=1)
+        request = _EmbedRequest(waveforms, sample_rates, Future())
+        self._embed_queue.put(request)
+        return request.future.result()
+
+    # --- 전사: 모델별 큐 ---
+
+    def _stt_worker(self, model_size: str, requests: "queue.Queue[_TranscribeRequest]") -> None:
+        while True:
+            request = requests.get()
+            try:
+                segments, info = self.whisper(model_size).transcribe(request.audio, **request.options)
+                request.future.set_result(_plain_transcription(segments, info))
+            except Exception as e:
+                request.future.set_exception(e)
+
+    def transcribe(self, model_size: str, audio, options: dict):
+        with self._lock:
+            requests = self._stt_queues.get(model_size)
+            if requests is None:
+                requests = self._stt_queues[model_size] = queue.Queue()
+                threading.Thread(target=self._stt_worker, args=(model_size, requests), daemon=True).start()
+        self._count(transcribe_requests=1)
+        request = _TranscribeRequest(audio, options, Future())
+        requests.put(request)
+        return request.future.result()
+
+    # --- 연결 처리 ---
+
+    def _dispatch(self, op: str, payload):
+        if op == "embed":
+            return self.embed(*payload)
+        if op == "transcribe":
+            return self.transcribe(*payload)
+        if op == "ping":
+            return {
+                "pid": os.getpid(),
+                "ecapa": self._encoder is not None,
+                "whisper": sorted(self._whisper),
+                **self.stats_snapshot(),
+            }
+        raise ValueError(f"unknown op: {op}")
+
+    def _serve(self, conn) -> None:
+        with conn:
+            while True:
+                try:
+                    op, payload = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    reply = ("ok", self._dispatch(op, payload))
+                except Exception as e:
+                    reply = ("error", f"{type(e).__name__}: {e}")
+                try:
+                    conn.send(reply)
+                except (OSError, ValueError):
+                    return
+
+    def serve_forever(self) -> None:
+        address = parse_address(self.address)
+        if isinstance(address, str) and not address.startswith("\\\\") and os.path.exists(address):
+            os.unlink(address)  # 지난번에 남은 unix 소켓 파일
+
+        if self.authkey is None:
+            self.authkey = create_authkey(self.key_file)
+            print(f"[MODEL] MODEL_HOST_AUTHKEY not set, per-run key written to {self.key_file}")
+
+        # unix 소켓은 만들 때부터 0600 (bind 와 chmod 사이에 다른 유저가 못 붙게 umask 로)
+        unix_socket = isinstance(address, str) and os.name == "posix"
+        old_umask = os.umask(0o177) if unix_socket else None
+        try:
+            listener = Listener(address, authkey=self.authkey)
+        finally:
+            if old_umask is not None:
+                os.umask(old_umask)
+
+        threading.Thread(target=self._embed_worker, daemon=True).start()
+        with listener:
+            print(f"[MODEL] host listening on {self.address} (pid {os.getpid()})")
+            while True:
+                try:
+                    conn = listener.accept()
+                except (OSError, EOFError, AuthenticationError) as e:
+                    print("[MODEL] rejected connection:", e)
+                    continue
+                threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+
+# -----------------------------------------------------
+#  클라이언트
+# -----------------------------------------------------
+
+class ModelHostClient:
+    """연결 하나를 스레드끼리 나눠 씀 (요청/응답 한 쌍씩). 끊기면 한 번 다시 연결"""
+
+    def __init__(self, address: str = MODEL_HOST_ADDRESS, authkey: Optional[bytes] = MODEL_HOST_AUTHKEY,
+                 key_file: Path = MODEL_HOST_KEY_FILE):
+        self.address = address
+        self.authkey = authkey      # None 이면 연결할 때마다 호스트의 키 파일을 읽음 (호스트 재시작 = 새 키)
+        self.key_file = Path(key_file)
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        authkey = self.authkey or load_authkey(self.key_file)
+        try:
+            return Client(parse_address(self.address), authkey=authkey)
+        except (OSError, EOFError, AuthenticationError) as e:
+            raise ModelHostUnavailable(f"model host not reachable at {self.address}: {e}") from e
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except OSError:
+                pass
+            self._conn = None
+
+    def call(self, op: str, payload=None):
+        with self._lock:
+            for attempt in range(2):
+                if self._conn is None:
+                    self._conn = self._connect()
+                try:
+                    self._conn.send((op, payload))
+                    status, result = self._conn.recv()
+                    break
+                except (EOFError, OSError) as e:
+                    # 호스트가 재시작됐으면 새 연결로 한 번 더
+                    self._close()
+                    if attempt:
+                        raise ModelHostUnavailable(f"model host connection lost: {e}") from e
+        if status == "error":
+            raise ModelHostError(result)
+        return result
+
+    def ping(self) -> dict:
+        return self.call("ping")
+
+    def embed(self, waveforms: Sequence[np.ndarray], sample_rates: SampleRates = SAMPLE_RATE) -> np.ndarray:
+        waveforms = [to_mono(w) for w in waveforms]
+        if isinstance(sample_rates, int):
+            sample_rates = [sample_rates] * len(waveforms)
+        return self.call("embed", (waveforms, list(sample_rates)))
+
+    def transcribe(self, model_size: str, audio, options: dict):
+        if isinstance(audio, (str, Path)):
+            # 같은 머신이라 경로로 넘김 (호스트의 작업 디렉터리 기준이 안 되게 절대 경로)
+            audio = os.path.abspath(audio)
+        return self.call("transcribe", (model_size, audio, options))
+
+
+class RemoteEncoder:
+    """LocalEncoder 와 같은 encode(). auto 모드에서 호스트가 사라지면 로컬 로드로 넘어감"""
+
+    def __init__(self, client: ModelHostClient, fallback: bool = True):
+        self.client = client
+        self.fallback = fallback
+        self._local: Optional[LocalEncoder] = None
+
+    def encode(self, waveforms: Sequence[np.ndarray], sample_rates: SampleRates = SAMPLE_RATE) -> np.ndarray:
+        if self._local is None:
+            try:
+                return self.client.embed(waveforms, sample_rates)
+            except ModelHostUnavailable as e:
+                if not self.fallback:
+                    raise
+                print(f"[MODEL] {e} -> loading ECAPA in this process")
+                self._local = _local_encoder()
+        return self._local.encode(waveforms, sample_rates)
+
+
+class RemoteWhisper:
+    """WhisperModel.transcribe(audio, **options) -> (segments, info) 와 같은 모양"""
+
+    def __init__(self, client: ModelHostClient, model_size: str, fallback: bool = True):
+        self.client = client
+        self.model_size = model_size
+        self.fallback = fallback
+        self._local = None
+
+    def transcribe(self, audio, **options):
+        if self._local is None:
+            try:
+                return self.client.transcribe(self.model_size, audio, options)
+            except ModelHostUnavailable as e:
+                if not self.fallback:
+                    raise
+                print(f"[MODEL] {e} -> loading Whisper '{self.model_size}' in this process")
+                self._local = _local_whisper(self.model_size)
+        return self._local.transcribe(audio, **options)
+
+
+# -----------------------------------------------------
+#  프로세스 안에서 모델 / 프록시는 하나씩만
+# -----------------------------------------------------
+
+_models_lock = threading.RLock()
+_local_models: Dict[str, object] = {}
+_shared: Dict[str, object] = {}
+_client: Optional[ModelHostClient] = None
+_client_checked = False
+
+
+def _local_encoder() -> LocalEncoder:
+    with _models_lock:
+        if "ecapa" not in _local_models:
+            _local_models["ecapa"] = LocalEncoder()
+        return _local_models["ecapa"]
+
+
+def _local_whisper(model_size: str):
+    with _models_lock:
+        key = f"whisper:{model_size}"
+        if key not in _local_models:
+            _local_models[key] = load_local_whisper(model_size)
+        return _local_models[key]
+
+
+def host_client() -> Optional[ModelHostClient]:
+    """MODEL_HOST 설정에 따라 호스트 클라이언트 (안 쓰면 None). 처음 한 번만 확인"""
+    global _client, _client_checked
+    with _models_lock:
+        if _client_checked:
+            return _client
+        if MODEL_HOST != "off":
+            client = ModelHostClient()
+            try:
+                info = client.ping()
+                print(f"[MODEL] using model host at {client.address} (pid {info['pid']})")
+                _client = client
+            except ModelHostUnavailable as e:
+                if MODEL_HOST == "on":
+                    raise ModelHostUnavailable(
+                        f"{e} (start it with: python -m smarterspeaker.speaker.model_host)"
+                    ) from e
+                print(f"[MODEL] no model host ({e}), models load in this process")
+        _client_checked = True
+        return _client
+
+
+def get_encoder():
+    """ECAPA 인코더 (호스트 프록시 또는 이 프로세스의 LocalEncoder). encode(waveforms, sample_rates) -> (n, 192)"""
+    with _models_lock:
+        if "ecapa" not in _shared:
+            client = host_client()
+            _shared["ecapa"] = RemoteEncoder(client, fallback=MODEL_HOST == "auto") if client else _local_encoder()
+        return _shared["ecapa"]
+
+
+def get_whisper(model_size: str = WHISPER_MODEL):
+    """Whisper (호스트 프록시 또는 이 프로세스의 WhisperModel). transcribe(audio, **options) -> (segments, info)"""
+    with _models_lock:
+        key = f"whisper:{model_size}"
+        if key not in _shared:
+            client = host_client()
+            _shared[key] = (
+                RemoteWhisper(client, model_size, fallback=MODEL_HOST == "auto")
+                if client else _local_whisper(model_size)
+            )
+        return _shared[key]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve Whisper / ECAPA to every process on this machine")
+    parser.add_argument("--address", default=MODEL_HOST_ADDRESS, help="host:port or unix socket path")
+    parser.add_argument("--whisper-model", nargs="*", default=[WHISPER_MODEL],
+                        help="Whisper sizes to load at startup (others load on first request)")
+    parser.add_argument("--no-preload", action="store_true", help="load models on first request")
+    args = parser.parse_args()
+
+    host = ModelHost(address=args.address)
+    if not args.no_preload:
+        host.preload(args.whisper_model)
+    host.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
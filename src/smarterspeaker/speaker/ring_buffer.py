@@ -0,0 +1,79 @@
+# src/smarterspeaker/speaker/ring_buffer.py
+
+import numpy as np
+
+
+class AudioRingBuffer:
+    """
+    마이크 콜백(생산자 1개) -> 소비자 1개 용 int16 링버퍼. 락 없음.
+
+    - 내부 배열을 capacity 의 2배로 잡고 모든 샘플을 i, i + capacity 두 군데에 써서
+      최근 capacity 이하 구간은 항상 연속된 메모리 -> 복사 없는 NumPy view 로 꺼낼 수 있다.
+    - 위치(position)는 지금까지 쓴 전체 프레임 수 (단조 증가).
+      생산자는 데이터를 다 쓴 다음에 position 을 올리므로, 소비자는 position 까지는 안전하게 읽는다.
+
+    주의: view 는 버퍼 메모리를 그대로 가리키므로 capacity 만큼 더 녹음되면 덮어써진다.
+    오래 들고 있을 거면 .copy() 해서 쓸 것.
+    """
+
+    def __init__(self, capacity: int, dtype=np.int16):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._data = np.zeros(capacity * 2, dtype=dtype)
+        self._position = 0
+
+    @property
+    def position(self) -> int:
+        return self._position
+
+    def write(self, frames: np.ndarray) -> None:
+        """(생산자) 프레임 추가. 오디오 콜백에서 호출."""
+        frames = np.asarray(frames, dtype=self._data.dtype).reshape(-1)
+        n = frames.size
+        if n == 0:
+            return
+        if n > self.capacity:
+            frames = frames[-self.capacity:]
+            skipped = n - self.capacity
+            n = self.capacity
+        else:
+            skipped = 0
+
+        cap = self.capacity
+        start = (self._position + skipped) % cap
+        first = min(n, cap - start)
+
+        # 앞쪽 절반과 뒤쪽 절반 모두에 기록
+        self._data[start:start + first] = frames[:first]
+        self._data[start + cap:start + cap + first] = frames[:first]
+        if first < n:
+            rest = n - first
+            self._data[0:rest] = frames[first:]
+            self._data[cap:cap + rest] = frames[first:]
+
+        self._position += skipped + n
+
+    def oldest(self) -> int:
+        """아직 버퍼에 남아 있는 가장 오래된 position."""
+        return max(0, self._position - self.capacity)
+
+    def view(self, start: int, end: int = None) -> np.ndarray:
+        """
+        [start, end) position 구간의 읽기 전용 view (복사 없음).
+        이미 덮어써진 구간은 잘려서 oldest() 부터 반환된다.
+        """
+        end = self._position if end is None else min(end, self._position)
+        start = max(start, self.oldest())
+        if end <= start:
+            return self._data[0:0]
+
+        offset = start % self.capacity
+        out = self._data[offset:offset + (end - start)]
+        out = out.view()
+        out.flags.writeable = False
+        return out
+
+    def last(self, n_frames: int) -> np.ndarray:
+        """최근 n_frames 프레임 view."""
+        return self.view(self._position - n_frames)
@@ -1,36 +1,59 @@
-from speechbrain.inference import EncoderClassifier
-from speechbrain.pretrained import SpeakerRecognition
-from speechbrain.utils.fetching import LocalStrategy
-
-import json
 import soundfile as sf
-import torch
 import numpy as np
 import os
 from pathlib import Path
+from typing import List, Optional
+
+from smarterspeaker.config import SAMPLE_RATE
+from .audio_buffers import VoiceBlobCache, blob_digest, decode_wav_bytes
+from .vad import to_float32
+from .embedding_index import (
+    EMBEDDING_MODEL,
+    SpeakerEmbeddingIndex,
+    unpack_embedding,
+)
+from .model_host import get_encoder
 
 # smarterspeaker/ (루트)
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-_ecapa = SpeakerRecognition.from_hparams(
-    source="speechbrain/spkrec-ecapa-voxceleb",
-    savedir="pretrained_models/spkrec-ecapa-voxceleb",
-    # 🔥 윈도우에서 symlink 못 쓰니까 그냥 복사 전략으로 강제
-    local_strategy=LocalStrategy.COPY,
-)
-
 class SpeakerVerifier:
 
-    def __init__(self, threshold=0.4):
-        self.model = EncoderClassifier.from_hparams("speechbrain/spkrec-ecapa-voxceleb")
+    def __init__(self, threshold=0.4, cache: Optional[VoiceBlobCache] = None):
+        # ECAPA 는 프로세스(또는 모델 호스트)에 하나만 - model_host.get_encoder()
+        self.encoder = get_encoder()
         self.threshold = threshold
+        # 등록 음성 임베딩은 한 번만 계산해서 여기 보관
+        self.index = SpeakerEmbeddingIndex()
+        # (선택) blob 해시 -> 임베딩 디스크 캐시. 재시작해도 같은 blob 은 재인코딩 안 함
+        self.cache = cache
+
+    def encode_waveform(self, data: np.ndarray, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+        """(samples,) 또는 (samples, channels) float32 -> (192,) 임베딩"""
+        return self.encoder.encode([data], sample_rate)[0]
 
     def get_voice_print(self, path):
-        data, _ = sf.read(path, dtype="float32", always_2d=True)
-        data = data.mean(axis=1)  # stereo -> mono
-        waveform = torch.from_numpy(data).unsqueeze(0)  # NumPy-array -> PyTorch-tensor
-        voice_print = self.model.encode_batch(waveform)
-        return voice_print.squeeze().detach().cpu().numpy()
+        data, sample_rate = sf.read(path, dtype="float32", always_2d=True)
+        return self.encode_waveform(data, sample_rate)
+
+    def get_voice_prints(self, paths) -> np.ndarray:
+        """wav 여러 개 -> (n, 192). 한 번의 배치로 인코딩"""
+        clips = [sf.read(path, dtype="float32", always_2d=True) for path in paths]
+        return self.encoder.encode([data for data, _ in clips], [sr for _, sr in clips])
+
+    def get_voice_print_from_blob(self, blob, digest: Optional[str] = None):
+        """DB voice_blob(메모리) -> 임베딩. 파일로 쓰지 않고 바로 디코딩한다."""
+        if self.cache is not None and digest:
+            cached = self.cache.load_embedding(digest)
+            if cached is not None:
+                return cached
+
+        data, sample_rate = decode_wav_bytes(blob)
+        voice_print = self.encode_waveform(data, sample_rate)
+
+        if self.cache is not None and digest:
+            self.cache.store_embedding(digest, voice_print)
+        return voice_print
 
     def score_sample(self, sample_file, test_file):
         recorded_print = self.get_voice_print(test_file)
@@ -72,6 +95,104 @@ class SpeakerVerifier:
 
         return best_score
 
+    # -----------------------------------------------------
+    #  등록 음성 인덱스 관리
+    # -----------------------------------------------------
+
+    def _resolve_voice_dir(self, username, info) -> Optional[Path]:
+        """users.JSON 의 옛날형/새형 엔트리에서 음성 폴더 경로를 꺼낸다."""
+        # --- 1) 값이 문자열이면 옛날 구조: "voice_samples/patrick" 또는 "patrick"
+        if isinstance(info, str):
+            rel_path = info
+
+        # --- 2) dict이면 새 구조: { "age": 28, "voice_dir": "voice_samples/patrick" }
+        elif isinstance(info, dict):
+            rel_path = info.get("voice_dir")
+            if not rel_path:
+                print(f"[WARN] user '{username}' has no 'voice_dir' in users.JSON")
+                return None
+
+        else:
+            print(f"[WARN] Unsupported users entry type for '{username}': {type(info)}")
+            return None
+
+        # Path 처리
+        rel_path = Path(rel_path)
+
+        # 절대 경로가 아니면 smarterspeaker/ 기준으로 붙이기
+        if not rel_path.is_absolute():
+            return BASE_DIR / rel_path
+        return rel_path
+
+    @staticmethod
+    def _folder_signature(folder_path: Path):
+        """폴더 안 wav 파일들의 (이름, 크기, mtime) 튜플. 바뀐 게 없으면 재인코딩 안 함."""
+        entries = []
+        for entry in os.scandir(folder_path):
+            if entry.is_file() and entry.name.lower().endswith(".wav"):
+                st = entry.stat()
+                entries.append((entry.name, st.st_size, st.st_mtime_ns))
+        return tuple(sorted(entries))
+
+    def refresh_index(self, users) -> None:
+        """
+        users 딕셔너리 기준으로 인덱스를 증분 갱신.
+        - 새로 생겼거나 음성 파일이 바뀐 유저만 다시 인코딩
+        - users 에서 사라진 유저는 인덱스에서 제거
+        """
+        for username, info in users.items():
+            # DB에 미리 계산된 임베딩이 있으면 오디오 디코딩 없이 바로 사용
+            if isinstance(info, dict) and info.get("embedding") is not None:
+                signature = info.get("signature")
+                if signature is None:
+                    signature = np.asarray(info["embedding"]).tobytes()
+                if not self.index.is_current(username, signature):
+                    self.index.upsert(username, info["embedding"], signature)
+                continue
+
+            # 임베딩이 없는 DB 프로필: blob 을 메모리에서 바로 디코딩
+            if isinstance(info, dict) and info.get("voice_blob") is not None:
+                signature = info.get("signature") or blob_digest(info["voice_blob"])
+                if self.index.is_current(username, signature):
+                    continue
+                try:
+                    print(f"[DEBUG] Encoding in-memory voice blob for '{username}'")
+                    voice_print = self.get_voice_print_from_blob(info["voice_blob"], signature)
+                    self.index.upsert(username, voice_print, signature)
+                except Exception as e:
+                    print(f"[ERROR] Error decoding voice blob for '{username}': {e}")
+                    self.index.remove(username)
+                continue
+
+            folder_path = self._resolve_voice_dir(username, info)
+            if folder_path is None:
+                continue
+
+            if not folder_path.exists():
+                print(f"[WARNING] Folder not found: {folder_path}")
+                self.index.remove(username)
+                continue
+
+            try:
+                signature = self._folder_signature(folder_path)
+                if self.index.is_current(username, signature):
+                    continue
+
+                if not signature:
+                    print(f"[INFO] No .wav files in {folder_path}")
+                    self.index.remove(username)
+                    continue
+
+                print(f"[DEBUG] Encoding voice prints for '{username}' in folder: {folder_path}")
+                prints = self.get_voice_prints([folder_path / filename for filename, _, _ in signature])
+                self.index.upsert(username, prints, signature)
+
+            except Exception as e:
+                print(f"[ERROR] Error processing {folder_path}: {e}")
+                self.index.remove(username)
+
+        self.index.retain(users.keys())
+
     def identify_speaker(self, audio_file, users, threshold):
         """
         users.JSON 구조를 둘 다 지원:
@@ -89,43 +210,40 @@ class SpeakerVerifier:
               },
               ...
             }
-        """
-        best_user = None
-        best_score = float("-inf")
 
-        for username, info in users.items():
-            # --- 1) 값이 문자열이면 옛날 구조: "voice_samples/patrick" 또는 "patrick"
-            if isinstance(info, str):
-                rel_path = info
-
-            # --- 2) dict이면 새 구조: { "age": 28, "voice_dir": "voice_samples/patrick" }
-            elif isinstance(info, dict):
-                rel_path = info.get("voice_dir")
-                if not rel_path:
-                    print(f"[WARN] user '{username}' has no 'voice_dir' in users.JSON")
-                    continue
-
-            else:
-                print(f"[WARN] Unsupported users entry type for '{username}': {type(info)}")
-                continue
-
-            # Path 처리
-            rel_path = Path(rel_path)
+        3) DB형 (load_speaker_users 가 만들어 줌)
+            {
+              "daniel@gmail.com": {
+                "embedding": np.ndarray (192,),   # 미리 계산된 임베딩
+                "signature": ...
+              },
+              "mom@gmail.com": {
+                "voice_blob": memoryview(...),    # 임베딩 없는 프로필: 메모리에서 디코딩
+                "signature": "<sha256>"
+              },
+              ...
+            }
 
-            # 절대 경로가 아니면 smarterspeaker/ 기준으로 붙이기
-            if not rel_path.is_absolute():
-                folder_path = BASE_DIR / rel_path
-            else:
-                folder_path = rel_path
+        등록 음성은 인덱스에 캐시되어 있고, 녹음된 음성(probe)은
+        딱 한 번만 인코딩해서 전체 유저와 행렬곱 한 번으로 비교한다.
+        """
+        self.refresh_index(users)
 
-            print(f"[DEBUG] Checking user '{username}' in folder: {folder_path}")
+        if len(self.index) == 0:
+            print("No match: no enrolled voice prints")
+            return None
 
-            score = self.best_match_for_folder(audio_file, folder_path)
+        # audio_file: wav 경로 또는 VoiceRecorder 에서 꺼낸 배열
+        if isinstance(audio_file, np.ndarray):
+            probe = self.encode_waveform(to_float32(audio_file))
+        else:
+            probe = self.get_voice_print(audio_file)
+        per_user = self.index.scores(probe)
+        for username, score in per_user.items():
             print(f"[DEBUG] {username}: {score:.3f}")
 
-            if score > best_score:
-                best_score = score
-                best_user = username
+        best_user = max(per_user, key=per_user.get)
+        best_score = per_user[best_user]
 
         if best_score >= threshold:
             print(f"Match: {best_score}")
@@ -139,10 +257,23 @@ def extract_embedding(wav_path: str) -> np.ndarray:
     """
     3초 wav -> (192,) ECAPA 임베딩 반환
     """
-    with torch.no_grad():
-        emb = _ecapa.encode_file(wav_path)  # shape: (1, 192)
-    emb = emb.squeeze(0).cpu().numpy()
-    return emb
+    data, sample_rate = sf.read(wav_path, dtype="float32", always_2d=True)
+    return get_encoder().encode([data], sample_rate)[0]
+
+
+def extract_embedding_from_bytes(wav_bytes: bytes) -> np.ndarray:
+    """
+    wav 바이트(업로드된 음성) -> (192,) ECAPA 임베딩.
+    업로드 시점에 한 번만 호출해서 user_voice_profiles.embedding 에 저장한다.
+    """
+    data, sample_rate = decode_wav_bytes(wav_bytes)
+    return get_encoder().encode([data], sample_rate)[0]
+
+
+def extract_embeddings_from_bytes(blobs: List[bytes]) -> np.ndarray:
+    """wav 바이트 여러 개 -> (n, 192). backfill 처럼 한꺼번에 계산할 때 배치 한 번으로"""
+    clips = [decode_wav_bytes(blob) for blob in blobs]
+    return get_encoder().encode([data for data, _ in clips], [sr for _, sr in clips])
 
 
 class SpeakerVerifierDB:
@@ -164,13 +295,18 @@ class SpeakerVerifierDB:
                 .filter(models.User.email == email)
                 .first()
             )
-            if vp is None or vp.embedding_json is None:
+            if vp is None or vp.embedding is None:
                 print(f"[WARN] no voice profile in DB for '{email}'")
                 return None
 
-            emb_list = json.loads(vp.embedding_json)
-            emb = torch.tensor(emb_list, dtype=torch.float32)
-            return emb
+            if vp.embedding_model != EMBEDDING_MODEL:
+                print(
+                    f"[WARN] embedding for '{email}' was made with "
+                    f"'{vp.embedding_model}', expected '{EMBEDDING_MODEL}' (run backfill)"
+                )
+                return None
+
+            return unpack_embedding(vp.embedding)
         finally:
             db.close()
 
@@ -183,14 +319,12 @@ class SpeakerVerifierDB:
         if enrolled_emb is None:
             return False, float("-inf")
 
-        with torch.no_grad():
-            test_emb = _ecapa.encode_file(wav_path).squeeze(0).cpu()
+        test_emb = extract_embedding(wav_path)
 
         # cosine similarity 계산
-        score = torch.nn.functional.cosine_similarity(
-            test_emb.unsqueeze(0),
-            enrolled_emb.unsqueeze(0),
-        ).item()
+        score = float(np.dot(test_emb, enrolled_emb) / (
+            np.linalg.norm(test_emb) * np.linalg.norm(enrolled_emb)
+        ))
 
         is_match = score >= self.threshold
         return is_match, score
\ No newline at end of file
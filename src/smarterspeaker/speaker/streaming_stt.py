@@ -0,0 +1,288 @@
+# src/smarterspeaker/speaker/streaming_stt.py
+"""
+스트리밍 STT: 말하는 중에 오디오를 조금씩 받아서 부분(partial) / 최종(final) 인식 결과를 낸다.
+
+예전에는 명령이 끝날 때까지 기다렸다가 전체를 한 번에 디코딩해서,
+말이 끝난 뒤에도 디코딩 시간만큼 아무것도 못 했다.
+
+- 창(window): 아직 확정 안 된 오디오 구간. STREAM_STEP_SECONDS 만큼 새로 쌓일 때마다 창 전체를 다시 디코딩
+- LocalAgreement-2: 연속한 두 번의 디코딩 결과가 앞에서부터 같은 단어들만 확정(commit)
+  (뒤쪽 단어는 다음 오디오가 오면 바뀔 수 있어서 tentative)
+- 확정된 앞부분이 STREAM_TRIM_SECONDS 보다 길어지면 창에서 잘라내고 확정된 텍스트는 prompt 로만 넘김
+  -> 말이 끝난 뒤 마지막 디코딩은 짧은 꼬리 구간만 (최종 결과가 빨리 나옴)
+- StreamingWorker: 디코딩은 백그라운드 스레드에서 (VAD 캡처 루프가 디코딩을 안 기다림).
+  디코딩이 step 보다 오래 걸리면 밀린 step 은 건너뛰고 최신 창으로 한 번만, 무음만 들어왔으면 디코딩 안 함
+"""
+import string
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from smarterspeaker.config import SAMPLE_RATE, STREAM_STEP_SECONDS, STREAM_TRIM_SECONDS
+from smarterspeaker.speaker.vad import to_float32
+
+_PUNCT = str.maketrans('', '', string.punctuation)
+
+
+@dataclass
+class Word:
+    start: float   # 발화 시작 기준 절대 시간 (초)
+    end: float
+    text: str
+
+    @property
+    def key(self) -> str:
+        return self.text.translate(_PUNCT).strip().lower()
+
+
+@dataclass
+class Hypothesis:
+    committed: str                  # 확정된 텍스트 (바뀌지 않음)
+    tentative: str = ""             # 아직 바뀔 수 있는 뒷부분
+    is_final: bool = False
+    audio_seconds: float = 0.0      # 지금까지 받은 오디오 길이
+    new_words: List[Word] = field(default_factory=list)   # 이번에 새로 확정된 단어
+
+    @property
+    def text(self) -> str:
+        return f"{self.committed} {self.tentative}".strip()
+
+
+def join_words(words: List[Word]) -> str:
+    return " ".join(w.key for w in words if w.key)
+
+
+class LocalAgreement:
+    """LocalAgreement-2: 지난 디코딩과 이번 디코딩이 앞에서부터 일치하는 단어만 확정"""
+
+    def __init__(self, boundary_ngrams: int = 5):
+        self.boundary_ngrams = boundary_ngrams
+        self.committed: List[Word] = []
+        self.previous: List[Word] = []   # 지난 디코딩의 미확정 부분
+        self.last_end = 0.0              # 마지막으로 확정된 단어의 끝 시간
+
+    def insert(self, words: List[Word]) -> List[Word]:
+        """이번 디코딩 결과(절대 시간) -> 새로 확정된 단어들"""
+        new = [w for w in words if w.start >= self.last_end - 0.1]
+
+        # 창 경계에서 이미 확정된 단어가 다시 나오면 제거 (n-gram 이 같으면)
+        if new and self.committed and abs(new[0].start - self.last_end) < 1.0:
+            for n in range(min(self.boundary_ngrams, len(self.committed), len(new)), 0, -1):
+                if [w.key for w in self.committed[-n:]] == [w.key for w in new[:n]]:
+                    new = new[n:]
+                    break
+
+        agreed = []
+        for prev, cur in zip(self.previous, new):
+            if prev.key != cur.key:
+                break
+            agreed.append(cur)
+
+        if agreed:
+            self.committed.extend(agreed)
+            self.last_end = agreed[-1].end
+        self.previous = new[len(agreed):]
+        return agreed
+
+    def flush(self) -> List[Word]:
+        """발화 끝: 남은 미확정 단어도 전부 확정"""
+        rest, self.previous = self.previous, []
+        self.committed.extend(rest)
+        if rest:
+            self.last_end = rest[-1].end
+        return rest
+
+
+class StreamingTranscriber:
+    """
+    AudioToText 위의 스트리밍 세션 (발화 하나에 하나).
+
+        stream = audio_to_text.stream()
+        for chunk in ...:
+            hyp = stream.push(chunk)      # 디코딩할 만큼 안 쌓였으면 None
+        final = stream.finish()
+    """
+
+    def __init__(
+        self,
+        stt,
+        step: float = STREAM_STEP_SECONDS,
+        trim_seconds: float = STREAM_TRIM_SECONDS,
+        sample_rate: int = SAMPLE_RATE,
+        prompt_chars: int = 200,
+    ):
+        self.stt = stt
+        self.step = int(step * sample_rate)
+        self.trim_seconds = trim_seconds
+        self.sample_rate = sample_rate
+        self.prompt_chars = prompt_chars
+        self.reset()
+
+    def reset(self) -> None:
+        self.agreement = LocalAgreement()
+        self._chunks: List[np.ndarray] = []
+        self.audio = np.zeros(0, dtype=np.float32)   # 현재 창
+        self.offset = 0.0        # 창 앞에서 잘라낸 오디오 길이 (초)
+        self.received = 0        # 지금까지 받은 샘플 수
+        self.pending = 0         # 마지막 디코딩 뒤로 쌓인 샘플 수
+        self.language: Optional[str] = None
+        self.decodes = 0
+
+    @property
+    def audio_seconds(self) -> float:
+        return self.received / self.sample_rate
+
+    def append(self, frames: np.ndarray) -> None:
+        """오디오 조각 추가만 (디코딩 안 함)"""
+        frames = to_float32(frames).reshape(-1)
+        if frames.size == 0:
+            return
+        self._chunks.append(frames)
+        self.received += frames.size
+        self.pending += frames.size
+
+    @property
+    def ready(self) -> bool:
+        """마지막 디코딩 뒤로 step 이상 쌓였는지"""
+        return self.pending >= self.step
+
+    def partial(self) -> Hypothesis:
+        """지금 창을 디코딩해서 partial Hypothesis"""
+        return self._decode(final=False)
+
+    def push(self, frames: np.ndarray) -> Optional[Hypothesis]:
+        """오디오 조각 추가. 창을 다시 디코딩했으면 partial Hypothesis"""
+        self.append(frames)
+        if not self.ready:
+            return None
+        return self.partial()
+
+    def finish(self) -> Hypothesis:
+        """발화 끝: 남은 창을 디코딩하고 전부 확정"""
+        return self._decode(final=True)
+
+    def _window(self) -> np.ndarray:
+        if self._chunks:
+            self.audio = np.concatenate([self.audio] + self._chunks)
+            self._chunks = []
+        return self.audio
+
+    def _prompt(self) -> Optional[str]:
+        # 창에서 이미 잘라낸 확정 단어만 (창 안에 있는 단어까지 넣으면 Whisper 가 중복으로 보고 건너뜀)
+        text = join_words([w for w in self.agreement.committed if w.end <= self.offset])
+        return text[-self.prompt_chars:] if text else None
+
+    def _decode(self, final: bool) -> Hypothesis:
+        self.pending = 0
+        audio = self._window()
+
+        new_words: List[Word] = []
+        if audio.size:
+            words, language = self.stt.transcribe_words(audio, prompt=self._prompt(), language=self.language)
+            self.decodes += 1
+            # 언어는 첫 디코딩에서 한 번만 감지 (발화 중간에 안 바뀜)
+            self.language = self.language or language
+            new_words = self.agreement.insert(
+                [Word(self.offset + w.start, self.offset + w.end, w.word) for w in words]
+            )
+
+        if final:
+            new_words += self.agreement.flush()
+        else:
+            self._trim()
+
+        return Hypothesis(
+            committed=join_words(self.agreement.committed),
+            tentative=join_words(self.agreement.previous),
+            is_final=final,
+            audio_seconds=self.audio_seconds,
+            new_words=new_words,
+        )
+
+    def _trim(self) -> None:
+        # 확정된 부분이 길면 마지막 확정 단어 끝까지 창에서 잘라냄
+        cut = self.agreement.last_end - self.offset
+        if cut < self.trim_seconds:
+            return
+        n = min(int(cut * self.sample_rate), self.audio.size)
+        self.audio = self.audio[n:]
+        self.offset += n / self.sample_rate
+
+
+class StreamingWorker:
+    """
+    StreamingTranscriber 를 백그라운드 스레드에서 (발화 하나에 하나).
+
+        worker = StreamingWorker(audio_to_text.stream(), on_partial=print)
+        worker.feed(frames, is_speech)    # 캡처 루프: 큐에 넣기만 하고 바로 반환
+        final = worker.finish()           # 남은 오디오까지 넣고 최종 디코딩
+
+    디코딩 중에 들어온 오디오는 모아뒀다가 끝나면 한꺼번에 창에 붙이고 최신 창으로 한 번만 디코딩
+    (밀린 step 마다 디코딩하지 않음). 새로 들어온 게 전부 무음이면 창에만 붙이고 디코딩 안 함.
+    on_partial 은 워커 스레드에서 불림
+    """
+
+    def __init__(self, stream: StreamingTranscriber, on_partial: Optional[Callable[[Hypothesis], None]] = None):
+        self.stream = stream
+        self.on_partial = on_partial
+        self.skipped = 0           # 무음이라 건너뛴 디코딩 수
+        self._cond = threading.Condition()
+        self._frames: List[np.ndarray] = []
+        self._voiced = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="streaming-stt", daemon=True)
+        self._thread.start()
+
+    def feed(self, frames: np.ndarray, is_speech: bool = True) -> None:
+        # 링버퍼 view 는 나중에 덮어써질 수 있어서 복사
+        with self._cond:
+            self._frames.append(np.array(frames))
+            self._voiced = self._voiced or is_speech
+            self._cond.notify()
+
+    def _take(self) -> Tuple[List[np.ndarray], bool]:
+        frames, voiced = self._frames, self._voiced
+        self._frames, self._voiced = [], False
+        return frames, voiced
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._frames and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                frames, voiced = self._take()
+
+            for chunk in frames:
+                self.stream.append(chunk)
+            if not self.stream.ready:
+                continue
+            if not voiced:
+                self.skipped += 1
+                continue
+            try:
+                hyp = self.stream.partial()
+            except Exception as e:
+                # partial 실패는 최종 디코딩에서 다시 (캡처는 계속)
+                print("[STT] partial decode error:", e)
+                continue
+            if self.on_partial is not None:
+                self.on_partial(hyp)
+
+    def close(self) -> None:
+        """워커 멈춤 (진행 중인 디코딩은 기다림). 아직 안 넣은 오디오는 남겨둠"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def finish(self) -> Hypothesis:
+        """워커를 멈추고 남은 오디오까지 넣어서 최종 디코딩"""
+        self.close()
+        frames, _ = self._take()
+        for chunk in frames:
+            self.stream.append(chunk)
+        return self.stream.finish()
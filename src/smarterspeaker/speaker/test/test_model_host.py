@@ -0,0 +1,118 @@
+# test_model_host.py
+# 실행 (src/ 에서): python -m unittest discover -s smarterspeaker -t .
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from smarterspeaker.speaker.model_host import (
+    ModelHost,
+    ModelHostClient,
+    ModelHostUnavailable,
+    create_authkey,
+    load_authkey,
+)
+
+
+class FakeEncoder:
+    """LocalEncoder 대신 (torch 없이): 음성 길이를 값으로 하는 (n, 192) 임베딩"""
+
+    def encode(self, waveforms, sample_rates):
+        return np.array([np.full(192, len(w), dtype=np.float32) for w in waveforms])
+
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+class test_authkey(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.key_file = os.path.join(self.dir, "keys", "model_host.key")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_per_run_key_is_private(self):
+        first = create_authkey(self.key_file)
+        self.assertEqual(load_authkey(self.key_file), first)
+        if os.name == "posix":
+            self.assertEqual(mode(self.key_file), 0o600)
+            self.assertEqual(mode(os.path.dirname(self.key_file)), 0o700)
+        # 실행마다 새 키
+        self.assertNotEqual(create_authkey(self.key_file), first)
+
+    def test_missing_key_means_no_host(self):
+        with self.assertRaises(ModelHostUnavailable):
+            load_authkey(self.key_file)
+
+
+@unittest.skipUnless(os.name == "posix", "unix socket")
+class test_model_host(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dir = tempfile.mkdtemp()
+        cls.address = os.path.join(cls.dir, "host.sock")
+        cls.key_file = os.path.join(cls.dir, "model_host.key")
+        cls.host = ModelHost(address=cls.address, authkey=None, batch_ms=5, key_file=cls.key_file)
+        cls.host._encoder = FakeEncoder()
+        threading.Thread(target=cls.host.serve_forever, daemon=True).start()
+        deadline = time.monotonic() + 5
+        while not os.path.exists(cls.address) and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    @classmethod
+    def tearDownClass(cls):
+        # 소켓 파일은 Listener finalizer 가 프로세스 끝날 때 지움
+        os.remove(cls.key_file)
+
+    def client(self, authkey=None):
+        return ModelHostClient(address=self.address, authkey=authkey, key_file=self.key_file)
+
+    def test_socket_is_private(self):
+        self.assertEqual(mode(self.address), 0o600)
+
+    def test_client_reads_generated_key(self):
+        client = self.client()
+        try:
+            self.assertEqual(client.ping()["pid"], os.getpid())
+        finally:
+            client.close()
+
+    def test_wrong_key_is_rejected(self):
+        client = self.client(authkey=b"smarterspeaker")
+        with self.assertRaises(ModelHostUnavailable):
+            client.ping()
+
+    def test_concurrent_stats(self):
+        before = self.host.stats_snapshot()
+        clients = [self.client() for _ in range(4)]
+
+        def work(client):
+            for n in range(1, 11):
+                vectors = client.embed([np.zeros(n, dtype=np.float32)])
+                assert vectors[0][0] == n
+
+        threads = [threading.Thread(target=work, args=(c,)) for c in clients]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for c in clients:
+            c.close()
+
+        after = self.host.stats_snapshot()
+        self.assertEqual(after["embed_requests"] - before["embed_requests"], 40)
+        self.assertEqual(after["embed_items"] - before["embed_items"], 40)
+        self.assertLessEqual(after["embed_batches"] - before["embed_batches"], 40)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+# test_ring_buffer.py
+# 실행 (src/ 에서): python -m unittest discover -s smarterspeaker -t .
+import unittest
+
+import numpy as np
+
+from smarterspeaker.speaker.ring_buffer import AudioRingBuffer
+
+
+def frames(start, n):
+    """position start 부터 n 개: 값 = position (덮어쓰기/순서 확인용)"""
+    return np.arange(start, start + n, dtype=np.int16)
+
+
+class test_ring_buffer(unittest.TestCase):
+
+    def test_rejects_non_positive_capacity(self):
+        with self.assertRaises(ValueError):
+            AudioRingBuffer(0)
+
+    def test_view_before_wraparound(self):
+        buf = AudioRingBuffer(8)
+        buf.write(frames(0, 5))
+        self.assertEqual(buf.position, 5)
+        self.assertEqual(buf.oldest(), 0)
+        np.testing.assert_array_equal(buf.view(1, 4), [1, 2, 3])
+        np.testing.assert_array_equal(buf.last(2), [3, 4])
+
+    def test_wraparound_stays_contiguous(self):
+        buf = AudioRingBuffer(8)
+        buf.write(frames(0, 6))
+        buf.write(frames(6, 5))   # 끝을 넘어서 앞으로 감김
+        self.assertEqual(buf.position, 11)
+        self.assertEqual(buf.oldest(), 3)
+        out = buf.view(3)
+        np.testing.assert_array_equal(out, np.arange(3, 11))
+        # 복사 없는 view (내부 배열을 그대로 가리킴)
+        self.assertIs(out.base, buf._data)
+
+    def test_overwritten_range_is_clipped(self):
+        buf = AudioRingBuffer(4)
+        for start in range(0, 20, 3):
+            buf.write(frames(start, 3))
+        self.assertEqual(buf.position, 21)
+        np.testing.assert_array_equal(buf.view(0), [17, 18, 19, 20])
+        np.testing.assert_array_equal(buf.last(100), [17, 18, 19, 20])
+
+    def test_write_larger_than_capacity_keeps_tail(self):
+        buf = AudioRingBuffer(4)
+        buf.write(frames(0, 2))
+        buf.write(frames(2, 10))
+        self.assertEqual(buf.position, 12)
+        np.testing.assert_array_equal(buf.view(0), [8, 9, 10, 11])
+
+    def test_empty_and_inverted_ranges(self):
+        buf = AudioRingBuffer(4)
+        self.assertEqual(buf.view(0).size, 0)
+        buf.write(frames(0, 3))
+        buf.write(np.zeros(0, dtype=np.int16))
+        self.assertEqual(buf.position, 3)
+        self.assertEqual(buf.view(2, 1).size, 0)
+        self.assertEqual(buf.view(0, 100).size, 3)   # end 는 position 까지만
+
+    def test_view_is_read_only(self):
+        buf = AudioRingBuffer(4)
+        buf.write(frames(0, 4))
+        with self.assertRaises(ValueError):
+            buf.view(0)[0] = 1
+
+    def test_many_random_writes_match_reference(self):
+        rng = np.random.default_rng(0)
+        buf = AudioRingBuffer(50)
+        written = []
+        for _ in range(200):
+            chunk = rng.integers(-1000, 1000, rng.integers(0, 80)).astype(np.int16)
+            buf.write(chunk)
+            written.extend(chunk.tolist())
+            np.testing.assert_array_equal(buf.last(50), written[-50:])
+
+
+if __name__ == "__main__":
+    unittest.main()
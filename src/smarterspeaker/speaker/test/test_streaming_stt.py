@@ -0,0 +1,220 @@
+# test_streaming_stt.py
+# 실행 (src/ 에서): python -m unittest discover -s smarterspeaker -t .
+import threading
+import time
+import unittest
+from collections import namedtuple
+
+import numpy as np
+
+from smarterspeaker.speaker.streaming_stt import LocalAgreement, StreamingTranscriber, StreamingWorker, Word
+
+RATE = 100   # 테스트용 샘플레이트 (배열을 작게)
+
+# faster_whisper Word 처럼 start / end / word
+WhisperWord = namedtuple("WhisperWord", "start end word")
+
+SCRIPT = "turn on the living room light and then play some music please".split()
+
+
+def spoken(i):
+    """SCRIPT 의 i 번째 단어: 0.5초 간격, 0.4초 길이 (발화 기준 절대 시간)"""
+    return i * 0.5, i * 0.5 + 0.4
+
+
+def words(*pairs, start=0.0):
+    return [Word(start + i * 0.5, start + i * 0.5 + 0.4, t) for i, t in enumerate(pairs)]
+
+
+class FakeSTT:
+    """
+    오디오 샘플 값 = 발화 기준 샘플 번호 -> 창이 SCRIPT 의 어디인지 알 수 있음.
+    창 안에서 끝까지 들린 단어는 그대로, 끝이 잘린 마지막 단어는 틀리게 (tentative 가 바뀌는 것 흉내)
+    """
+
+    def __init__(self, languages=("en",)):
+        self.calls = []
+        self.languages = list(languages)
+
+    def transcribe_words(self, audio, prompt=None, language=None):
+        begin = float(audio[0]) / RATE
+        self.calls.append({"size": audio.size, "begin": begin, "prompt": prompt, "language": language})
+        end = (float(audio[-1]) + 1) / RATE
+        out = []
+        for i, text in enumerate(SCRIPT):
+            s, e = spoken(i)
+            if s < begin or s >= end:
+                continue
+            out.append(WhisperWord(s - begin, min(e, end) - begin, text if e <= end else text[:2] + "?"))
+        lang = self.languages.pop(0) if len(self.languages) > 1 else self.languages[0]
+        return out, lang
+
+
+def audio(start, n):
+    return np.arange(start, start + n, dtype=np.float32)
+
+
+class test_local_agreement(unittest.TestCase):
+
+    def test_commits_only_agreed_prefix(self):
+        la = LocalAgreement()
+        self.assertEqual(la.insert(words("turn", "on", "the")), [])
+        agreed = la.insert(words("turn", "on", "a", "living"))
+        self.assertEqual([w.text for w in agreed], ["turn", "on"])
+        self.assertEqual([w.text for w in la.previous], ["a", "living"])
+        self.assertAlmostEqual(la.last_end, 0.9)
+
+    def test_ignores_case_and_punctuation(self):
+        la = LocalAgreement()
+        la.insert(words("Turn", "on,"))
+        self.assertEqual([w.text for w in la.insert(words("turn", "On"))], ["turn", "On"])
+
+    def test_boundary_words_are_not_committed_twice(self):
+        la = LocalAgreement()
+        la.insert(words("turn", "on", "the"))
+        la.insert(words("turn", "on", "the", "living"))
+        # 다음 창이 경계에서 "the" 를 다시 (조금 앞 시간으로) 인식
+        la.insert([Word(0.95, 1.35, "the")] + words("living", "room", start=1.5))
+        la.insert([Word(0.95, 1.35, "the")] + words("living", "room", "light", start=1.5))
+        self.assertEqual([w.text for w in la.committed], ["turn", "on", "the", "living", "room"])
+
+    def test_flush_commits_the_rest(self):
+        la = LocalAgreement()
+        la.insert(words("turn", "on"))
+        self.assertEqual([w.text for w in la.flush()], ["turn", "on"])
+        self.assertEqual(la.previous, [])
+        self.assertEqual(la.flush(), [])
+
+
+class test_streaming_transcriber(unittest.TestCase):
+
+    def stream(self, stt, trim=2.0):
+        return StreamingTranscriber(stt, step=1.0, trim_seconds=trim, sample_rate=RATE)
+
+    def run_script(self, stream, chunk=25):
+        total = int(spoken(len(SCRIPT) - 1)[1] * RATE) + 20
+        partials = []
+        for start in range(0, total, chunk):
+            hyp = stream.push(audio(start, min(chunk, total - start)))
+            if hyp is not None:
+                partials.append(hyp)
+        return partials, stream.finish()
+
+    def test_waits_for_a_full_step(self):
+        stt = FakeSTT()
+        stream = self.stream(stt)
+        self.assertIsNone(stream.push(audio(0, 50)))
+        self.assertIsNone(stream.push(np.zeros(0, dtype=np.float32)))
+        self.assertEqual(stt.calls, [])
+        self.assertIsNotNone(stream.push(audio(50, 50)))
+        self.assertEqual(len(stt.calls), 1)
+
+    def test_final_text_matches_script(self):
+        stt = FakeSTT()
+        stream = self.stream(stt)
+        partials, final = self.run_script(stream)
+        self.assertTrue(final.is_final)
+        self.assertEqual(final.text, " ".join(SCRIPT))
+        self.assertEqual(final.tentative, "")
+        # 확정된 텍스트는 앞에서부터 늘어나기만 함
+        for before, after in zip(partials, partials[1:] + [final]):
+            self.assertTrue(after.committed.startswith(before.committed))
+        # 새로 확정된 단어를 다 모으면 전체 문장 (중복 없음)
+        self.assertEqual([w.key for h in partials + [final] for w in h.new_words], SCRIPT)
+
+    def test_trimmed_window_and_prompt(self):
+        stt = FakeSTT()
+        stream = self.stream(stt)
+        self.run_script(stream)
+        self.assertGreater(stream.offset, 0.0)
+        # 창을 잘라내서 마지막 디코딩은 전체 길이보다 짧음
+        self.assertLess(stt.calls[-1]["size"], stream.received)
+        # prompt 에는 창 밖으로 나간 확정 단어만 -> 창 안 단어와 안 겹침
+        prompted = [c for c in stt.calls if c["prompt"]]
+        self.assertTrue(prompted)
+        for call in prompted:
+            self.assertTrue(" ".join(SCRIPT).startswith(call["prompt"]))
+            last = len(call["prompt"].split()) - 1
+            self.assertLessEqual(spoken(last)[1], call["begin"] + 1e-6)
+
+    def test_language_detected_once(self):
+        stt = FakeSTT(languages=("ko", "en", "en"))
+        stream = self.stream(stt)
+        self.run_script(stream)
+        self.assertIsNone(stt.calls[0]["language"])
+        self.assertEqual({c["language"] for c in stt.calls[1:]}, {"ko"})
+
+    def test_finish_without_audio(self):
+        stt = FakeSTT()
+        final = self.stream(stt).finish()
+        self.assertTrue(final.is_final)
+        self.assertEqual(final.text, "")
+        self.assertEqual(stt.calls, [])
+
+    def test_reset_starts_a_new_utterance(self):
+        stt = FakeSTT()
+        stream = self.stream(stt)
+        self.run_script(stream)
+        stream.reset()
+        self.assertEqual((stream.received, stream.offset, stream.language), (0, 0.0, None))
+        self.assertEqual(stream.agreement.committed, [])
+
+
+class SlowSTT(FakeSTT):
+    """디코딩이 step 보다 오래 걸림 (CPU base 모델 / 바쁜 모델 호스트). release 전까지 첫 디코딩이 멈춰 있음"""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def transcribe_words(self, audio, prompt=None, language=None):
+        self.release.wait(5)
+        return super().transcribe_words(audio, prompt, language)
+
+
+class test_streaming_worker(unittest.TestCase):
+
+    def worker(self, stt, partials=None):
+        stream = StreamingTranscriber(stt, step=1.0, trim_seconds=2.0, sample_rate=RATE)
+        return StreamingWorker(stream, on_partial=None if partials is None else partials.append)
+
+    def test_feed_does_not_wait_for_decode(self):
+        stt = SlowSTT()
+        worker = self.worker(stt)
+        started = time.monotonic()
+        for start in range(0, 600, 25):
+            worker.feed(audio(start, 25))
+        self.assertLess(time.monotonic() - started, 0.5)
+
+        # 첫 디코딩이 막혀 있는 동안 쌓인 5초는 밀린 step 마다가 아니라 한 번에
+        stt.release.set()
+        final = worker.finish()
+        self.assertLessEqual(len(stt.calls), 3)
+        self.assertEqual(final.text, " ".join(SCRIPT))
+
+    def test_silence_is_not_decoded(self):
+        stt = FakeSTT()
+        partials = []
+        worker = self.worker(stt, partials)
+        worker.feed(audio(0, 100), True)
+        deadline = time.monotonic() + 5
+        while not stt.calls and time.monotonic() < deadline:
+            time.sleep(0.01)
+        for start in range(100, 400, 25):
+            worker.feed(audio(start, 25), False)
+        final = worker.finish()
+        # 처음 1초 (말) 디코딩 + 최종 한 번. 무음 3초 동안은 다시 디코딩 안 함
+        self.assertEqual(len(stt.calls), 2)
+        self.assertEqual(len(partials), 1)
+        self.assertTrue(final.is_final)
+
+    def test_close_without_final_decode(self):
+        stt = FakeSTT()
+        worker = self.worker(stt)
+        worker.feed(audio(0, 50))
+        worker.close()
+        self.assertEqual(stt.calls, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+# src/smarterspeaker/speaker/vad.py
+
+import numpy as np
+
+from smarterspeaker.config import (
+    SAMPLE_RATE,
+    COMMAND_ONSET_TIMEOUT,
+    COMMAND_TRAILING_SILENCE,
+    COMMAND_MAX_SECONDS,
+)
+
+
+def to_float32(frames: np.ndarray) -> np.ndarray:
+    """int16 PCM 또는 float 배열 -> [-1, 1] float32 mono."""
+    frames = np.asarray(frames)
+    if frames.ndim == 2:
+        frames = frames.mean(axis=1) if frames.shape[1] > 1 else frames[:, 0]
+    if frames.dtype == np.int16:
+        return frames.astype(np.float32) / 32768.0
+    return frames.astype(np.float32, copy=False)
+
+
+class EnergyVAD:
+    """
+    아주 가벼운 에너지 기반 VAD.
+
+    10ms hop 단위로 RMS 를 보고, 배경 소음(noise floor)의 onset_ratio 배를
+    넘으면 음성으로 판단한다. 소음 레벨은 무음 구간에서 천천히 따라간다.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = SAMPLE_RATE,
+        hop_ms: int = 10,
+        onset_ratio: float = 3.0,
+        min_energy: float = 0.01,
+        noise_alpha: float = 0.05,
+    ):
+        self.sample_rate = sample_rate
+        self.hop_size = int(sample_rate * hop_ms / 1000)
+        self.onset_ratio = onset_ratio
+        self.min_energy = min_energy
+        self.noise_alpha = noise_alpha
+        self.noise_floor = min_energy / onset_ratio
+
+    def threshold(self) -> float:
+        return max(self.noise_floor * self.onset_ratio, self.min_energy)
+
+    def is_speech(self, hop: np.ndarray) -> bool:
+        hop = to_float32(hop)
+        if hop.size == 0:
+            return False
+
+        rms = float(np.sqrt(np.mean(hop * hop)))
+        speech = rms > self.threshold()
+
+        if not speech:
+            # 무음 구간에서만 배경 소음 레벨 갱신
+            self.noise_floor += self.noise_alpha * (rms - self.noise_floor)
+        return speech
+
+
+class CommandEndpointer:
+    """
+    VAD 로 명령 구간 자르기 (고정 5초 녹음 대신).
+
+    - 말소리가 시작(onset)될 때 구간 시작 (pre_roll 만큼 앞을 같이 포함)
+    - 마지막 말소리 뒤로 trailing_silence 초 동안 조용하면 끝
+    - 아무리 길어도 max_seconds 에서 자름
+    - onset_timeout 초 안에 아무 말도 없으면 None
+
+    반환값은 VoiceRecorder 링버퍼의 view 라서 복사가 없고,
+    끝부분 무음은 잘라내서 Whisper 에는 말한 구간만 넘어간다.
+    """
+
+    def __init__(
+        self,
+        vad: EnergyVAD = None,
+        onset_timeout: float = COMMAND_ONSET_TIMEOUT,
+        trailing_silence: float = COMMAND_TRAILING_SILENCE,
+        max_seconds: float = COMMAND_MAX_SECONDS,
+        pre_roll: float = 0.2,
+        tail: float = 0.1,
+    ):
+        self.vad = vad or EnergyVAD()
+        self.onset_timeout = onset_timeout
+        self.trailing_silence = trailing_silence
+        self.max_seconds = max_seconds
+        self.pre_roll = pre_roll
+        self.tail = tail
+
+    def capture(self, recorder, start=None, on_audio=None):
+        """
+        recorder(VoiceRecorder) 에서 명령 하나를 잘라 반환.
+        start 를 주면 그 위치(예: wake word 직후 mark)부터 본다.
+        on_audio(frames, is_speech) 를 주면 말이 시작된 뒤로 들어오는 오디오를 hop 단위로 바로 넘겨준다
+        (스트리밍 STT 용, 시작할 때 pre_roll 포함). 루프 안에서 불리니까 오래 걸리면 안 됨
+        (디코딩은 StreamingWorker 처럼 다른 스레드에서)
+        """
+        sr = self.vad.sample_rate
+        hop = self.vad.hop_size
+        cursor = recorder.mark() if start is None else start
+
+        onset_deadline = cursor + int(self.onset_timeout * sr)
+        trailing = int(self.trailing_silence * sr)
+        max_len = int(self.max_seconds * sr)
+
+        onset = None
+        last_voiced = None
+
+        while True:
+            if not recorder.wait_until(cursor + hop, timeout=1.0):
+                print("[WARN] No audio from microphone")
+                return None
+
+            frames = recorder.since(cursor, cursor + hop)
+            is_speech = self.vad.is_speech(frames)
+            cursor += hop
+
+            if onset is None:
+                if is_speech:
+                    onset = cursor - hop
+                    last_voiced = cursor
+                    if on_audio is not None:
+                        on_audio(recorder.since(max(onset - int(self.pre_roll * sr), recorder.buffer.oldest()), cursor),
+                                 True)
+                elif cursor >= onset_deadline:
+                    return None
+                continue
+
+            if on_audio is not None:
+                on_audio(frames, is_speech)
+
+            if is_speech:
+                last_voiced = cursor
+
+            if cursor - last_voiced >= trailing or cursor - onset >= max_len:
+                break
+
+        begin = max(onset - int(self.pre_roll * sr), recorder.buffer.oldest())
+        end = min(last_voiced + int(self.tail * sr), cursor)
+        print(f"[VAD] command captured: {(end - begin) / sr:.2f}s")
+        return recorder.since(begin, end)
@@ -0,0 +1,64 @@
+# src/smarterspeaker/speaker/vocabulary.py
+"""
+STT 어휘 prompt: 우리 집 존/기기 이름 + 영화 제목을 Whisper initial_prompt 로 넘겨서
+"Parasite" -> "para site", "거실" -> 엉뚱한 말 같은 오인식을 줄인다.
+
+목록은 loader 로 주기적으로 다시 읽어서(존/기기가 추가되면 반영) 문자열 하나로 만들어 둔다.
+"""
+import time
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from smarterspeaker.config import STT_PROMPT_MAX_CHARS, STT_VOCAB_REFRESH_SECONDS
+
+# (존 이름들, 기기 이름/타입들, 영화 제목들)
+VocabularyLists = Tuple[Iterable[str], Iterable[str], Iterable[str]]
+
+
+def unique_terms(*groups: Iterable[str]) -> List[str]:
+    """앞 그룹 우선, 대소문자 무시 중복 제거"""
+    seen, terms = set(), []
+    for group in groups:
+        for term in group:
+            term = (term or "").strip()
+            if term and term.lower() not in seen:
+                seen.add(term.lower())
+                terms.append(term)
+    return terms
+
+
+def build_initial_prompt(zones: Iterable[str], devices: Iterable[str], titles: Iterable[str],
+                         max_chars: int = STT_PROMPT_MAX_CHARS) -> Optional[str]:
+    """
+    "Living Room, Bedroom, light, TV, Inception, Parasite." 같은 문자열.
+    길이를 넘으면 뒤(영화 제목)부터 뺀다 - 존/기기 이름이 명령 정확도에 더 중요해서.
+    """
+    prompt = ""
+    for term in unique_terms(zones, devices, titles):
+        candidate = f"{prompt}, {term}" if prompt else term
+        if len(candidate) + 1 > max_chars:
+            break
+        prompt = candidate
+    return f"{prompt}." if prompt else None
+
+
+class Vocabulary:
+    def __init__(self, loader: Callable[[], VocabularyLists],
+                 refresh_seconds: float = STT_VOCAB_REFRESH_SECONDS,
+                 max_chars: int = STT_PROMPT_MAX_CHARS, clock=time.monotonic):
+        self.loader = loader
+        self.refresh_seconds = refresh_seconds
+        self.max_chars = max_chars
+        self.clock = clock
+        self._prompt: Optional[str] = None
+        self._loaded_at: Optional[float] = None
+
+    def prompt(self) -> Optional[str]:
+        """initial_prompt 문자열 (refresh_seconds 동안 캐시, 못 읽으면 이전 값 유지)"""
+        now = self.clock()
+        if self._loaded_at is None or now - self._loaded_at >= self.refresh_seconds:
+            self._loaded_at = now
+            try:
+                self._prompt = build_initial_prompt(*self.loader(), max_chars=self.max_chars)
+            except Exception as e:
+                print("[STT] vocabulary load error:", e)
+        return self._prompt
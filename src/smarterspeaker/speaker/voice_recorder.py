@@ -1,20 +1,123 @@
+import time
+
+import numpy as np
 import sounddevice as sd
 import wavio
-from smarterspeaker.config import SAMPLE_RATE, RECORD_SECONDS, VOICE_INPUT
+from smarterspeaker.config import SAMPLE_RATE, RECORD_SECONDS, VOICE_INPUT, RING_BUFFER_SECONDS
+from smarterspeaker.speaker.ring_buffer import AudioRingBuffer
 
 class VoiceRecorder:
+    """
+    콜백 기반 InputStream 으로 마이크를 계속 열어두고 int16 링버퍼에 쌓는 녹음기.
+
+    - 녹음 사이에 말한 소리도 버퍼에 남아 있음 (RING_BUFFER_SECONDS 만큼)
+    - last_seconds() / since(mark) 로 복사 없는 NumPy view 를 바로 꺼내 쓸 수 있음
+    - 파일 저장은 record(filename=...) / save() 를 쓸 때만
+    """
+
+    def __init__(self, buffer_seconds=RING_BUFFER_SECONDS, block_seconds=0.01):
+        self.buffer = AudioRingBuffer(int(buffer_seconds * SAMPLE_RATE))
+        self.block_seconds = block_seconds
+        self._stream = None
+
+    # -----------------------------------------------------
+    #  스트림 관리
+    # -----------------------------------------------------
+
+    def _callback(self, indata, frames, time_info, status):
+        if status:
+            print(f"[WARN] Microphone status: {status}")
+        self.buffer.write(indata[:, 0])
+
+    def start(self):
+        if self._stream is not None:
+            return
+        self._stream = sd.InputStream(samplerate=SAMPLE_RATE,
+                                      channels=1,
+                                      dtype='int16',
+                                      blocksize=int(SAMPLE_RATE * self.block_seconds),
+                                      callback=self._callback)
+        self._stream.start()
+
+    def stop(self):
+        if self._stream is None:
+            return
+        self._stream.stop()
+        self._stream.close()
+        self._stream = None
+
+    @property
+    def is_running(self):
+        return self._stream is not None
+
+    # -----------------------------------------------------
+    #  버퍼 읽기 (zero-copy view)
+    # -----------------------------------------------------
+
+    def mark(self):
+        """현재 위치. 나중에 since(mark) 로 그 이후 구간을 꺼냄 (예: wake word 직후)."""
+        return self.buffer.position
+
+    def since(self, mark, end=None):
+        return self.buffer.view(mark, end)
+
+    def last_seconds(self, seconds):
+        return self.buffer.last(int(seconds * SAMPLE_RATE))
+
+    def wait_until(self, position, timeout=None):
+        """버퍼 position 이 주어진 위치에 도달할 때까지 대기. 도달하면 True."""
+        self.start()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.buffer.position < position:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(self.block_seconds)
+        return True
+
+    def stream(self, hop_seconds=0.01):
+        """
+        링버퍼에 새로 들어온 프레임을 hop_seconds 단위로 계속 yield (view).
+        wake word 스포터가 이걸 받아서 실시간으로 처리한다.
+        """
+        self.start()
+        hop = int(SAMPLE_RATE * hop_seconds)
+        cursor = self.buffer.position
+        while True:
+            self.wait_until(cursor + hop)
+            if cursor < self.buffer.oldest():
+                print("[WARN] Ring buffer overrun, skipping ahead")
+                cursor = self.buffer.oldest()
+            end = self.buffer.position
+            yield self.buffer.view(cursor, end)
+            cursor = end
+
+    # -----------------------------------------------------
+    #  기존 인터페이스
+    # -----------------------------------------------------
 
     def record(self, filename=VOICE_INPUT, duration=RECORD_SECONDS):
-        samplerate = SAMPLE_RATE
+        """
+        지금부터 duration 초 녹음.
+        filename 이 있으면 wav 로 저장하고 파일명을, None 이면 int16 배열을 반환.
+        """
         print("🎙️ Speak now…")
-        audio = sd.rec(int(duration * samplerate),
-                       samplerate=samplerate,
-                       channels=1,
-                       dtype='int16')
-        sd.wait()
-        wavio.write(filename, audio, samplerate, sampwidth=2)
+        start = self.mark()
+        end = start + int(duration * SAMPLE_RATE)
+        self.wait_until(end)
+        audio = self.since(start, end)
+
+        if filename is None:
+            return audio.copy()
+        return self.save(filename, audio)
+
+    def save(self, filename, audio):
+        """메모리에 있는 오디오(int16 또는 [-1, 1] float32)를 wav 로 저장"""
+        audio = np.asarray(audio)
+        if audio.dtype != np.int16:
+            audio = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+        wavio.write(filename, audio.reshape(-1, 1), SAMPLE_RATE, sampwidth=2)
         print(f"✅ Saved {filename}")
         return filename
-    
+
 if __name__ == "__main__":
-    VoiceRecorder().record()
\ No newline at end of file
+    VoiceRecorder().record()
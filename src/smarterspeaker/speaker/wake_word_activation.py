@@ -1,14 +1,32 @@
 from smarterspeaker.speaker.audio_to_text import AudioToText
 
 class WakeWordActivation:
-    def __init__(self, audio_to_text, keyword):
+    """
+    Whisper 로 wake word 를 "확인"하는 단계.
+    평소 감지는 KeywordSpotter 가 하고, 템플릿으로 확정 못 한 후보만 여기로 온다.
+    """
+
+    def __init__(self, audio_to_text, keywords):
         self.audio_to_text = audio_to_text
-        self.keyword = keyword.lower()
+        if isinstance(keywords, str):
+            keywords = [keywords]
+        # "help me" 같은 여러 단어 문구도 단어 단위로 비교
+        self.keywords = [k.lower().split() for k in keywords if k.strip()]
+
+    def _contains_keyword(self, text):
+        words = text.split()
+        for keyword in self.keywords:
+            n = len(keyword)
+            for i in range(len(words) - n + 1):
+                if words[i:i + n] == keyword:
+                    return " ".join(keyword)
+        return None
 
-    def is_activated(self, audio_file):
-        text = self.audio_to_text.transcribe(audio_file)
+    def is_activated(self, audio):
+        """audio: wav 파일 경로 또는 16kHz float32 배열"""
+        text = self.audio_to_text.transcribe(audio, profile="wake")
         print(f"[DEBUG] Transcribed text: '{text}'")
-        print(f"[DEBUG] Looking for keyword: '{self.keyword}'")
-        result = self.keyword in text
-        print(f"[DEBUG] Wake word found: {result}")
-        return result
\ No newline at end of file
+        print(f"[DEBUG] Looking for keywords: {[' '.join(k) for k in self.keywords]}")
+        found = self._contains_keyword(text)
+        print(f"[DEBUG] Wake word found: {found}")
+        return found is not None
@@ -0,0 +1,99 @@
+# src/smarterspeaker/state_version.py
+"""
+/devices-db, /zones 상태 버전 (조건부 GET + 변경분 조회용).
+
+대시보드가 폴링할 때마다 전체 ORM 조회 + 직렬화를 하지 않도록:
+- 바뀔 때마다 단조 증가하는 버전을 붙이고 (테이블별 마지막 버전 -> ETag)
+- 행별로 마지막으로 바뀐 버전 / 삭제 여부를 기억해서 ?since=<version> 이면 바뀐 행만 돌려줌
+
+버전은 프로세스 시작 시각(ms)에서 시작해서 재시작해도 거꾸로 가지 않는다.
+재시작 전 버전(base 보다 작은 since)은 변경 기록이 없으니 전체를 다시 받아야 한다.
+기기 변경은 device_events 버스를 통해서 들어오므로 스피커가 DB 에 직접 쓴 것도 반영된다.
+버스로 안 들어온 변경 (전달 못 한 스피커 이벤트, backfill / migrate 스크립트, 수동 SQL) 은
+요청마다 DB 집계값(signature)을 validate() 로 비교해서 잡는다: 다르면 버전을 올리고 그 전 since 는 전체 응답.
+"""
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+TABLES = ("devices", "zones")
+
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """If-None-Match 헤더 (콤마로 구분한 ETag 목록 / "*") 에 etag 가 정확히 있으면 True (-> 304)"""
+    if not if_none_match:
+        return False
+    return any(tag.strip() in (etag, "*") for tag in if_none_match.split(","))
+
+
+class StateVersion:
+    def __init__(self, clock=time.time):
+        self.base = int(clock() * 1000)
+        self.version = self.base
+        self._lock = threading.Lock()
+        self._table_versions: Dict[str, int] = {t: self.base for t in TABLES}
+        # table -> {row id: (마지막으로 바뀐 버전, 삭제됨)}
+        self._rows: Dict[str, Dict[int, Tuple[int, bool]]] = {t: {} for t in TABLES}
+        # 마지막으로 본 DB signature (None: 아직 모름 / 방금 bump 해서 다시 기록) / 이 버전 전 since 는 전체 응답
+        self._signatures: Dict[str, Optional[Tuple]] = {t: None for t in TABLES}
+        self._floor: Dict[str, int] = {t: self.base for t in TABLES}
+
+    def bump(self, table: str, ids: Iterable[int], deleted: bool = False) -> int:
+        """행들이 바뀜 (생성 / 수정 / 삭제). 새 버전 반환"""
+        with self._lock:
+            self.version += 1
+            rows = self._rows[table]
+            for row_id in ids:
+                rows[row_id] = (self.version, deleted)
+            self._table_versions[table] = self.version
+            # 알고 있는 변경이라 DB signature 가 바뀌는 게 당연함 -> 다음 validate 때 새로 기록만
+            self._signatures[table] = None
+            return self.version
+
+    def validate(self, table: str, signature: Tuple) -> bool:
+        """
+        DB signature 가 지난번과 다르면 (bump 로 안 들어온 변경) 버전을 올리고 True.
+        어떤 행이 바뀐 건지 모르니까 그 전 버전 기준 since 는 전체 응답
+        """
+        with self._lock:
+            known = self._signatures[table]
+            self._signatures[table] = signature
+            if known is None or known == signature:
+                return False
+            self.version += 1
+            self._table_versions[table] = self.version
+            self._floor[table] = self.version
+            return True
+
+    def table_version(self, table: str) -> int:
+        return self._table_versions[table]
+
+    def etag(self, table: str) -> str:
+        return f'W/"{table}-{self._table_versions[table]}"'
+
+    def matches(self, table: str, if_none_match: Optional[str]) -> bool:
+        """If-None-Match 헤더가 현재 ETag 와 같으면 True (-> 304)"""
+        return etag_matches(self.etag(table), if_none_match)
+
+    def changes_since(self, table: str, since: int) -> Optional[Tuple[List[int], List[int]]]:
+        """
+        since 이후 (바뀐 id 목록, 삭제된 id 목록).
+        since 가 이 프로세스 기록 범위 밖이면 None (-> 전체 응답)
+        """
+        with self._lock:
+            if since < self._floor[table] or since > self.version:
+                return None
+            changed, deleted = [], []
+            for row_id, (version, is_deleted) in self._rows[table].items():
+                if version > since:
+                    (deleted if is_deleted else changed).append(row_id)
+            return changed, deleted
+
+    def on_device_events(self, events: List[Dict]) -> None:
+        """device_events 버스 리스너: 기기 이벤트 -> devices 버전 증가"""
+        deleted = [e["device"]["id"] for e in events if e.get("kind") == "deleted"]
+        changed = [e["device"]["id"] for e in events if e.get("kind") != "deleted"]
+        if changed:
+            self.bump("devices", changed)
+        if deleted:
+            self.bump("devices", deleted, deleted=True)
@@ -0,0 +1,58 @@
+# test_device_events.py
+# 실행 (src/ 에서): python -m unittest discover -s smarterspeaker -t .
+import asyncio
+import unittest
+
+from smarterspeaker.device_events import DeviceEventBus, event_source_allowed
+
+
+def light(device_id, zone_id=1, status="on"):
+    return {"kind": "status", "source": "api", "device": {"id": device_id, "zone_id": zone_id, "status": status}}
+
+
+class test_subscriber_overflow(unittest.TestCase):
+
+    def test_slow_subscriber_gets_resync(self):
+        async def run():
+            bus = DeviceEventBus()
+            sub = bus.subscribe(maxsize=3)
+            bus.publish([light(i) for i in range(5)])
+            await asyncio.sleep(0)   # call_soon_threadsafe 로 넣은 push 실행
+            received = []
+            while not sub.queue.empty():
+                received.append(sub.queue.get_nowait())
+            # 처음 3개는 들어가고, 넘치는 순간 밀린 건 버리고 resync 하나 -> 그 뒤 것은 다시 정상
+            return received
+
+        received = asyncio.run(run())
+        self.assertEqual(received[0], {"kind": "resync", "seq": 4})
+        self.assertEqual([e["seq"] for e in received[1:]], [5])
+
+    def test_fast_subscriber_gets_everything(self):
+        async def run():
+            bus = DeviceEventBus()
+            sub = bus.subscribe(maxsize=8)
+            bus.publish([light(i) for i in range(5)])
+            await asyncio.sleep(0)
+            return [sub.queue.get_nowait()["seq"] for _ in range(sub.queue.qsize())]
+
+        self.assertEqual(asyncio.run(run()), [1, 2, 3, 4, 5])
+
+
+class test_event_source(unittest.TestCase):
+
+    def test_loopback_only_without_token(self):
+        self.assertTrue(event_source_allowed("127.0.0.1", None, expected=None))
+        self.assertTrue(event_source_allowed("::1", None, expected=None))
+        self.assertFalse(event_source_allowed("192.168.0.20", None, expected=None))
+        self.assertFalse(event_source_allowed(None, None, expected=None))
+        self.assertFalse(event_source_allowed("testclient", None, expected=None))
+
+    def test_token_required_when_configured(self):
+        self.assertTrue(event_source_allowed("192.168.0.20", "s3cret", expected="s3cret"))
+        self.assertFalse(event_source_allowed("127.0.0.1", None, expected="s3cret"))
+        self.assertFalse(event_source_allowed("127.0.0.1", "wrong", expected="s3cret"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+# test_device_service.py
+# 실행 (src/ 에서): python -m unittest discover -s smarterspeaker -t .
+import os
+import unittest
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from smarterspeaker import device_service, models
+from smarterspeaker.device_service import DeviceIndex, control_devices
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class test_device_index(unittest.TestCase):
+    """API 프로세스가 존/기기를 바꿔도 (invalidate 없이) 스피커 쪽 인덱스가 따라가는지"""
+
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        models.Base.metadata.create_all(engine)
+        self.Session = sessionmaker(bind=engine)
+        self.api = self.Session()       # 다른 프로세스 (CRUD)
+        self.speaker = self.Session()   # 인덱스를 쓰는 쪽
+
+        self.living = models.Zone(name="living", display_name="Living Room")
+        self.bedroom = models.Zone(name="bedroom")
+        self.api.add_all([self.living, self.bedroom])
+        self.api.flush()
+        self.lamp = models.Device(name="lamp", type="light", zone_id=self.living.id)
+        self.api.add(self.lamp)
+        self.api.commit()
+
+        self.clock = FakeClock()
+        self.index = DeviceIndex(max_age=30.0, clock=self.clock)
+
+    def tearDown(self):
+        self.api.close()
+        self.speaker.close()
+
+    def names(self, zone, device_type="light"):
+        self.speaker.rollback()   # 새 트랜잭션에서 읽기 (다른 세션 커밋이 보이게)
+        return sorted(d["name"] for d in self.index.resolve(self.speaker, zone, device_type))
+
+    def test_added_device_is_controlled(self):
+        self.assertEqual(self.names("living"), ["lamp"])
+        self.api.add(models.Device(name="ceiling", type="light", zone_id=self.living.id))
+        self.api.commit()
+        self.assertEqual(self.names("living"), ["ceiling", "lamp"])
+
+    def test_moved_device_leaves_old_zone(self):
+        self.assertEqual(self.names("living"), ["lamp"])
+        self.assertEqual(self.names("bedroom"), [])
+        self.api.add(models.Device(name="ceiling", type="light", zone_id=self.living.id))
+        self.lamp.zone_id = self.bedroom.id
+        self.api.commit()
+        self.assertEqual(self.names("living"), ["ceiling"])
+        self.assertEqual(self.names("bedroom"), ["lamp"])
+
+    def test_deleted_device_is_dropped(self):
+        self.api.add(models.Device(name="ceiling", type="light", zone_id=self.living.id))
+        self.api.commit()
+        self.assertEqual(self.names("living"), ["ceiling", "lamp"])
+        self.api.delete(self.lamp)
+        self.api.commit()
+        self.assertEqual(self.names("living"), ["ceiling"])
+
+    def test_unchanged_index_is_not_rebuilt(self):
+        self.names("living")
+        generation = self.index.generation
+        self.names("living")
+        self.names("room")
+        self.assertEqual(self.index.generation, generation)
+
+    def test_rename_is_picked_up_after_max_age(self):
+        # 이름 변경은 signature 로 안 보임 -> max_age 뒤에 반영
+        self.assertEqual(self.names("living"), ["lamp"])
+        self.api.add(models.Device(name="spot", type="light", zone_id=self.bedroom.id))
+        self.api.commit()
+        self.names("bedroom")
+        self.bedroom.display_name = "Living Annex"
+        self.api.commit()
+        self.assertEqual(self.names("living"), ["lamp"])
+        self.clock.now = 30.0
+        self.assertEqual(self.names("living"), ["lamp", "spot"])
+
+
+class test_control_devices(unittest.TestCase):
+
+    def test_in_process_control_sees_new_device(self):
+        engine = create_engine("sqlite://")
+        models.Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine)
+        api, speaker = Session(), Session()
+        zone = models.Zone(name="kitchen")
+        api.add(zone)
+        api.flush()
+        api.add(models.Device(name="lamp", type="light", zone_id=zone.id))
+        api.commit()
+
+        old_index = device_service.device_index
+        device_service.device_index = DeviceIndex()
+        try:
+            self.assertEqual(len(control_devices(speaker, "kitchen", "light", "on", source="speaker")), 1)
+            api.add(models.Device(name="strip", type="light", zone_id=zone.id))
+            api.commit()
+            changed = control_devices(speaker, "kitchen", "light", "off", source="speaker")
+            self.assertEqual(sorted(d["name"] for d in changed), ["lamp", "strip"])
+            api.rollback()
+            self.assertEqual({d.status for d in api.query(models.Device)}, {"off"})
+        finally:
+            device_service.device_index = old_index
+            api.close()
+            speaker.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
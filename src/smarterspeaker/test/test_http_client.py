@@ -0,0 +1,163 @@
+# test_http_client.py
+# 실행 (src/ 에서): python -m unittest discover -s smarterspeaker -t .
+import io
+import unittest
+
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
+
+from smarterspeaker.http_client import BackendClient, BackendUnavailable, CircuitBreaker, connect_failed
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def refused():
+    reason = NewConnectionError(None, "Failed to establish a new connection: [Errno 111] refused")
+    return requests.ConnectionError(MaxRetryError(None, "/x", reason=reason))
+
+
+def reset():
+    return requests.ConnectionError(ProtocolError("Connection aborted.", ConnectionResetError(104)))
+
+
+def response(status):
+    res = requests.Response()
+    res.status_code = status
+    res.raw = io.BytesIO(b"")
+    return res
+
+
+class FakeSession:
+    """session.request 대신 정해둔 결과 (예외 또는 응답) 를 순서대로 돌려줌"""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def client(outcomes, retries=2, breaker=None):
+    c = BackendClient(base_url="http://backend", retries=retries, backoff_base=0.0, breaker=breaker)
+    c.session = FakeSession(outcomes)
+    return c
+
+
+class test_retry(unittest.TestCase):
+
+    def test_connect_failed(self):
+        self.assertTrue(connect_failed(refused()))
+        self.assertTrue(connect_failed(requests.ConnectTimeout()))
+        self.assertFalse(connect_failed(reset()))
+        self.assertFalse(connect_failed(requests.ReadTimeout()))
+
+    def test_post_retries_when_never_connected(self):
+        c = client([refused(), requests.ConnectTimeout(), response(200)])
+        self.assertEqual(c.post("/voice-search").status_code, 200)
+        self.assertEqual(c.session.calls, 3)
+
+    def test_post_does_not_retry_after_sending(self):
+        # 연결 뒤 끊김 / 읽기 타임아웃은 서버가 이미 처리했을 수 있음 -> POST 는 한 번만
+        for error in (reset(), requests.ReadTimeout()):
+            with self.subTest(error=type(error).__name__):
+                c = client([error, response(200)])
+                with self.assertRaises(type(error)):
+                    c.post("/voice-search")
+                self.assertEqual(c.session.calls, 1)
+
+    def test_post_does_not_retry_server_errors(self):
+        c = client([response(503), response(200)])
+        self.assertEqual(c.post("/voice-search").status_code, 503)
+        self.assertEqual(c.session.calls, 1)
+
+    def test_idempotent_retries_everything(self):
+        c = client([reset(), requests.ReadTimeout(), response(503), response(200)], retries=3)
+        self.assertEqual(c.post("/device-control", idempotent=True).status_code, 200)
+        self.assertEqual(c.session.calls, 4)
+
+    def test_gives_up_after_retries(self):
+        c = client([refused(), refused(), refused(), response(200)])
+        with self.assertRaises(requests.ConnectionError):
+            c.get("/health")
+        self.assertEqual(c.session.calls, 3)
+        self.assertEqual(c.stats()["endpoints"]["GET /health"]["errors"], 3)
+
+
+class test_circuit_breaker(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10.0, clock=self.clock)
+
+    def test_opens_after_threshold(self):
+        for _ in range(2):
+            self.breaker.record(False)
+        self.assertEqual(self.breaker.state, "closed")
+        self.breaker.record(False)
+        self.assertEqual(self.breaker.state, "open")
+        self.assertFalse(self.breaker.allow())
+
+    def test_success_resets_failures(self):
+        self.breaker.record(False)
+        self.breaker.record(False)
+        self.breaker.record(True)
+        self.breaker.record(False)
+        self.assertEqual(self.breaker.state, "closed")
+
+    def test_half_open_allows_one_probe(self):
+        for _ in range(3):
+            self.breaker.record(False)
+        self.clock.now = 10.0
+        self.assertEqual(self.breaker.state, "half-open")
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())   # 시험 요청은 하나만
+
+        # 시험 실패 -> 다시 open (타이머 새로 시작)
+        self.breaker.record(False)
+        self.assertEqual(self.breaker.state, "open")
+        self.clock.now = 19.0
+        self.assertFalse(self.breaker.allow())
+
+        # 시험 성공 -> closed
+        self.clock.now = 20.0
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record(True)
+        self.assertEqual(self.breaker.state, "closed")
+        self.assertTrue(self.breaker.allow())
+
+    def test_failed_probe_of_any_kind_reopens(self):
+        for _ in range(3):
+            self.breaker.record(False)
+        self.clock.now = 10.0
+        c = client([requests.exceptions.ChunkedEncodingError(), response(200)], retries=0, breaker=self.breaker)
+        with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+            c.get("/health")
+        # 시험 요청이 끝났으니 다시 open -> reset_timeout 뒤 새 시험 요청 가능
+        self.assertEqual(self.breaker.state, "open")
+        self.clock.now = 20.0
+        self.assertEqual(c.get("/health").status_code, 200)
+        self.assertEqual(self.breaker.state, "closed")
+
+    def test_open_circuit_rejects_without_sending(self):
+        c = client([refused()], retries=0, breaker=self.breaker)
+        for _ in range(3):
+            self.breaker.record(False)
+        with self.assertRaises(BackendUnavailable):
+            c.post("/voice-search")
+        self.assertEqual(c.session.calls, 0)
+        self.assertEqual(c.stats()["endpoints"]["POST /voice-search"]["rejected"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+# test_movie_match.py
+# 실행 (src/ 에서): python -m unittest discover -s smarterspeaker -t .
+import json
+import os
+import tempfile
+import unittest
+
+from smarterspeaker.movie_match import edit_distance, phonetic_key
+from smarterspeaker.movies import MovieCatalog, TitleMatch, age_gate_candidates
+
+MOVIES = [
+    {"id": 1, "title": "Interstellar", "ageRating": 12},
+    {"id": 2, "title": "The Dark Knight", "ageRating": 15},
+    {"id": 3, "title": "La La Land", "ageRating": 12},
+    {"id": 4, "title": "Your Name", "ageRating": 12},
+    {"id": 5, "title": "Parasite", "ageRating": 15},
+    {"id": 6, "title": "Her", "ageRating": 18},
+    {"id": 7, "title": "Whiplash", "ageRating": 15},
+]
+
+
+class test_movie_match(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        fd, cls.path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(MOVIES, f)
+        cls.catalog = MovieCatalog(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.path)
+
+    def titles(self, query, intent=None):
+        return [m["title"] for m, _ in self.catalog.match(query)]
+
+    # --- STT 오타는 계속 찾음 ---
+
+    def test_spoken_title_errors(self):
+        self.assertEqual(self.titles("inter stellar"), ["Interstellar"])
+        self.assertEqual(self.titles("intersteller"), ["Interstellar"])
+        self.assertEqual(self.titles("parasight"), ["Parasite"])
+        self.assertEqual(self.titles("la la lend"), ["La La Land"])
+        self.assertEqual(self.titles("dark night"), ["The Dark Knight"])
+        self.assertEqual(self.titles("wiplash"), ["Whiplash"])
+
+    # --- 일반 대화는 제목으로 안 잡음 ---
+
+    def test_small_talk_is_not_a_title(self):
+        for phrase in ("how are you", "who are you", "whats your name", "how are we",
+                       "what do you hear", "hur"):
+            with self.subTest(phrase=phrase):
+                self.assertEqual(self.titles(phrase), [])
+
+    def test_short_phonetic_keys_are_ignored(self):
+        # "howareyou" 와 "her" 는 발음 키가 같음 -> 짧은 키는 안 씀
+        self.assertEqual(phonetic_key("howareyou"), phonetic_key("her"))
+        self.assertEqual(self.catalog.match_details("how are you"), [])
+
+    # --- 나이 제한 ---
+
+    def test_age_gate_on_small_talk(self):
+        for intent in ("general", None):
+            matches = self.catalog.match_details("how are you")
+            self.assertEqual(age_gate_candidates(matches, intent), [])
+
+    def test_age_gate_rules(self):
+        movie = MOVIES[5]
+        partial = TitleMatch(movie, 0.8, False, 0.5)
+        self.assertEqual(age_gate_candidates([partial], "general"), [])
+        self.assertEqual(age_gate_candidates([partial], "movie_search"), [movie])
+        # 제목 대부분이 맞은 퍼지 결과 / 부분 문자열 결과는 의도와 상관없이
+        self.assertEqual(age_gate_candidates([partial._replace(title_cover=1.0)], "general"), [movie])
+        self.assertEqual(age_gate_candidates([TitleMatch(movie, 0.7, True, 0.3)], "general"), [movie])
+
+    def test_substring_match_still_gates(self):
+        matches = self.catalog.match_details("her")
+        self.assertEqual([m.movie["title"] for m in matches], ["Her"])
+        self.assertTrue(matches[0].substring)
+        self.assertEqual(age_gate_candidates(matches, "general"), [MOVIES[5]])
+
+    def test_total_is_not_capped_by_k(self):
+        # /voice-search total 은 k=None 결과 길이
+        everything = self.catalog.match_details("a", k=None)
+        self.assertEqual(len(everything), 6)
+        self.assertEqual(self.catalog.match_details("a", k=2), everything[:2])
+
+    def test_edit_distance_with_transposition(self):
+        self.assertEqual(edit_distance("knight", "knihgt"), 1)
+        self.assertEqual(edit_distance("abc", "xyz1234"), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+# test_movies.py
+# 실행 (src/ 에서): python -m unittest discover -s smarterspeaker -t .
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from smarterspeaker.movies import MovieCatalog
+
+MOVIES = [
+    {"id": 1, "title": "Inception", "genre": "SF", "year": 2010, "ageRating": 12},
+    {"id": 2, "title": "The Dark Knight", "genre": "Action", "year": 2008, "ageRating": 15},
+    {"id": 3, "title": "Parasite", "genre": "Drama", "year": 2019, "ageRating": 15},
+    {"id": 4, "title": "Frozen", "genre": "Animation", "year": 2013, "ageRating": 0},
+    {"id": 5, "title": "Oldboy", "genre": "Thriller", "year": 2003, "ageRating": 18},
+]
+
+
+def write_movies(path, movies):
+    # 에디터 / 배포처럼 임시 파일에 쓰고 교체
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(movies, f)
+    os.replace(path + ".tmp", path)
+
+
+class test_movies(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        write_movies(self.path, MOVIES)
+        self.catalog = MovieCatalog(self.path)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def titles(self, movies):
+        return [m["title"] for m in movies]
+
+    def test_ranking_exact_prefix_boundary_substring(self):
+        self.assertEqual(self.titles(self.catalog.search("inception")), ["Inception"])
+        self.assertEqual(self.titles(self.catalog.search("knight")), ["The Dark Knight"])
+
+    def test_short_query_matches_inside_words(self):
+        # 예전 substring 검색처럼 단어 중간도 ("parASite", "frOZen" 은 아님)
+        self.assertEqual(sorted(self.titles(self.catalog.search("as"))), ["Parasite"])
+        self.assertEqual(sorted(self.titles(self.catalog.search("o"))), ["Frozen", "Inception", "Oldboy"])
+
+    def test_filters_and_page(self):
+        page = self.catalog.page("", limit=2, fields=["id"], max_age_rating=15)
+        self.assertEqual(page["count"], 4)
+        self.assertEqual(page["results"], [{"id": 1}, {"id": 2}])
+        self.assertEqual(page["next_offset"], 2)
+        self.assertEqual(page["required_age"], 15)
+
+    def test_page_without_limit_returns_the_rest(self):
+        # GET /movies 에 limit 이 없으면 예전처럼 전부 (잘리지 않음)
+        page = self.catalog.page("", offset=1, limit=None, fields=["id"], max_age_rating=15)
+        self.assertEqual(len(page["results"]), 3)
+        self.assertIsNone(page["next_offset"])
+
+    def test_reload_on_change(self):
+        self.assertIsNotNone(self.catalog.get(5))
+        write_movies(self.path, MOVIES[:2] + [{"id": 9, "title": "Up", "ageRating": 0}])
+        os.utime(self.path, ns=(1, 1))
+        self.assertIsNone(self.catalog.get(5))
+        self.assertEqual(self.titles(self.catalog.search("up")), ["Up"])
+
+    def test_search_during_reload_uses_one_snapshot(self):
+        small = [{"id": 1, "title": "Inception", "ageRating": 12}]
+        errors = []
+
+        def reader():
+            try:
+                for _ in range(300):
+                    for m in self.catalog.search("o"):
+                        self.assertIn("o", m["title"].lower())
+            except Exception as e:   # IndexError / 잘못된 행
+                errors.append(e)
+
+        threads = [threading.Thread(target=reader) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for i in range(50):
+            write_movies(self.path, MOVIES if i % 2 else small)
+            os.utime(self.path, ns=(i + 1, i + 1))
+            self.catalog.refresh()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+# test_state_version.py
+# 실행 (src/ 에서): python -m unittest discover -s smarterspeaker -t .
+import unittest
+
+from smarterspeaker.state_version import StateVersion, etag_matches
+
+
+class test_state_version(unittest.TestCase):
+
+    def setUp(self):
+        self.state = StateVersion(clock=lambda: 1000.0)   # base = 1_000_000
+
+    def test_nothing_changed(self):
+        self.assertEqual(self.state.changes_since("devices", self.state.base), ([], []))
+
+    def test_changes_after_since_only(self):
+        v1 = self.state.bump("devices", [1, 2])
+        self.state.bump("devices", [3])
+        changed, deleted = self.state.changes_since("devices", v1)
+        self.assertEqual((changed, deleted), ([3], []))
+        self.assertEqual(sorted(self.state.changes_since("devices", self.state.base)[0]), [1, 2, 3])
+
+    def test_current_version_is_empty(self):
+        self.state.bump("devices", [1])
+        self.assertEqual(self.state.changes_since("devices", self.state.version), ([], []))
+
+    def test_out_of_range_since_needs_full_reload(self):
+        self.state.bump("devices", [1])
+        # 재시작 전 버전 / 아직 안 생긴 버전 (다른 서버 인스턴스)
+        self.assertIsNone(self.state.changes_since("devices", self.state.base - 1))
+        self.assertIsNone(self.state.changes_since("devices", self.state.version + 1))
+
+    def test_deleted_then_recreated(self):
+        v0 = self.state.version
+        self.state.bump("devices", [1, 2])
+        v1 = self.state.bump("devices", [1], deleted=True)
+        self.assertEqual(self.state.changes_since("devices", v0), ([2], [1]))
+        # 같은 id 가 다시 생기면 삭제가 아니라 변경
+        self.state.bump("devices", [1])
+        self.assertEqual(self.state.changes_since("devices", v1), ([1], []))
+
+    def test_tables_are_separate(self):
+        v0 = self.state.version
+        self.state.bump("zones", [7])
+        self.assertEqual(self.state.changes_since("devices", v0), ([], []))
+        self.assertEqual(self.state.changes_since("zones", v0), ([7], []))
+        self.assertEqual(self.state.table_version("devices"), self.state.base)
+
+    def test_device_events_bump_devices(self):
+        v0 = self.state.version
+        self.state.on_device_events([
+            {"kind": "status", "device": {"id": 1}},
+            {"kind": "created", "device": {"id": 2}},
+            {"kind": "deleted", "device": {"id": 3}},
+        ])
+        self.assertEqual(self.state.changes_since("devices", v0), ([1, 2], [3]))
+
+    def test_external_change_forces_full_reload(self):
+        self.state.validate("devices", (1, 1, 5))     # 첫 관측은 기준만 잡음
+        v0 = self.state.version
+        self.state.bump("devices", [1])
+        v1 = self.state.version
+        self.state.validate("devices", (1, 1, 6))     # 우리 bump 뒤 첫 관측 → 재동기화 없음
+        self.assertEqual(self.state.version, v1)
+        # 이벤트 누락/DB 직접 수정: 서명만 바뀜
+        self.assertTrue(self.state.validate("devices", (2, 2, 9)))
+        self.assertGreater(self.state.version, v1)
+        self.assertIsNone(self.state.changes_since("devices", v0))
+        self.assertIsNone(self.state.changes_since("devices", v1))
+        self.assertEqual(self.state.changes_since("devices", self.state.version), ([], []))
+        self.assertFalse(self.state.matches("devices", f'W/"devices-{v1}"'))
+
+    def test_same_signature_keeps_version(self):
+        self.state.validate("zones", (3, 3, 0))
+        v0 = self.state.version
+        self.assertFalse(self.state.validate("zones", (3, 3, 0)))
+        self.assertEqual(self.state.version, v0)
+
+    def test_if_none_match(self):
+        etag = self.state.etag("devices")
+        self.assertTrue(self.state.matches("devices", etag))
+        self.assertTrue(self.state.matches("devices", f'W/"other", {etag}'))
+        self.assertTrue(self.state.matches("devices", "*"))
+        self.assertFalse(self.state.matches("devices", None))
+        self.assertFalse(self.state.matches("devices", etag[:-2] + '"'))
+        self.state.bump("devices", [1])
+        self.assertFalse(self.state.matches("devices", etag))
+
+
+    def test_etag_matches_is_exact(self):
+        # 부분 문자열이면 안 됨 (W/"home-1-2" 는 W/"home-1-23" 에 들어 있음)
+        self.assertFalse(etag_matches('W/"home-1-2"', 'W/"home-1-23"'))
+        self.assertTrue(etag_matches('W/"home-1-2"', ' W/"home-1-23" ,W/"home-1-2" '))
+        self.assertTrue(etag_matches('W/"home-1-2"', "*"))
+        self.assertFalse(etag_matches('W/"home-1-2"', ""))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+# src/smarterspeaker/voice_search_store.py
+"""
+/voice-search 결과 저장소 + 푸시 채널.
+
+예전에는 api._last_voice_search 전역 하나에 덮어써서, 화자/프론트가 여럿이면
+서로 결과를 덮어쓰고 프론트는 1.5초마다 폴링해야 했다.
+
+- (user, device) 키별 최신 결과, TTL 지나면 만료, max_entries 넘으면 오래된 것부터 삭제
+- 결과마다 seq (단조 증가) 를 붙여서 클라이언트가 처리한 것 / 놓친 것을 구분
+- subscribe() 로 받은 asyncio.Queue 에 새 결과가 바로 들어감 (SSE 엔드포인트에서 사용)
+  publish 는 FastAPI 스레드풀(동기 엔드포인트)에서 불리므로 call_soon_threadsafe 로 넘김
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from smarterspeaker.config import VOICE_SEARCH_TTL, VOICE_SEARCH_MAX_ENTRIES
+
+Key = Tuple[Optional[str], Optional[str]]
+
+EMPTY_RESULT: Dict[str, Any] = {
+    "raw_text": "",
+    "query": "",
+    "count": 0,
+    "total": 0,
+    "results": [],
+    "scores": [],
+    "user": None,
+    "device": None,
+    "allowed": True,
+    "reason": None,
+    "seq": 0,
+}
+
+
+def resync_event(seq: int) -> Dict[str, Any]:
+    """구독자 큐가 넘쳐서 이벤트를 버렸음 (seq 까지 전체를 다시 읽어야 함)"""
+    return {"kind": "resync", "seq": seq}
+
+
+@dataclass(eq=False)
+class Subscriber:
+    queue: asyncio.Queue
+    loop: asyncio.AbstractEventLoop
+    user: Optional[str] = None
+    device: Optional[str] = None
+
+    def wants(self, event: Dict[str, Any]) -> bool:
+        if self.user is not None and event.get("user") != self.user:
+            return False
+        if self.device is not None and event.get("device") != self.device:
+            return False
+        return True
+
+    def push(self, event: Dict[str, Any]) -> None:
+        # 느린 클라이언트: 몇 개만 몰래 버리면 클라이언트 상태가 어긋남 ->
+        # 밀린 걸 다 버리고 {"kind": "resync"} 하나만 (클라이언트가 전체를 다시 읽음)
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(resync_event(event["seq"]))
+            return
+        self.queue.put_nowait(event)
+
+
+class VoiceSearchStore:
+    def __init__(self, max_entries: int = VOICE_SEARCH_MAX_ENTRIES, ttl: float = VOICE_SEARCH_TTL,
+                 clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Key, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._subscribers: List[Subscriber] = []
+        self._seq = 0
+
+    # -----------------------------------------------------
+    #  결과 저장 / 조회
+    # -----------------------------------------------------
+
+    def put(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """결과 저장 + 구독자에게 push. seq 가 붙은 결과를 반환."""
+        with self._lock:
+            self._seq += 1
+            event = {**result, "seq": self._seq}
+            key = (event.get("user"), event.get("device"))
+            self._entries[key] = (self.clock(), event)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            subscribers = list(self._subscribers)
+
+        for sub in subscribers:
+            if sub.wants(event):
+                try:
+                    sub.loop.call_soon_threadsafe(sub.push, event)
+                except RuntimeError:
+                    # 이벤트 루프가 이미 닫힘 (연결 끊긴 구독자)
+                    self.unsubscribe(sub)
+        return event
+
+    def get(self, user: Optional[str] = None, device: Optional[str] = None) -> Dict[str, Any]:
+        """
+        user / device 에 맞는 가장 최근 결과 (없거나 만료면 빈 결과).
+        둘 다 None 이면 전체 중 가장 최근 것 (예전 GET /voice-search 와 같은 동작).
+        """
+        with self._lock:
+            self._expire()
+            for (u, d), (_, event) in reversed(self._entries.items()):
+                if user is not None and u != user:
+                    continue
+                if device is not None and d != device:
+                    continue
+                return event
+        return dict(EMPTY_RESULT, user=user, device=device)
+
+    def reset(self, user: Optional[str] = None, device: Optional[str] = None) -> int:
+        """맞는 결과 삭제 (둘 다 None 이면 전부). 지운 개수 반환."""
+        with self._lock:
+            keys = [
+                k for k in self._entries
+                if (user is None or k[0] == user) and (device is None or k[1] == device)
+            ]
+            for k in keys:
+                del self._entries[k]
+            return len(keys)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire()
+            return len(self._entries)
+
+    def _expire(self) -> None:
+        # OrderedDict 앞쪽이 가장 오래된 결과
+        now = self.clock()
+        while self._entries:
+            key, (stamp, _) = next(iter(self._entries.items()))
+            if now - stamp <= self.ttl:
+                break
+            del self._entries[key]
+
+    # -----------------------------------------------------
+    #  푸시 구독
+    # -----------------------------------------------------
+
+    def subscribe(self, user: Optional[str] = None, device: Optional[str] = None,
+                  maxsize: int = 16) -> Subscriber:
+        """이벤트 루프 안(async 엔드포인트)에서 호출"""
+        sub = Subscriber(asyncio.Queue(maxsize=maxsize), asyncio.get_running_loop(), user, device)
+        with self._lock:
+            self._subscribers.append(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        with self._lock:
+            if sub in self._subscribers:
+                self._subscribers.remove(sub)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)